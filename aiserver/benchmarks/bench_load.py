@@ -0,0 +1,321 @@
+"""End-to-end load test of the ADK API server running root_agent.
+
+Starts the server (the `adk api_server` FastAPI app, in-memory sessions) in a
+child process with every Gemini model answered by benchmarks/llm_stub.py and
+SerpApi/RailRadar served by benchmarks/provider_stub.py, so no model or
+provider quota is used. Simulated users then run multi-turn trip-planning
+scripts (search, compare, hotels, budget, day plan) over HTTP at each
+concurrency level, one session per script run.
+
+The JSON report (--out) holds, per concurrency level, per-turn p50/p95/p99
+latency, completed sessions per second, turn error rate and the server's
+RSS after the level and its growth since warm-up. Pass a previous report as
+--baseline to print the change against it.
+
+Run from aiserver/:
+    python -m benchmarks.bench_load [--concurrency 1 8 32] [--sessions 40] [--llm-latency-ms 300]
+        [--provider-latency-ms 150] [--error-rate 0] [--out report.json] [--baseline old.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.provider_stub import ProviderStub, StubConfig
+
+AISERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_NAME = "tripmate"
+
+
+def scripts(today: Optional[date] = None) -> List[List[str]]:
+    """Multi-turn conversations the simulated users follow; dates are a month out so searches stay valid."""
+    start = (today or date.today()) + timedelta(days=30)
+    d1, d2, d3 = (start + timedelta(days=i) for i in range(3))
+    return [
+        [
+            f"Find flights from DEL to GOI on {d1}",
+            f"Show hotels in Goa from {d1} to {d3}",
+            "Fit the flight and the hotel into a budget of 45000",
+            "Plan my days: 3 days in Goa",
+            "Thanks, that looks great!",
+        ],
+        [
+            f"Any trains from NDLS to MMCT on {d1}?",
+            f"Should I take flights or trains from DEL to BOM on {d1}? Please compare",
+            f"Hotels in Mumbai from {d1} to {d2}",
+            "What's the best option within a budget of 20000?",
+        ],
+        [
+            "Hi! I want to plan a trip",
+            f"flights BLR to DEL on {d2}",
+            f"hotels in New Delhi from {d2} to {d3}",
+            "Which one would you pick?",
+        ],
+    ]
+
+
+# ---------------- Server ----------------
+
+def _configure_env(stub: ProviderStub) -> Dict[str, str]:
+    """Environment for the server process: stub providers, no rate limits, nothing written to disk by default."""
+    stub.configure_env()
+    env = dict(os.environ)
+    env["PYTHONPATH"] = AISERVER_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env["SERPAPI_RATE_LIMIT"] = "0"
+    env["RAILRADAR_RATE_LIMIT"] = "0"
+    for key in ("TRIPMATE_CACHE_PATH", "TRIPMATE_MODEL_CACHE_PATH", "TRIPMATE_RAIL_STORE_PATH", "TRIPMATE_STATE_PATH", "TRIPMATE_TRACE_PATH"):
+        env.setdefault(key, "")
+    env.setdefault("GOOGLE_API_KEY", "stub")  # never used: the stub model answers every call
+    return env
+
+
+def serve(port: int, latency_ms: float, jitter_ms: float, error_rate: float) -> None:
+    """Server process entry point: ADK API app for aiserver/ with the stub model installed."""
+    import uvicorn
+    from google.adk.cli.fast_api import get_fast_api_app
+
+    from benchmarks.llm_stub import StubLlmConfig, install
+
+    install(StubLlmConfig(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate))
+    app = get_fast_api_app(agents_dir=AISERVER_DIR, web=False, use_local_storage=False, host="127.0.0.1", port=port)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mib(pid: int) -> Optional[float]:
+    """Current RSS of process `pid` from /proc (None where /proc is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return round(int(fields["VmRSS"].split()[0]) / 1024, 1)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/list-apps", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+# ---------------- Load ----------------
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+async def _turn(client: httpx.AsyncClient, user: str, session: str, text: str) -> Optional[str]:
+    """Send one user message; returns an error label or None."""
+    response = await client.post("/run", json={
+        "app_name": APP_NAME,
+        "user_id": user,
+        "session_id": session,
+        "new_message": {"role": "user", "parts": [{"text": text}]},
+    })
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    events = response.json()
+    if any(e.get("error_code") for e in events):
+        return next(e["error_code"] for e in events if e.get("error_code"))
+    if not any(p.get("text") for e in events for p in (e.get("content") or {}).get("parts") or []):
+        return "no_reply"
+    return None
+
+
+async def run_level(base_url: str, conversations: List[List[str]], sessions: int, concurrency: int, think_ms: float, level: int) -> Dict[str, Any]:
+    """Run `sessions` scripted sessions, at most `concurrency` at a time; latency is per turn."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    failed_sessions = 0
+
+    async def _session(i: int, client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> None:
+        nonlocal failed_sessions
+        async with semaphore:
+            user, session = f"load-{level}-{i}", f"s-{level}-{i}"
+            failed = False
+            try:
+                created = await client.post(f"/apps/{APP_NAME}/users/{user}/sessions", json={"session_id": session})
+                created.raise_for_status()
+                for text in conversations[i % len(conversations)]:
+                    start = time.perf_counter()
+                    try:
+                        error = await _turn(client, user, session, text)
+                    except httpx.HTTPError as e:
+                        error = type(e).__name__
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if error:
+                        errors[error] = errors.get(error, 0) + 1
+                        failed = True
+                    if think_ms:
+                        await asyncio.sleep(think_ms / 1000)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                failed = True
+            failed_sessions += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(_session(i, client, semaphore) for i in range(sessions)))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    turns = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "turns": turns,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "sessions_per_s": round((sessions - failed_sessions) / wall, 3),
+        "turns_per_s": round(turns / wall, 2),
+        "error_rate": round(sum(errors.values()) / turns, 4) if turns else 0.0,
+        "failed_sessions": failed_sessions,
+        "errors": errors,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per concurrency level present in both reports: relative change of p50, p99, sessions/s and RSS growth."""
+    old = {r["concurrency"]: r for r in baseline.get("levels", [])}
+    lines = []
+    for row in report["levels"]:
+        prev = old.get(row["concurrency"])
+        if not prev:
+            continue
+
+        def _delta(key: str) -> str:
+            if not prev[key]:
+                return "   n/a"
+            return f"{(row[key] - prev[key]) / prev[key] * 100:+6.1f}%"
+
+        growth = (row.get("rss_growth_mib") or 0) - (prev.get("rss_growth_mib") or 0)
+        lines.append(
+            f"c={row['concurrency']:<4} p50 {_delta('p50_ms')}  p99 {_delta('p99_ms')}  "
+            f"sessions/s {_delta('sessions_per_s')}  errors {row['error_rate'] - prev['error_rate']:+.2%}  rss growth {growth:+.1f} MiB"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent sessions per level")
+    parser.add_argument("--sessions", type=int, default=40, help="Sessions per level")
+    parser.add_argument("--warmup-sessions", type=int, default=3, help="Sessions run before measuring (imports, first agent builds)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a session's turns")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--provider-latency-ms", type=float, default=150.0)
+    parser.add_argument("--provider-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Provider error rate")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--server-log", default=os.devnull, help="File for the server's output (tracebacks of failed turns)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)  # server child process
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate)
+        return
+
+    logging.getLogger().setLevel(logging.ERROR)
+    config = StubConfig(latency_ms=args.provider_latency_ms, jitter_ms=args.provider_jitter_ms, error_rate=args.error_rate)
+    conversations = scripts()
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with ProviderStub(config) as stub:
+        env = _configure_env(stub)
+        command = [
+            sys.executable, "-m", "benchmarks.bench_load", "--serve", str(port),
+            "--llm-latency-ms", str(args.llm_latency_ms), "--llm-jitter-ms", str(args.llm_jitter_ms),
+            "--llm-error-rate", str(args.llm_error_rate),
+        ]
+        log = open(args.server_log, "a")
+        proc = subprocess.Popen(command, cwd=AISERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            _wait_ready(base_url, proc)
+            rss_start = _rss_mib(proc.pid)
+            if args.warmup_sessions:
+                asyncio.run(run_level(base_url, conversations, args.warmup_sessions, 1, 0.0, level=0))
+            rss_warm = _rss_mib(proc.pid)
+            print(f"server rss {rss_start} MiB at start, {rss_warm} MiB after warm-up")
+            levels = []
+            for level, concurrency in enumerate(args.concurrency, start=1):
+                row = asyncio.run(run_level(base_url, conversations, args.sessions, concurrency, args.think_ms, level))
+                row["rss_mib"] = _rss_mib(proc.pid)
+                row["rss_growth_mib"] = round(row["rss_mib"] - rss_warm, 1) if row["rss_mib"] is not None and rss_warm is not None else None
+                levels.append(row)
+                print(
+                    f"c={concurrency:<4} turns {row['turns']:<5} p50 {row['p50_ms']:>9}ms p95 {row['p95_ms']:>9}ms "
+                    f"p99 {row['p99_ms']:>9}ms {row['sessions_per_s']:>7} sessions/s errors {row['error_rate']:.2%} "
+                    f"rss {row['rss_mib']} MiB (+{row['rss_growth_mib']})"
+                )
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+        stub_requests = dict(config.counters)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "llm_stub": {"latency_ms": args.llm_latency_ms, "jitter_ms": args.llm_jitter_ms, "error_rate": args.llm_error_rate},
+        "provider_stub": {
+            "latency_ms": args.provider_latency_ms,
+            "jitter_ms": args.provider_jitter_ms,
+            "error_rate": args.error_rate,
+            "requests_served": stub_requests,
+        },
+        "sessions_per_level": args.sessions,
+        "think_ms": args.think_ms,
+        "rss_start_mib": rss_start,
+        "rss_warm_mib": rss_warm,
+        "levels": levels,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline: Optional[Dict[str, Any]] = json.load(f)
+        print(f"\nChange vs {args.baseline}:")
+        for line in compare(report, baseline):
+            print(line)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Micro-benchmark: parse throughput and peak memory of flight/hotel normalization.
+
+Compares the record pipeline in tripmate/library/normalize.py against the
+parsing previously done inline in flights_search/hotels_search (per-entry
+Pydantic models carrying the raw payload, raw response rendering for the
+debug print, and for hotels a model_dump/re-validate round trip).
+
+Run from aiserver/:
+    python -m benchmarks.bench_normalize [--sizes 20 100 500] [--out report.json]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from benchmarks.synthetic import flights_response, hotels_response
+from tripmate.library.normalize import format_duration, normalize_flights, normalize_hotels
+from tripmate.tools.flightSearchTool import FlightSearchOutput, to_flight_output
+from tripmate.tools.hotelSearchTool import HotelSearchOutput, extract_hotel_data, to_hotel_output
+
+
+def legacy_flights(data: Dict[str, Any], currency: str = "INR", budget: float = 10000.0) -> FlightSearchOutput:
+    # The parse loop flights_search used before the record pipeline, including
+    # rendering the raw response for its debug print.
+    _ = f"\nRaw SerpApi Response: {data}\n"
+
+    # choose which arrays to parse: best_flights first (if present), then other_flights
+    candidates = []
+    if isinstance(data.get("best_flights"), list):
+        candidates.extend(data.get("best_flights", []))
+    if isinstance(data.get("other_flights"), list):
+        candidates.extend(data.get("other_flights", []))
+    # some responses may include 'flights' or differently structured entries; be defensive
+    if not candidates and isinstance(data.get("flights"), list):
+        candidates.extend(data.get("flights", []))
+
+    results = []
+    for entry in candidates:
+        # Common safe-extraction helpers
+        def _safe(d, *keys, default=None):
+            cur = d
+            for k in keys:
+                if not isinstance(cur, dict) or k not in cur:
+                    return default
+                cur = cur[k]
+            return cur
+
+        # price extraction - can be int, str, or dict
+        price = None
+        currency_code = None
+
+        price_field = entry.get("price")
+        if isinstance(price_field, (int, float, str)):
+            try:
+                price = float(price_field)
+            except Exception:
+                price = None
+        elif isinstance(price_field, dict):
+            price = price_field.get("total") or price_field.get("price") or price_field.get("value")
+            currency_code = price_field.get("currency") or currency_code
+
+        # fallback
+        if price is None:
+            price = entry.get("total_price") or _safe(entry, "price", "total")
+
+        # airlines: try to collect flight-level airline names/codes
+        airlines = []
+        segments = []
+        raw_segments = entry.get("flights") or entry.get("segments") or []
+        if isinstance(raw_segments, list):
+            for seg in raw_segments:
+                seg_info = {
+                    "departure_airport": _safe(seg, "departure_airport", "id") or _safe(seg, "departure_airport", "name"),
+                    "arrival_airport": _safe(seg, "arrival_airport", "id") or _safe(seg, "arrival_airport", "name"),
+                    "departure_time": _safe(seg, "departure_airport", "time") or seg.get("departure_time"),
+                    "arrival_time": _safe(seg, "arrival_airport", "time") or seg.get("arrival_time"),
+                    "airline": _safe(seg, "airline", "name") or seg.get("airline"),
+                    "duration": seg.get("duration")
+                }
+                if seg_info.get("airline"):
+                    airlines.append(seg_info["airline"])
+                segments.append(seg_info)
+
+        # total duration and stops
+        total_duration = entry.get("total_duration") or entry.get("duration") or entry.get("total_trip_duration")
+        stops = None
+        if isinstance(entry.get("stops"), (int, str)):
+            try:
+                stops = int(entry.get("stops"))
+            except Exception:
+                stops = None
+        else:
+            # infer from segments
+            if isinstance(segments, list):
+                stops = max(0, len(segments) - 1) if segments else None
+
+        booking_token = entry.get("booking_token") or _safe(entry, "booking_options", 0, "booking_token")
+
+        result_obj = FlightSearchOutput.FlightSearchResult(
+            price=float(price) if price is not None else None,
+            currency=currency_code or currency,
+            airlines=list(dict.fromkeys([a for a in airlines if a])),  # unique preserving order
+            total_duration=format_duration(total_duration),
+            stops=stops,
+            segments=segments if segments else None,
+            booking_token=booking_token,
+            raw=entry
+        )
+        results.append(result_obj)
+
+    # Optionally filter by budget (provided by user)
+    filtered_results = []
+    for r in results:
+        if r.price is None:
+            # keep unknown-price results (optional), or skip them
+            filtered_results.append(r)
+            continue
+        if r.price <= budget:
+            filtered_results.append(r)
+
+    return FlightSearchOutput(flights=filtered_results)
+
+
+def records_flights(data: Dict[str, Any]) -> FlightSearchOutput:
+    return to_flight_output(normalize_flights(data, "INR"))
+
+
+def legacy_hotels(data: Dict[str, Any]) -> HotelSearchOutput:
+    # Validate, model_dump, then validate again, keeping rawSearchData (as hotels_search did).
+    dumped = [extract_hotel_data(h).model_dump() for h in data["properties"]]
+    return HotelSearchOutput(hotels=dumped)
+
+
+def records_hotels(data: Dict[str, Any]) -> HotelSearchOutput:
+    return to_hotel_output(normalize_hotels(data["properties"]))
+
+
+def measure(fn: Callable[[Dict[str, Any]], Any], data: Dict[str, Any], min_time: float = 0.5) -> Dict[str, float]:
+    """Responses/second over at least `min_time` seconds, and peak traced bytes for one response."""
+    fn(data)  # warm up
+    iterations, start = 0, time.perf_counter()
+    while True:
+        fn(data)
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    result = fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"responses_per_sec": round(iterations / elapsed, 1), "peak_kib_per_response": round(peak / 1024, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--out", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        flights, hotels = flights_response(size), hotels_response(size)
+        for tool, data, legacy, records in (
+            ("flights", flights, legacy_flights, records_flights),
+            ("hotels", hotels, legacy_hotels, records_hotels),
+        ):
+            report.append({
+                "tool": tool,
+                "results": size,
+                "legacy": measure(legacy, data, args.min_time),
+                "records": measure(records, data, args.min_time),
+            })
+
+    for row in report:
+        speedup = row["records"]["responses_per_sec"] / row["legacy"]["responses_per_sec"]
+        print(
+            f"{row['tool']:8} n={row['results']:<5} "
+            f"legacy {row['legacy']['responses_per_sec']:>9}/s {row['legacy']['peak_kib_per_response']:>8} KiB | "
+            f"records {row['records']['responses_per_sec']:>9}/s {row['records']['peak_kib_per_response']:>8} KiB | "
+            f"x{speedup:.2f}"
+        )
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Cold-start benchmark: import time and RSS per component of the agent server.
+
+Every measurement runs in a fresh interpreter, so nothing is shared between
+components or repeats:
+
+    python            bare interpreter (RSS baseline)
+    google.adk        ADK agents package
+    root (lazy)       tripmate.agent with sub-agents as manifest placeholders
+    root (eager)      tripmate.agent with TRIPMATE_LAZY_AGENTS=0
+    <AgentName>       building one sub-agent (its module and tools) on top of the lazy root
+
+The report gives the median time and peak-RSS growth of each step over
+--repeat runs. Adding a sub-agent should leave "root (lazy)" flat and show
+up only as a new per-agent row. Pass --max-startup-ms to fail (exit 1) when
+the lazy root takes longer, e.g. in CI.
+
+Run from aiserver/:
+    python -m benchmarks.bench_startup [--repeat 5] [--out report.json] [--baseline old.json] [--max-startup-ms 2000]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+AISERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: `setup` is not timed, `step` is; prints one JSON line.
+_CHILD = """
+import json, platform, resource, time
+def rss():
+    # ru_maxrss keeps the parent's peak across fork/exec on Linux; VmHWM is this process's own
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(l.split()[1]) for l in f if l.startswith("VmHWM:")) / 1024
+    except (OSError, StopIteration):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+{setup}
+before = rss()
+start = time.perf_counter()
+{step}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000, "rss_mib": rss(), "delta_mib": rss() - before}}))
+"""
+
+
+def _components() -> List[Dict[str, Any]]:
+    sys.path.insert(0, AISERVER_DIR)
+    from tripmate.library.agent_registry import discover
+
+    components = [
+        {"component": "python", "setup": "", "step": "pass"},
+        {"component": "google.adk", "setup": "", "step": "from google.adk.agents import Agent"},
+        {"component": "root (lazy)", "setup": "", "step": "import tripmate.agent", "env": {"TRIPMATE_LAZY_AGENTS": "1"}},
+        {"component": "root (eager)", "setup": "", "step": "import tripmate.agent", "env": {"TRIPMATE_LAZY_AGENTS": "0"}},
+    ]
+    for manifest in discover():
+        if manifest.enabled:
+            components.append({
+                "component": manifest.name,
+                "setup": "from tripmate.agent import agent_registry",
+                "step": f"agent_registry.build({manifest.name!r})",
+                "env": {"TRIPMATE_LAZY_AGENTS": "1"},
+            })
+    return components
+
+
+def _env(extra: Dict[str, str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = AISERVER_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    # No span log, disk caches or metrics port: only imports and construction are measured
+    env.update({"TRIPMATE_TRACE_PATH": "", "TRIPMATE_CACHE_PATH": "", "TRIPMATE_MODEL_CACHE_PATH": "", "TRIPMATE_RAIL_STORE_PATH": ""})
+    env.pop("TRIPMATE_METRICS_PORT", None)
+    env.update(extra)
+    return env
+
+
+def measure(component: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Median step time and RSS of `component` over `repeat` fresh interpreters."""
+    code = _CHILD.format(setup=component["setup"], step=component["step"])
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=AISERVER_DIR, env=_env(component.get("env", {})),
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{component['component']}: {proc.stderr.strip().splitlines()[-1:]}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "component": component["component"],
+        "import_ms": round(statistics.median(r["ms"] for r in runs), 1),
+        "import_ms_min": round(min(r["ms"] for r in runs), 1),
+        "rss_mib": round(statistics.median(r["rss_mib"] for r in runs), 1),
+        "rss_delta_mib": round(statistics.median(r["delta_mib"] for r in runs), 1),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per component present in both reports: change of import time and RSS growth."""
+    old = {r["component"]: r for r in baseline.get("components", [])}
+    lines = []
+    for row in report["components"]:
+        prev = old.get(row["component"])
+        if not prev:
+            continue
+        delta = f"{(row['import_ms'] - prev['import_ms']) / prev['import_ms'] * 100:+6.1f}%" if prev["import_ms"] else "   n/a"
+        lines.append(f"{row['component']:26} time {delta}  rss {row['rss_delta_mib'] - prev['rss_delta_mib']:+6.1f} MiB")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per component")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-startup-ms", type=float, help="Exit 1 if the lazy root import takes longer")
+    args = parser.parse_args()
+
+    rows = []
+    for component in _components():
+        row = measure(component, args.repeat)
+        rows.append(row)
+        print(
+            f"{row['component']:26} {row['import_ms']:>8} ms (min {row['import_ms_min']:>8}) "
+            f"rss {row['rss_mib']:>6} MiB (+{row['rss_delta_mib']} MiB)"
+        )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "components": rows,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline: Optional[Dict[str, Any]] = json.load(f)
+        print(f"\nChange vs {args.baseline}:")
+        for line in compare(report, baseline):
+            print(line)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.max_startup_ms is not None:
+        lazy = next(r for r in rows if r["component"] == "root (lazy)")
+        if lazy["import_ms"] > args.max_startup_ms:
+            print(f"\nroot (lazy) import {lazy['import_ms']} ms exceeds {args.max_startup_ms} ms")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""End-to-end benchmark of the search tools against the local provider stub.
+
+Starts benchmarks/provider_stub.py in-process, points SerpApi/RailRadar at it
+and calls flights_search, hotels_search and train_search at each result size
+and concurrency level. Response and schedule caches are disabled (TTL 0,
+memory-only) unless --warm is given, so every call reaches the stub.
+
+The JSON report (--out) holds p50/p95/p99 latency, throughput, error counts
+and peak RSS per scenario; pass a previous report as --baseline to print
+the change in p50/p95 and throughput against it.
+
+Run from aiserver/:
+    python -m benchmarks.bench_tools [--tools flights hotels trains] [--sizes 20 100]
+        [--concurrency 1 8] [--modes sync async] [--hotel-pages 1] [--requests 50] [--latency-ms 50] [--error-rate 0]
+        [--out report.json] [--baseline old.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.provider_stub import ProviderStub, StubConfig
+
+TOOLS = ("flights", "hotels", "trains")
+
+
+def _configure_env(stub: ProviderStub, warm: bool) -> None:
+    # Must run before tripmate is imported: tools and clients read these once.
+    stub.configure_env()
+    os.environ["SERPAPI_RATE_LIMIT"] = "0"
+    os.environ["RAILRADAR_RATE_LIMIT"] = "0"
+    os.environ["TRIPMATE_CACHE_PATH"] = ""
+    os.environ["TRIPMATE_RAIL_STORE_PATH"] = ""
+    os.environ.setdefault("TRIPMATE_TRACE_PATH", "")  # set a path to keep the span log of a run
+    if not warm:
+        os.environ["TRIPMATE_CACHE_TTL_GOOGLE_FLIGHTS"] = "0"
+        os.environ["TRIPMATE_CACHE_TTL_GOOGLE_HOTELS"] = "0"
+        os.environ["RAILRADAR_SCHEDULE_TTL_DAYS"] = "0"
+        os.environ["RAILRADAR_PAIR_TTL_DAYS"] = "0"
+
+
+def _tool_calls(hotel_pages: int = 1) -> Dict[str, Callable[[int], Any]]:
+    from tripmate.tools.flightSearchTool import flights_search
+    from tripmate.tools.hotelSearchTool import hotels_search
+    from tripmate.tools.trainSearchTool import train_search
+
+    return {
+        "flights": lambda i: flights_search("DEL", "BOM", "2026-11-02", budget=1e9).flights,
+        "hotels": lambda i: hotels_search(f"Hotels in Goa {i}", "2026-11-02", "2026-11-04", max_pages=hotel_pages).hotels,
+        "trains": lambda i: train_search("NDLS", "MMCT", "2026-11-02").trains,
+    }
+
+
+def _async_tool_calls(hotel_pages: int = 1) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    from tripmate.tools.flightSearchTool import flights_search_async
+    from tripmate.tools.hotelSearchTool import hotels_search_async
+    from tripmate.tools.trainSearchTool import train_search_async
+
+    async def _flights(i: int):
+        return (await flights_search_async("DEL", "BOM", "2026-11-02", budget=1e9)).flights
+
+    async def _hotels(i: int):
+        return (await hotels_search_async(f"Hotels in Goa {i}", "2026-11-02", "2026-11-04", max_pages=hotel_pages)).hotels
+
+    async def _trains(i: int):
+        return (await train_search_async("NDLS", "MMCT", "2026-11-02")).trains
+
+    return {"flights": _flights, "hotels": _hotels, "trains": _trains}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def run_scenario(call: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `requests` calls from `concurrency` threads; latency is measured per call."""
+
+    def _timed(i: int):
+        start = time.perf_counter()
+        try:
+            results = call(i)
+            return time.perf_counter() - start, None, len(results)
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__, 0
+
+    call(-1)  # warm up imports, pools and connections
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(_timed, range(requests)))
+    return _summarize(outcomes, requests, time.perf_counter() - wall_start)
+
+
+def run_scenario_async(call: Callable[[int], Awaitable[Any]], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `requests` awaited calls, at most `concurrency` in flight, on one event loop."""
+
+    async def _run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _timed(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    results = await call(i)
+                    return time.perf_counter() - start, None, len(results)
+                except Exception as e:
+                    return time.perf_counter() - start, type(e).__name__, 0
+
+        await call(-1)
+        wall_start = time.perf_counter()
+        outcomes = await asyncio.gather(*(_timed(i) for i in range(requests)))
+        return _summarize(list(outcomes), requests, time.perf_counter() - wall_start)
+
+    return asyncio.run(_run())
+
+
+def _summarize(outcomes: List[tuple], requests: int, wall: float) -> Dict[str, Any]:
+    latencies = sorted(o[0] * 1000 for o in outcomes)
+    errors: Dict[str, int] = {}
+    for _, err, _ in outcomes:
+        if err:
+            errors[err] = errors.get(err, 0) + 1
+    return {
+        "requests": requests,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "throughput_rps": round(requests / wall, 2),
+        "errors": errors,
+        "empty_results": sum(1 for _, err, n in outcomes if not err and n == 0),
+        "peak_rss_mib": _peak_rss_mib(),
+    }
+
+
+def _scenario_key(row: Dict[str, Any]) -> tuple:
+    return row["tool"], row.get("mode", "sync"), row["results"], row["concurrency"]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per scenario present in both reports: relative change of p50, p95 and throughput."""
+    old = {_scenario_key(r): r for r in baseline.get("scenarios", [])}
+    lines = []
+    for row in report["scenarios"]:
+        prev = old.get(_scenario_key(row))
+        if not prev:
+            continue
+
+        def _delta(key: str) -> str:
+            if not prev[key]:
+                return "   n/a"
+            return f"{(row[key] - prev[key]) / prev[key] * 100:+6.1f}%"
+
+        lines.append(
+            f"{row['tool']:8} {row.get('mode', 'sync'):5} n={row['results']:<5} c={row['concurrency']:<3} "
+            f"p50 {_delta('p50_ms')}  p95 {_delta('p95_ms')}  rps {_delta('throughput_rps')}"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="+", choices=TOOLS, default=list(TOOLS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--modes", nargs="+", choices=("sync", "async"), default=["sync"],
+                        help="sync: tool functions on a thread pool; async: the *_async tools on one event loop")
+    parser.add_argument("--requests", type=int, default=50, help="Calls per scenario")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hotel-pages", type=int, default=1, help="Result pages served and followed per hotel search")
+    parser.add_argument("--record-dir", help="Replay <name>.json payloads from this directory")
+    parser.add_argument("--warm", action="store_true", help="Keep response/schedule caches enabled")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+    # Pool overflow and retry warnings would drown the table; they show up as latency/errors anyway.
+    logging.getLogger().setLevel(logging.ERROR)
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        hotel_pages=args.hotel_pages,
+        record_dir=args.record_dir,
+    )
+    with ProviderStub(config) as stub:
+        _configure_env(stub, args.warm)
+        calls = {"sync": _tool_calls(args.hotel_pages), "async": _async_tool_calls(args.hotel_pages)}
+        runners = {"sync": run_scenario, "async": run_scenario_async}
+
+        scenarios = []
+        for tool in args.tools:
+            for size in args.sizes:
+                # Trains scale with the number of trains on the corridor
+                config.flight_results = config.hotel_results = size
+                config.trains = max(1, size // 10)
+                for mode in args.modes:
+                    for concurrency in args.concurrency:
+                        row = {"tool": tool, "mode": mode, "results": size, "concurrency": concurrency}
+                        row.update(runners[mode](calls[mode][tool], args.requests, concurrency))
+                        scenarios.append(row)
+                        print(
+                            f"{tool:8} {mode:5} n={size:<5} c={concurrency:<3} "
+                            f"p50 {row['p50_ms']:>8}ms p95 {row['p95_ms']:>8}ms p99 {row['p99_ms']:>8}ms "
+                            f"{row['throughput_rps']:>8} req/s errors {sum(row['errors'].values()):<3} "
+                            f"rss {row['peak_rss_mib']} MiB"
+                        )
+        stub_requests = dict(config.counters)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "stub": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "hotel_pages": args.hotel_pages,
+            "record_dir": args.record_dir,
+            "warm": args.warm,
+            "requests_served": stub_requests,
+        },
+        "scenarios": scenarios,
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline: Optional[Dict[str, Any]] = json.load(f)
+        print(f"\nChange vs {args.baseline}:")
+        for line in compare(report, baseline):
+            print(line)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
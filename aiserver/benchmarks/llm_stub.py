@@ -0,0 +1,207 @@
+"""Deterministic stand-in for the Gemini models the agents are configured with.
+
+`install(StubLlmConfig(...))` registers `StubLlm` for the same model names
+as ADK's Gemini class, so `root_agent` and every sub-agent call the stub
+without any change to the agents. It plays a plausible model. It reads the
+latest user message and does one of three things:
+
+    - calls the tool the message asks for when the agent has it
+      (flights / trains / compare / hotels / budget / plan days), with
+      codes, dates and amounts taken from the message;
+    - transfers to the agent that has that tool when the agent does not;
+    - answers with text once the tool's response is in, or when nothing
+      matches.
+
+The same request always gets the same response; added latency (with jitter)
+and injected errors are random per call, like benchmarks/provider_stub.py.
+"""
+import asyncio
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Tool -> agent that has it; the stub transfers there when the current agent lacks the tool
+TOOL_AGENTS = {
+    "flights_search_async": "TransportAgent",
+    "train_search_async": "TransportAgent",
+    "transport_compare_async": "TransportAgent",
+    "hotels_search_async": "HotelAgent",
+    "optimize_trip_budget": "BudgetOptimizationAgent",
+    "plan_itinerary_days": "ItineraryGenerationAgent",
+}
+
+# First matching rule wins
+_RULES = (
+    (re.compile(r"\bbudget\b"), "optimize_trip_budget"),
+    (re.compile(r"\b(plan (my|the) days?|itinerary|day[- ]by[- ]day|plan \d+ days)\b"), "plan_itinerary_days"),
+    (re.compile(r"\b(compare|flights? or trains?|trains? or flights?)\b"), "transport_compare_async"),
+    (re.compile(r"\btrains?\b"), "train_search_async"),
+    (re.compile(r"\bflights?\b"), "flights_search_async"),
+    (re.compile(r"\bhotels?\b"), "hotels_search_async"),
+)
+_CODES = re.compile(r"\b([A-Z]{3,4})\b to \b([A-Z]{3,4})\b")
+_DATES = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_HOTEL_PLACE = re.compile(r"\bhotels? in ([A-Za-z ]+?)(?: from| for| on|[?.,!]|$)", re.I)
+_AMOUNT = re.compile(r"\b(\d{4,7})\b")
+_DAYS = re.compile(r"\b(\d{1,2}) days?\b")
+_HANDLE = re.compile(r"(flights_search_async|train_search_async|transport_compare_async|hotels_search_async).*?result_handle['\"]?\s*[:=]\s*['\"]([\w-]+)", re.S)
+
+# What a model would know about a destination without searching
+SAMPLE_ACTIVITIES = [
+    {"title": "Fort Aguada", "location": {"lat": 15.4920, "lng": 73.7737}, "duration_minutes": 90, "open": "09:30", "close": "18:00", "cost": 50},
+    {"title": "Basilica of Bom Jesus", "location": {"lat": 15.5009, "lng": 73.9116}, "duration_minutes": 60, "open": "09:00", "close": "18:30"},
+    {"title": "Calangute Beach", "location": {"lat": 15.5439, "lng": 73.7553}, "duration_minutes": 120},
+    {"title": "Anjuna Flea Market", "location": {"lat": 15.5736, "lng": 73.7407}, "duration_minutes": 90, "open": "08:00", "close": "18:00"},
+    {"title": "Fontainhas", "location": {"lat": 15.4989, "lng": 73.8317}, "duration_minutes": 75},
+    {"title": "Dudhsagar Falls", "location": {"lat": 15.3144, "lng": 74.3143}, "duration_minutes": 180, "open": "07:00", "close": "17:00", "cost": 400},
+    {"title": "Chapora Fort", "location": {"lat": 15.6060, "lng": 73.7363}, "duration_minutes": 60},
+    {"title": "Palolem Beach", "location": {"lat": 15.0100, "lng": 74.0232}, "duration_minutes": 150},
+]
+
+
+@dataclass
+class StubLlmConfig:
+    latency_ms: float = 0.0  # mean added latency per model call
+    jitter_ms: float = 0.0  # +/- uniform jitter around latency_ms
+    error_rate: float = 0.0  # fraction of model calls that fail
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+_config = StubLlmConfig()
+
+
+def _text(part: Any) -> str:
+    if part.text:
+        return part.text
+    if part.function_response is not None:
+        return f"{part.function_response.name} {part.function_response.response}"
+    return ""
+
+
+def _user_message(llm_request: LlmRequest) -> str:
+    """Latest message the user typed (ADK also puts other agents' turns in user-role 'For context:' parts)."""
+    for content in reversed(llm_request.contents or []):
+        texts = [part.text for part in content.parts or [] if part.text]
+        if content.role != "user" or not texts or any(t.startswith("For context:") for t in texts):
+            continue
+        return texts[-1]
+    return ""
+
+
+def _answered(llm_request: LlmRequest) -> Optional[str]:
+    """Name of the tool whose response ends the request, if any."""
+    contents = llm_request.contents or []
+    if not contents:
+        return None
+    for part in contents[-1].parts or []:
+        if part.function_response is not None:
+            return part.function_response.name
+    return None
+
+
+def _handles(llm_request: LlmRequest) -> Dict[str, str]:
+    """Latest result_handle of a transport and a hotel search anywhere in the conversation."""
+    handles = {}
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            for tool, handle in _HANDLE.findall(_text(part)):
+                handles["hotel" if tool == "hotels_search_async" else "transport"] = handle
+    return handles
+
+
+def _args(tool: str, message: str, llm_request: LlmRequest) -> Dict[str, Any]:
+    codes = _CODES.search(message)
+    dates = _DATES.findall(message)
+    if tool in ("flights_search_async", "train_search_async", "transport_compare_async"):
+        args = {"origin": codes.group(1), "destination": codes.group(2)} if codes else {"origin": "DEL", "destination": "BOM"}
+        if dates:
+            args["departure_date"] = dates[0]
+        return args
+    if tool == "hotels_search_async":
+        place = _HOTEL_PLACE.search(message)
+        args = {"search_query": f"Hotels in {place.group(1).strip() if place else 'Goa'}"}
+        if len(dates) >= 2:
+            args.update(check_in_date=dates[0], check_out_date=dates[1])
+        return args
+    if tool == "optimize_trip_budget":
+        handles = _handles(llm_request)
+        amount = _AMOUNT.search(message)
+        args: Dict[str, Any] = {"budget_total": float(amount.group(1))} if amount else {}
+        if "transport" in handles:
+            args["transport_handle"] = handles["transport"]
+        if "hotel" in handles:
+            args["hotel_handle"] = handles["hotel"]
+        return args
+    if tool == "plan_itinerary_days":
+        days = _DAYS.search(message)
+        return {"num_days": int(days.group(1)) if days else 3, "activities": SAMPLE_ACTIVITIES}
+    return {}
+
+
+def respond(llm_request: LlmRequest, agent: str) -> types.Content:
+    """The stub's deterministic reply to `llm_request` made by `agent`."""
+    tools = llm_request.tools_dict or {}
+    answered = _answered(llm_request)
+    if answered and answered != "transfer_to_agent":
+        return types.Content(role="model", parts=[types.Part(text=f"Here is what {answered} found. Anything else for your trip?")])
+
+    message = _user_message(llm_request)
+    lowered = message.lower()
+    tool = next((tool for pattern, tool in _RULES if pattern.search(lowered)), None)
+    if tool in tools:
+        return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=tool, args=_args(tool, message, llm_request)))])
+    if tool and "transfer_to_agent" in tools and TOOL_AGENTS[tool] != agent:
+        return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            name="transfer_to_agent", args={"agent_name": TOOL_AGENTS[tool]},
+        ))])
+    return types.Content(role="model", parts=[types.Part(text="Happy to help. Where and when would you like to travel?")])
+
+
+class StubLlm(BaseLlm):
+    """Scripted, deterministic model; see the module docstring."""
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        from google.adk.models.google_llm import Gemini
+
+        return Gemini.supported_models()
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        labels = (llm_request.config.labels or {}) if llm_request.config else {}
+        agent = labels.get("adk_agent_name", "")
+        request_bytes = sum(len(_text(p)) for c in llm_request.contents or [] for p in c.parts or [])
+        _config.counters[agent or "unknown"] = _config.counters.get(agent or "unknown", 0) + 1
+
+        delay = max(0.0, _config.latency_ms + random.uniform(-_config.jitter_ms, _config.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if _config.error_rate and random.random() < _config.error_rate:
+            raise ConnectionError("stub model: injected error")
+
+        content = respond(llm_request, agent)
+        prompt_tokens = max(1, request_bytes // 4)
+        output_tokens = max(1, sum(len(_text(p)) + len(str(p.function_call.args if p.function_call else "")) for p in content.parts) // 4)
+        yield LlmResponse(
+            content=content,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens, candidates_token_count=output_tokens, total_token_count=prompt_tokens + output_tokens,
+            ),
+            model_version=f"stub-{self.model}",
+        )
+
+
+def install(config: Optional[StubLlmConfig] = None) -> StubLlmConfig:
+    """Answer every Gemini model name with StubLlm in this process; returns the active config."""
+    from google.adk.models.registry import LLMRegistry
+
+    global _config
+    if config is not None:
+        _config = config
+    LLMRegistry.register(StubLlm)
+    return _config
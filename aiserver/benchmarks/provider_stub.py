@@ -0,0 +1,192 @@
+"""Local stand-in for the SerpApi and RailRadar endpoints used by the tools.
+
+Serves recorded or synthetic responses for:
+    GET /search?engine=google_flights      (also /search.json)
+    GET /search.json?engine=google_hotels  (follows next_page_token for `hotel_pages` pages)
+    GET /trains/between
+    GET /trains/{n}/schedule
+with configurable latency and error injection. Point the tools at it with
+SERPAPI_BASE_URL / RAILRADAR_BASE_URL (and any non-empty API keys).
+
+Run standalone from aiserver/:
+    python -m benchmarks.provider_stub --port 8765 --latency-ms 300 --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import synthetic
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0  # mean added latency per request
+    jitter_ms: float = 0.0  # +/- uniform jitter around latency_ms
+    error_rate: float = 0.0  # fraction of requests answered with an injected error
+    error_status: int = 503  # status used for injected errors (429 exercises Retry-After)
+    flight_results: int = 20
+    hotel_results: int = 20
+    hotel_pages: int = 1
+    trains: int = 10
+    record_dir: Optional[str] = None  # <name>.json files here override the synthetic payloads
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TripmateProviderStub/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, the body waits ~40 ms for the
+    # client's delayed ACK on every reused keep-alive connection
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep benchmark output clean
+        pass
+
+    @property
+    def config(self) -> StubConfig:
+        return self.server.config  # type: ignore[attr-defined]
+
+    def _count(self, key: str) -> None:
+        with self.server.lock:  # type: ignore[attr-defined]
+            self.config.counters[key] = self.config.counters.get(key, 0) + 1
+
+    def _send(self, status: int, body: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body if body is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _recorded(self, name: str) -> Optional[Dict[str, Any]]:
+        if not self.config.record_dir:
+            return None
+        path = os.path.join(self.config.record_dir, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _route(self, path: str, query: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+        cfg = self.config
+        if path in ("/search", "/search.json"):
+            engine = query.get("engine", "")
+            if engine == "google_flights":
+                route = f"{query.get('departure_id')}-{query.get('arrival_id')}-{query.get('outbound_date')}"
+                seed = zlib.crc32(route.encode()) % 10_000
+                return engine, self._recorded(engine) or synthetic.flights_response(cfg.flight_results, seed=seed)
+            if engine == "google_hotels":
+                page = int(query.get("next_page_token", "0") or 0)
+                next_token = str(page + 1) if page + 1 < cfg.hotel_pages else None
+                return engine, self._recorded(engine) or synthetic.hotels_response(
+                    cfg.hotel_results, seed=page, next_page_token=next_token
+                )
+            return "unknown_engine", {"error": f"Unsupported engine: {engine}"}
+
+        if path.endswith("/trains/between"):
+            return "trains_between", self._recorded("trains_between") or synthetic.trains_between_response(cfg.trains)
+
+        parts = path.strip("/").split("/")
+        if len(parts) >= 3 and parts[-1] == "schedule" and parts[-3] == "trains":
+            journey_date = query.get("journeyDate") or time.strftime("%Y-%m-%d")
+            return "schedule", self._recorded("schedule") or synthetic.schedule_response(parts[-2], journey_date)
+
+        return "not_found", {}
+
+    def do_GET(self) -> None:
+        cfg = self.config
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        name, body = self._route(url.path, query)
+        self._count(name)
+
+        delay = max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if name == "not_found":
+            self._send(404, {"error": "not found"})
+        elif cfg.error_rate and random.random() < cfg.error_rate:
+            self._count("injected_errors")
+            self._send(cfg.error_status, {"error": "injected"}, {"Retry-After": "0"} if cfg.error_status == 429 else None)
+        else:
+            self._send(200, body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 resets connections under load
+
+
+class ProviderStub:
+    """Threaded stub server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.server = _Server((host, port), _Handler)
+        self.server.config = self.config  # type: ignore[attr-defined]
+        self.server.lock = threading.Lock()  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ProviderStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def configure_env(self) -> None:
+        """Point the tools at this stub (must run before their clients are first used)."""
+        os.environ["SERPAPI_BASE_URL"] = self.base_url
+        os.environ["RAILRADAR_BASE_URL"] = self.base_url
+        os.environ.setdefault("SERPAPI_API_KEY", "stub")
+        os.environ.setdefault("RAILRADAR_API_KEY", "stub")
+
+    def __enter__(self) -> "ProviderStub":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    defaults = StubConfig()
+    for name, value in asdict(defaults).items():
+        if name == "counters":
+            continue
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value) if value is not None else str, default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    stub = ProviderStub(StubConfig(**args), host=host, port=port)
+    print(f"Provider stub listening on {stub.base_url}")
+    print(f"  export SERPAPI_BASE_URL={stub.base_url} RAILRADAR_BASE_URL={stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
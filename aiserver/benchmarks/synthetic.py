@@ -0,0 +1,114 @@
+"""Synthetic provider payloads shaped like SerpApi and RailRadar responses."""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+AIRLINES = ["IndiGo", "Air India", "Akasa Air", "SpiceJet", "Air India Express"]
+AIRPORTS = ["DEL", "BOM", "BLR", "MAA", "HYD", "CCU", "GOI", "COK"]
+STATIONS = ["NDLS", "MTJ", "KOTA", "RTM", "BRC", "ST", "BVI", "MMCT"]
+
+
+def flights_response(n: int, seed: int = 0) -> Dict[str, Any]:
+    """google_flights response with `n` itineraries split across best/other flights."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        legs = rng.choice([1, 1, 2])
+        segments = []
+        for leg in range(legs):
+            dep, arr = rng.sample(AIRPORTS, 2)
+            segments.append({
+                "departure_airport": {"name": f"{dep} Airport", "id": dep, "time": f"2026-11-02 {6 + leg * 4:02d}:{i % 60:02d}"},
+                "arrival_airport": {"name": f"{arr} Airport", "id": arr, "time": f"2026-11-02 {8 + leg * 4:02d}:{i % 60:02d}"},
+                "duration": rng.randint(60, 200),
+                "airplane": "Airbus A320",
+                "airline": rng.choice(AIRLINES),
+                "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/6E.png",
+                "travel_class": "Economy",
+                "flight_number": f"6E {rng.randint(100, 9999)}",
+                "legroom": "29 in",
+                "extensions": ["Average legroom (29 in)", "In-seat USB outlet", "Carbon emissions estimate: 98 kg"],
+            })
+        entries.append({
+            "flights": segments,
+            "layovers": [{"duration": 75, "name": "Layover", "id": "HYD"}] if legs > 1 else [],
+            "total_duration": sum(s["duration"] for s in segments),
+            "carbon_emissions": {"this_flight": 98000, "typical_for_this_route": 95000, "difference_percent": 3},
+            "price": rng.randint(3000, 15000),
+            "type": "One way",
+            "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/6E.png",
+            "booking_token": f"WyJDalJJ{i:08d}",
+        })
+    split = min(3, n)
+    return {
+        "search_metadata": {"id": "synthetic", "status": "Success"},
+        "best_flights": entries[:split],
+        "other_flights": entries[split:],
+        "price_insights": {"lowest_price": min((e["price"] for e in entries), default=0)},
+    }
+
+
+def hotels_response(n: int, seed: int = 0, next_page_token: str | None = None) -> Dict[str, Any]:
+    """google_hotels response with `n` properties."""
+    rng = random.Random(seed)
+    properties = []
+    for i in range(n):
+        price = rng.randint(1500, 20000)
+        properties.append({
+            "type": "hotel",
+            "name": f"Synthetic Hotel {seed}-{i}",
+            "description": "Relaxed hotel with a pool, free breakfast and city views.",
+            "link": f"https://example.com/hotel/{seed}/{i}",
+            "gps_coordinates": {"latitude": 15.4 + rng.random() * 0.3, "longitude": 73.8 + rng.random() * 0.3},
+            "check_in_time": "2:00 PM",
+            "check_out_time": "12:00 PM",
+            "rate_per_night": {"lowest": f"₹{price:,}", "extracted_lowest": price},
+            "total_rate": {"lowest": f"₹{price * 2:,}", "extracted_lowest": price * 2},
+            "hotel_class": f"{rng.randint(2, 5)}-star hotel",
+            "extracted_hotel_class": rng.randint(2, 5),
+            "overall_rating": round(rng.uniform(3.0, 5.0), 1),
+            "reviews": rng.randint(0, 8000),
+            "location_rating": round(rng.uniform(2.0, 5.0), 1),
+            "amenities": ["Free Wi-Fi", "Free breakfast", "Pool", "Air conditioning", "Restaurant"],
+            "excluded_amenities": ["No airport shuttle"],
+            "essential_info": ["Entire villa"],
+            "images": [{"thumbnail": f"https://example.com/{i}/{k}.jpg"} for k in range(8)],
+            "nearby_places": [{"name": "Beach", "transportations": [{"type": "Walking", "duration": "5 min"}]}],
+            "property_token": f"ChYI{seed:04d}{i:08d}",
+        })
+    response = {"search_metadata": {"id": "synthetic", "status": "Success"}, "properties": properties}
+    if next_page_token:
+        response["serpapi_pagination"] = {"current_from": 1, "next_page_token": next_page_token}
+    return response
+
+
+def trains_between_response(n: int, seed: int = 0) -> Dict[str, Any]:
+    """RailRadar /trains/between response with `n` trains."""
+    return {"success": True, "data": [
+        {"trainNumber": f"{12000 + seed * 100 + i}", "trainName": f"Synthetic Express {i}"} for i in range(n)
+    ]}
+
+
+def schedule_response(train_number: str, journey_date: str, stations: List[str] = STATIONS) -> Dict[str, Any]:
+    """RailRadar /trains/{n}/schedule response running daily through `stations`."""
+    start = datetime.strptime(journey_date, "%Y-%m-%d")
+    route = []
+    minutes = 16 * 60 + int(train_number) % 60
+    for idx, code in enumerate(stations):
+        day = 1 + minutes // (24 * 60)
+        clock = f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
+        route.append({
+            "station": {"code": code, "name": f"{code} Junction"},
+            "journeyDay": day,
+            "distanceFromSourceKm": idx * 180,
+            "schedule": {
+                "arrival": None if idx == 0 else clock,
+                "departure": None if idx == len(stations) - 1 else clock,
+            },
+        })
+        minutes += 150
+    return {"success": True, "data": {
+        "trainNumber": train_number,
+        "route": route,
+        "availableStartDates": [(start + timedelta(days=d)).strftime("%d-%b-%Y") for d in range(-2, 60)],
+    }}
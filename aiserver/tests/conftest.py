@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app as `tripmate`, like the ADK server run from aiserver/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
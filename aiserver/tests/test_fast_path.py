@@ -0,0 +1,41 @@
+"""fast_path.classify: which messages skip the model, and which must not."""
+from datetime import date
+
+import pytest
+
+from tripmate.library.fast_path import classify
+
+TODAY = date(2026, 10, 17)
+
+
+def test_complete_flight_search_is_dispatched():
+    intent = classify("flights BLR to DEL on 2026-11-02 for 2 adults", TODAY)
+    assert intent.tool == "flights_search_async"
+    assert intent.args == {"origin": "BLR", "destination": "DEL", "departure_date": "2026-11-02", "num_passengers": 2}
+
+
+def test_complete_hotel_search_is_dispatched():
+    intent = classify("hotels in Goa for 3 nights from 2026-11-02", TODAY)
+    assert intent.tool == "hotels_search_async"
+    assert intent.args["check_out_date"] == "2026-11-05"
+
+
+@pytest.mark.parametrize("message", [
+    "can you cancel my flight BLR to DEL on 2026-11-02",
+    "book the flight BLR to DEL on 2026-11-02",
+    "change my train NDLS to MMCT to 2026-11-03",
+    "flight status BLR to DEL on 2026-11-02",
+])
+def test_booking_actions_go_to_the_model(message):
+    assert classify(message, TODAY) is None
+
+
+@pytest.mark.parametrize("message", [
+    "flights BLR to DEL on 2026-11-02 under 5000 rupees",
+    "cheapest flights BLR to DEL on 2026-11-02",
+    "direct flights BLR to DEL on 2026-11-02",
+    "hotels in Goa from 2026-11-02 to 2026-11-05 with a pool",
+])
+def test_unhandled_qualifiers_route_without_a_tool_call(message):
+    intent = classify(message, TODAY)
+    assert intent is not None and intent.tool is None
@@ -0,0 +1,35 @@
+"""update_itinerary_item_cost reprices every item the ledger registers."""
+import uuid
+from types import SimpleNamespace
+
+from tripmate.library import constants
+from tripmate.library.cost_ledger import iter_priced_items
+from tripmate.tools.itineraryCostTool import update_itinerary_item_cost
+
+
+def _context(state):
+    return SimpleNamespace(state=state, session=SimpleNamespace(id=uuid.uuid4().hex))
+
+
+def _itinerary():
+    return {
+        "days": [
+            {"stays": [{"name": "Hotel", "cost": 100}], "transport": {"mode": "cab", "cost": 10}},
+            {"activities": [{"title": "Fort", "cost": 5, "transport": {"mode": "bus", "cost": 2}}],
+             "transport": [{"mode": "train", "cost": 30}]},
+        ]
+    }
+
+
+def test_every_registered_item_can_be_repriced():
+    state = {constants.ITIN_KEY: _itinerary()}
+    context = _context(state)
+    paths = [path for path, _, _, _ in iter_priced_items(state[constants.ITIN_KEY])]
+    assert "days[0].transport" in paths
+
+    for path in paths:
+        summary = update_itinerary_item_cost(path, 1, context)
+        assert summary.message is None, summary.message
+
+    assert summary.cost_breakdown["total"] == len(paths)
+    assert state[constants.ITIN_KEY]["days"][0]["transport"] == {"mode": "cab", "cost": 1}
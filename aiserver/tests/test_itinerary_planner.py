@@ -0,0 +1,50 @@
+"""plan_itinerary_days keeps every activity across repeated plans."""
+import random
+import uuid
+from types import SimpleNamespace
+
+from tripmate.library import constants
+from tripmate.tools.itineraryPlannerTool import plan_itinerary_days
+
+
+def _context(state):
+    return SimpleNamespace(state=state, session=SimpleNamespace(id=uuid.uuid4().hex))
+
+
+def _activities(n):
+    rng = random.Random(7)
+    return [
+        {"title": f"Spot {i}", "location": {"lat": 15.0 + rng.random() * 0.8, "lng": 73.7 + rng.random() * 0.6}, "duration_minutes": 120}
+        for i in range(n)
+    ]
+
+
+def _scheduled(state):
+    return [a["title"] for day in state[constants.ITIN_KEY]["days"] for a in day["activities"]]
+
+
+def _recommended(state):
+    return [a["title"] for a in (state.get(constants.RECS_KEY) or {}).get("activities") or []]
+
+
+def test_replan_keeps_scheduled_activities():
+    state = {}
+    context = _context(state)
+    first = plan_itinerary_days(num_days=7, activities=_activities(60), tool_context=context)
+    assert first.unscheduled, "the pool should not fit, so leftovers go to recommendations"
+    before = set(_scheduled(state))
+
+    plan_itinerary_days(num_days=7, tool_context=context)
+    scheduled, recommended = _scheduled(state), _recommended(state)
+
+    assert len(set(scheduled)) == len(scheduled)
+    assert not set(scheduled) & set(recommended)
+    assert set(scheduled) | set(recommended) == {f"Spot {i}" for i in range(60)}
+    assert len(scheduled) >= len(before)
+
+
+def test_scheduled_recommendations_leave_recommendations():
+    state = {constants.RECS_KEY: {"activities": _activities(5)}}
+    plan_itinerary_days(num_days=3, tool_context=_context(state))
+    assert len(_scheduled(state)) == 5
+    assert _recommended(state) == []
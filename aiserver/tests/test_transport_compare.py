@@ -0,0 +1,38 @@
+"""_comparison keeps the overall winner while making room for the other mode."""
+from types import SimpleNamespace
+
+import tripmate.tools.transportCompareTool as tool
+from tripmate.tools.transportCompareTool import TransportOption
+
+
+def _option(mode, name, minutes):
+    return TransportOption(mode=mode, name=name, origin_code="A", destination_code="B", door_to_door_minutes=minutes)
+
+
+def _ranked(options, max_results, monkeypatch):
+    # Pass ready-made options through in place of provider rows
+    monkeypatch.setattr(tool, "_flight_option", lambda row, origin, destination: row)
+    monkeypatch.setattr(tool, "_train_option", lambda train: train)
+    flights = [o for o in options if o.mode == "flight"]
+    trains = SimpleNamespace(trains=[o for o in options if o.mode == "train"])
+    codes = {"flight": ("A", "B"), "train": ("A", "B")}
+    return tool._comparison(codes, {}, flights, trains, "door_to_door", max_results)
+
+
+def test_single_result_is_the_overall_winner(monkeypatch):
+    flight, train = _option("flight", "F1", 200), _option("train", "T1", 600)
+    output = _ranked([flight, train], 1, monkeypatch)
+    assert [o.name for o in output.options] == ["F1"]
+    assert output.fastest.name == "F1"
+
+
+def test_cut_off_mode_replaces_a_repeated_mode(monkeypatch):
+    options = [_option("flight", "F1", 200), _option("flight", "F2", 220), _option("train", "T1", 600)]
+    output = _ranked(options, 2, monkeypatch)
+    assert [o.name for o in output.options] == ["F1", "T1"]
+
+
+def test_mixed_list_is_left_alone(monkeypatch):
+    options = [_option("flight", "F1", 200), _option("train", "T1", 300), _option("flight", "F2", 400)]
+    output = _ranked(options, 2, monkeypatch)
+    assert [o.name for o in output.options] == ["F1", "T1"]
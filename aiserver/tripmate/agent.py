@@ -1,21 +1,33 @@
 from google.adk.agents import Agent
 from . import prompt
-from tripmate.tools.memory import _load_precreated_itinerary
-from tripmate.sub_agents.hotel.agent import hotel_agent
+from tripmate.tools.memory import _load_precreated_itinerary, _persist_trip_state
+from tripmate.library.telemetry import instrument_agent_tree
+from tripmate.library.model_cache import cache_agent_tree
+from tripmate.library.fast_path import attach_dispatch, attach_fast_path
+from tripmate.library.agent_registry import AgentRegistry, lazy_enabled
 from dotenv import load_dotenv
 
-#subAgents
-from tripmate.sub_agents.transport.agent import transport_agent
 load_dotenv()
 
+#subAgents: discovered from sub_agents/*/manifest.json and built on first use (library/agent_registry.py)
+agent_registry = AgentRegistry(hooks=[instrument_agent_tree, attach_dispatch, cache_agent_tree])
+
 root_agent = Agent(
     model='gemini-2.5-flash',
     name='tripmate_agent',
     description='A helpful assistant for user questions.',
     instruction=prompt.ROOT_AGENT_INSTRUCTION,
-    sub_agents=[
-        transport_agent,
-        hotel_agent
-    ],
+    sub_agents=agent_registry.placeholders(),
     # before_agent_callback=_load_precreated_itinerary,
-)
\ No newline at end of file
+    after_agent_callback=_persist_trip_state,
+)
+
+# Record spans for every agent, model call and tool in the tree (library/telemetry.py)
+instrument_agent_tree(root_agent)
+# Route unambiguous requests without a model turn (library/fast_path.py); runs before the model cache
+attach_fast_path(root_agent)
+# Answer repeated requests of opted-in agents from the model response cache (library/model_cache.py)
+cache_agent_tree(root_agent)
+
+if not lazy_enabled():
+    agent_registry.build_all()
@@ -0,0 +1,206 @@
+"""Registry of sub-agents that are discovered from manifests and built on first use.
+
+Every wired sub-agent folder carries a `manifest.json` next to its agent.py:
+
+    {"name": "HotelAgent", "description": "...", "attribute": "hotel_agent", "order": 2}
+
+`AgentRegistry().placeholders()` reads the manifests only (no agent, tool or
+provider module is imported) and returns one `LazyAgent` per enabled entry,
+carrying the name and description the root needs to route to it. The first
+time a placeholder is run, its agent module is imported, the build hooks are
+applied (telemetry, fast path, model cache) and the real agent takes the
+placeholder's place in its parent's `sub_agents`, so later turns, transfers
+and `find_agent` see the real agent. Folders without a manifest (scaffolds)
+are ignored.
+
+    TRIPMATE_LAZY_AGENTS   "0" builds every agent at startup (default lazy).
+"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Sequence
+
+from pydantic import PrivateAttr
+
+from google.adk.agents import BaseAgent
+
+MANIFEST_FILE = "manifest.json"
+SUB_AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sub_agents")
+SUB_AGENTS_PACKAGE = "tripmate.sub_agents"
+
+
+def lazy_enabled() -> bool:
+    return os.getenv("TRIPMATE_LAZY_AGENTS", "1") != "0"
+
+
+@dataclass(frozen=True)
+class AgentManifest:
+    """
+    What the root needs to know about a sub-agent before building it.
+
+    Args:
+        name: Agent name; must match the built agent's name.
+        description: Shown to the router model for transfers.
+        module: Module defining the agent (default: <folder>.agent).
+        attribute: Module attribute holding the agent.
+        order: Position among the root's sub-agents.
+        enabled: False keeps a discovered agent out of the tree.
+    """
+    name: str
+    description: str
+    module: str
+    attribute: str
+    order: int = 100
+    enabled: bool = True
+
+
+def load_manifest(path: str) -> Optional[AgentManifest]:
+    """Manifest at `path`, or None (with a warning) if it is unreadable or incomplete."""
+    folder = os.path.basename(os.path.dirname(path))
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return AgentManifest(
+            name=data["name"],
+            description=data.get("description", ""),
+            module=data.get("module") or f"{SUB_AGENTS_PACKAGE}.{folder}.agent",
+            attribute=data["attribute"],
+            order=int(data.get("order", 100)),
+            enabled=bool(data.get("enabled", True)),
+        )
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning(f"Agent registry: skipping {path}: {e}")
+        return None
+
+
+def discover(directory: str = SUB_AGENTS_DIR) -> List[AgentManifest]:
+    """Manifests of every sub-agent folder under `directory`, in `order`."""
+    manifests = []
+    for folder in sorted(os.listdir(directory)):
+        path = os.path.join(directory, folder, MANIFEST_FILE)
+        if os.path.isfile(path):
+            manifest = load_manifest(path)
+            if manifest is not None:
+                manifests.append(manifest)
+    return sorted(manifests, key=lambda m: (m.order, m.name))
+
+
+# ---------------- Placeholder ----------------
+
+class LazyAgent(BaseAgent):
+    """Stands in for a sub-agent until it first runs, then hands over to the built agent."""
+
+    _registry: "AgentRegistry" = PrivateAttr()
+    _manifest: AgentManifest = PrivateAttr()
+
+    def resolve(self) -> BaseAgent:
+        return self._registry.build(self._manifest.name)
+
+    async def _resolve_async(self) -> BaseAgent:
+        if self._registry.is_built(self._manifest.name):
+            return self.resolve()
+        # Importing an agent's tools takes a while; keep the event loop serving other sessions
+        return await asyncio.to_thread(self.resolve)
+
+    async def run_async(self, parent_context: Any) -> AsyncGenerator[Any, None]:
+        # Skip the placeholder's own lifecycle: the real agent runs its callbacks and spans
+        agent = await self._resolve_async()
+        async for event in agent.run_async(parent_context):
+            yield event
+
+    async def _run_async_impl(self, ctx: Any) -> AsyncGenerator[Any, None]:
+        agent = await self._resolve_async()
+        async for event in agent.run_async(ctx):
+            yield event
+
+    async def _run_live_impl(self, ctx: Any) -> AsyncGenerator[Any, None]:
+        agent = await self._resolve_async()
+        async for event in agent.run_live(ctx):
+            yield event
+
+
+# ---------------- Registry ----------------
+
+class AgentRegistry:
+    """
+    Builds the sub-agents described by manifests, once each, on demand.
+
+    Args:
+        manifests: Defaults to the manifests discovered under sub_agents/.
+        hooks: Called with every agent right after it is built (instrumentation, callbacks).
+    """
+
+    def __init__(self, manifests: Optional[Sequence[AgentManifest]] = None, hooks: Sequence[Callable[[Any], Any]] = ()):
+        self.manifests: Dict[str, AgentManifest] = {m.name: m for m in (discover() if manifests is None else manifests)}
+        self.hooks = list(hooks)
+        self._lock = threading.RLock()
+        self._agents: Dict[str, BaseAgent] = {}
+        self._placeholders: Dict[str, LazyAgent] = {}
+        self._build_seconds: Dict[str, float] = {}
+
+    def placeholders(self) -> List[BaseAgent]:
+        """One agent per enabled manifest, in order: a LazyAgent, or the real agent once built."""
+        agents = []
+        with self._lock:
+            for manifest in self.manifests.values():
+                if not manifest.enabled:
+                    continue
+                if manifest.name in self._agents:
+                    agents.append(self._agents[manifest.name])
+                    continue
+                placeholder = self._placeholders.get(manifest.name)
+                if placeholder is None:
+                    placeholder = LazyAgent(name=manifest.name, description=manifest.description)
+                    placeholder._registry, placeholder._manifest = self, manifest
+                    self._placeholders[manifest.name] = placeholder
+                agents.append(placeholder)
+        return agents
+
+    def is_built(self, name: str) -> bool:
+        return name in self._agents
+
+    def build(self, name: str) -> BaseAgent:
+        """The agent for manifest `name`, importing and building it on first call."""
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is not None:
+                return agent
+            manifest = self.manifests[name]
+            start = time.perf_counter()
+            agent = getattr(importlib.import_module(manifest.module), manifest.attribute)
+            if agent.name != manifest.name:
+                raise ValueError(f"{manifest.module}.{manifest.attribute} is named {agent.name!r}, manifest says {manifest.name!r}")
+            if agent.description != manifest.description:
+                logging.warning(f"Agent registry: {name} description differs from its manifest; routing uses the agent's from now on")
+            for hook in self.hooks:
+                hook(agent)
+            self._swap(name, agent)
+            self._agents[name] = agent
+            self._build_seconds[name] = time.perf_counter() - start
+            logging.info(f"Agent registry: built {name} in {self._build_seconds[name] * 1000:.0f} ms")
+            return agent
+
+    def _swap(self, name: str, agent: BaseAgent) -> None:
+        """Put the built agent where its placeholder sits in the tree."""
+        placeholder = self._placeholders.get(name)
+        parent = placeholder.parent_agent if placeholder is not None else None
+        if parent is None:
+            return
+        parent.sub_agents = [agent if a is placeholder else a for a in parent.sub_agents]
+        agent.parent_agent = parent
+
+    def build_all(self) -> List[BaseAgent]:
+        return [self.build(m.name) for m in self.manifests.values() if m.enabled]
+
+    def stats(self) -> Dict[str, Any]:
+        """Built agents and their build times (milliseconds); agents not listed are still placeholders."""
+        with self._lock:
+            return {
+                "registered": [m.name for m in self.manifests.values() if m.enabled],
+                "built_ms": {name: round(s * 1000, 1) for name, s in self._build_seconds.items()},
+            }
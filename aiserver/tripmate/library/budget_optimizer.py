@@ -0,0 +1,202 @@
+"""Exact price/quality trade-offs for a trip's bookable components.
+
+A plan picks exactly one option from each choose-one group (e.g. one
+outbound transport option, one hotel) and any subset of optional items
+(e.g. activities). Its cost and quality are the sums over the picks.
+
+`pareto_plans` returns every plan not beaten on both cost and quality by
+another plan (the Pareto front), under a total cost cap and per-category caps
+(the budget allocations). The most expensive front plan within the cap is the
+best plan the budget buys; the front as a whole is the exact list of
+trade-offs ("+X for +Y quality").
+
+Fronts are built group by group: a choose-one group is a broadcast sum of
+the running front with the group's options, an optional group is a 0/1
+knapsack front grown one item at a time. Every step is pruned to its
+non-dominated points, with costs bucketed to `resolution` (1 currency unit
+by default, coarser only when a front would span more than MAX_FRONT_POINTS
+buckets), so thousands of combinations reduce to a few NumPy passes.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Upper bound on distinct cost buckets kept per front; bounds work on any input.
+MAX_FRONT_POINTS = 1024
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """
+    One bookable option.
+
+    Args:
+        category: Budget line it counts against: transport, stay, activities, ...
+        name: Label shown to the user.
+        cost: Total cost for the trip (all nights / passengers).
+        quality: Non-negative value; plans maximize the sum over their picks.
+        ref: Caller data carried through unchanged (e.g. the source result index).
+        currency: ISO code of `cost`, when the source says; costs are only summed within one currency.
+    """
+    category: str
+    name: str
+    cost: float
+    quality: float
+    ref: Any = None
+    currency: Optional[str] = None
+
+
+@dataclass
+class Plan:
+    cost: float
+    quality: float
+    choices: List[Candidate] = field(default_factory=list)
+
+
+@dataclass
+class _Front:
+    cost: np.ndarray
+    quality: np.ndarray
+    picks: List[Tuple[Candidate, ...]]
+
+    def take(self, keep: np.ndarray) -> "_Front":
+        return _Front(self.cost[keep], self.quality[keep], [self.picks[i] for i in keep])
+
+
+def pareto_indices(cost: np.ndarray, quality: np.ndarray, resolution: float = 1.0) -> np.ndarray:
+    """
+    Indices of the non-dominated points, cheapest first, quality strictly rising.
+
+    Costs within one `resolution` bucket compete as equal-cost plans; the
+    kept point still carries its exact cost.
+    """
+    if cost.size == 0:
+        return np.empty(0, dtype=int)
+    bucket = np.floor(cost / resolution + 1e-9)
+    order = np.lexsort((-quality, bucket))
+    q = quality[order]
+    best_before = np.maximum.accumulate(q)
+    keep = np.empty(len(q), dtype=bool)
+    keep[0] = True
+    keep[1:] = q[1:] > best_before[:-1]
+    return order[keep]
+
+
+def _resolution(span: float, resolution: float) -> float:
+    return max(resolution, span / MAX_FRONT_POINTS)
+
+
+def _choose_one_front(options: Sequence[Candidate], cap: float, resolution: float) -> _Front:
+    options = [o for o in options if o.cost <= cap]
+    cost = np.array([o.cost for o in options], dtype=float)
+    quality = np.array([o.quality for o in options], dtype=float)
+    front = _Front(cost, quality, [(o,) for o in options])
+    return front.take(pareto_indices(cost, quality, _resolution(np.ptp(cost) if cost.size else 0.0, resolution)))
+
+
+def _subset_front(items: Sequence[Candidate], cap: float, resolution: float) -> _Front:
+    """0/1 knapsack front: best quality for every reachable cost of a subset of `items`."""
+    items = [i for i in items if i.cost <= cap]
+    step = _resolution(min(cap, sum(i.cost for i in items)), resolution)
+    front = _Front(np.zeros(1), np.zeros(1), [()])
+    for item in items:
+        cost = front.cost + item.cost
+        fits = np.flatnonzero(cost <= cap)
+        merged = _Front(
+            np.concatenate([front.cost, cost[fits]]),
+            np.concatenate([front.quality, front.quality[fits] + item.quality]),
+            front.picks + [front.picks[i] + (item,) for i in fits],
+        )
+        front = merged.take(pareto_indices(merged.cost, merged.quality, step))
+    return front
+
+
+def _combine(a: _Front, b: _Front, cap: float, resolution: float) -> _Front:
+    cost = (a.cost[:, None] + b.cost[None, :]).ravel()
+    quality = (a.quality[:, None] + b.quality[None, :]).ravel()
+    fits = np.flatnonzero(cost <= cap)
+    if fits.size == 0:
+        return _Front(np.empty(0), np.empty(0), [])
+    step = _resolution(np.ptp(cost[fits]), resolution)
+    keep = fits[pareto_indices(cost[fits], quality[fits], step)]
+    n = len(b.cost)
+    return _Front(cost[keep], quality[keep], [a.picks[i // n] + b.picks[i % n] for i in keep])
+
+
+def pareto_plans(
+    choose_one: Mapping[str, Sequence[Candidate]],
+    optional: Sequence[Candidate] = (),
+    max_cost: Optional[float] = None,
+    category_caps: Optional[Mapping[str, float]] = None,
+    resolution: float = 1.0,
+) -> List[Plan]:
+    """
+    The Pareto front of plans, cheapest first (quality strictly rising).
+
+    Args:
+        choose_one: Group name -> options; a plan has exactly one option of every group.
+            An empty group (or one with no option within its cap) makes the problem infeasible.
+        optional: Items a plan may include or leave out (each at most once).
+        max_cost: Cap on a plan's total cost (None = no cap).
+        category_caps: Category -> cap on the plan's total spend in that category, across
+            every group and optional item of the category.
+        resolution: Cost granularity for telling plans apart (currency units).
+
+    Returns:
+        Plans on the front; empty if no plan satisfies the caps.
+    """
+    caps = category_caps or {}
+    total_cap = float("inf") if max_cost is None else float(max_cost)
+
+    # One front per category, so groups sharing a category (outbound and return legs) share its cap
+    fronts: Dict[str, _Front] = {}
+
+    def _add(category: str, front: _Front) -> bool:
+        if category in fronts:
+            front = _combine(fronts[category], front, min(total_cap, caps.get(category, total_cap)), resolution)
+        fronts[category] = front
+        return bool(front.picks)
+
+    for options in choose_one.values():
+        if not options:
+            return []
+        category = options[0].category
+        if not _add(category, _choose_one_front(options, min(total_cap, caps.get(category, total_cap)), resolution)):
+            return []
+
+    by_category: Dict[str, List[Candidate]] = {}
+    for item in optional:
+        by_category.setdefault(item.category, []).append(item)
+    for category, items in by_category.items():
+        if not _add(category, _subset_front(items, min(total_cap, caps.get(category, total_cap)), resolution)):
+            return []
+
+    # Smallest fronts first keeps the intermediate products small
+    result = _Front(np.zeros(1), np.zeros(1), [()])
+    for front in sorted(fronts.values(), key=lambda f: len(f.picks)):
+        result = _combine(result, front, total_cap, resolution)
+        if not result.picks:
+            return []
+    return [
+        Plan(cost=float(c), quality=float(q), choices=list(picks))
+        for c, q, picks in zip(result.cost, result.quality, result.picks)
+    ]
+
+
+def spread(plans: Sequence[Plan], k: int) -> List[Plan]:
+    """Up to k plans evenly spaced along the front, always including the cheapest and the best."""
+    if len(plans) <= k:
+        return list(plans)
+    if k <= 1:
+        return [plans[-1]]
+    positions = np.unique(np.round(np.linspace(0, len(plans) - 1, k)).astype(int))
+    return [plans[i] for i in positions]
+
+
+def search_space(choose_one: Mapping[str, Sequence[Candidate]], optional: Sequence[Candidate] = ()) -> int:
+    """Number of plans the front summarizes (before caps): product of group sizes times 2^optional items."""
+    size = 1
+    for options in choose_one.values():
+        size *= len(options)
+    return size * 2 ** len(optional)
@@ -0,0 +1,226 @@
+"""Offline resolver for airport IATA codes and Indian railway station codes.
+
+The indexes are built from the CSV files in `library/data/` on first use and
+answer exact code, name, alias, city-hub, prefix and fuzzy (trigram +
+edit-distance) lookups without any network or LLM call.
+"""
+import csv
+import os
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+AIRPORTS_CSV = os.path.join(DATA_DIR, "airports.csv")
+STATIONS_CSV = os.path.join(DATA_DIR, "stations.csv")
+
+# Words that users add or drop freely ("Pune Junction", "Goa airport").
+_NOISE_WORDS = {
+    "airport", "international", "intl", "domestic", "terminal", "the",
+    "railway", "station", "rly", "junction", "jn", "jct", "stn",
+}
+
+# Confidence assigned per match type; fuzzy matches scale this by similarity.
+_CONFIDENCE = {"code": 1.0, "name": 0.98, "alias": 0.95, "city": 0.95, "prefix": 0.8, "fuzzy": 0.85}
+_FUZZY_MIN_SIMILARITY = 0.75
+_FUZZY_SHORTLIST = 12
+
+
+class CodeMatch(NamedTuple):
+    code: str
+    name: str
+    city: str
+    match_type: str  # one of _CONFIDENCE's keys
+    confidence: float
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def _strip_noise(text: str) -> str:
+    return " ".join(w for w in text.split() if w not in _NOISE_WORDS)
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a: str, b: str) -> float:
+    """1 - normalized Levenshtein distance."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return 1.0 - prev[-1] / max(len(a), len(b))
+
+
+class CodeIndex:
+    """
+    Compact in-memory index over (code, name, city, aliases, primary) rows.
+
+    Entries are stored column-wise in tuples; every searchable key maps to the
+    entry ids it belongs to, and trigram postings are kept as `array('H')`.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str, Sequence[str], bool]]):
+        codes, names, cities, primary = [], [], [], []
+        keys: Dict[str, List[Tuple[int, str]]] = {}
+        city_entries: Dict[str, List[int]] = {}
+
+        for idx, (code, name, city, aliases, is_primary) in enumerate(rows):
+            codes.append(code.upper())
+            names.append(name)
+            cities.append(city)
+            primary.append(bool(is_primary))
+            labelled = [(name, "name")] + [(a, "alias") for a in aliases if a]
+            for text, kind in labelled:
+                norm = _normalize(text)
+                keys.setdefault(norm, []).append((idx, kind))
+                stripped = _strip_noise(norm)
+                if stripped and stripped != norm:
+                    # "Delhi Junction" is also reachable as "delhi", but ranks below exact keys.
+                    keys.setdefault(stripped, []).append((idx, kind + "~"))
+            city_key = _normalize(city)
+            city_entries.setdefault(city_key, []).append(idx)
+            keys.setdefault(city_key, []).append((idx, "city"))
+
+        self._codes = tuple(codes)
+        self._names = tuple(names)
+        self._cities = tuple(cities)
+        self._primary = tuple(primary)
+        self._code_ids = {c: i for i, c in enumerate(self._codes)}
+        self._keys = {k: tuple(v) for k, v in keys.items()}
+        self._sorted_keys = tuple(sorted(self._keys))
+        self._city_entries = {k: tuple(v) for k, v in city_entries.items()}
+
+        postings: Dict[str, array] = {}
+        for key_id, key in enumerate(self._sorted_keys):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, array("H")).append(key_id)
+        self._trigram_postings = postings
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CodeIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [
+                (r["code"], r["name"], r["city"], r["aliases"].split("|") if r["aliases"] else [], r["primary"] == "1")
+                for r in csv.DictReader(f)
+            ]
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _match(self, idx: int, match_type: str, confidence: Optional[float] = None) -> CodeMatch:
+        return CodeMatch(
+            self._codes[idx], self._names[idx], self._cities[idx], match_type,
+            round(confidence if confidence is not None else _CONFIDENCE[match_type], 3),
+        )
+
+    def _rank_entries(self, entries: Iterable[Tuple[int, str]]) -> List[Tuple[int, str, float]]:
+        # Exact name, then the city's primary hub, then aliases, then noise-stripped
+        # names/aliases ("~"), then other stations/airports in the city.
+        ranked = []
+        for idx, kind in entries:
+            if kind == "city":
+                rank, confidence = (1, _CONFIDENCE["city"]) if self._primary[idx] else (4, _CONFIDENCE["city"] - 0.1)
+            elif kind.endswith("~"):
+                rank, confidence = 3, _CONFIDENCE[kind[:-1]] - 0.05
+            else:
+                rank, confidence = (0 if kind == "name" else 2), _CONFIDENCE[kind]
+            ranked.append((rank, idx, kind.rstrip("~"), confidence))
+        ranked.sort(key=lambda r: r[0])
+        return [(idx, kind, confidence) for _, idx, kind, confidence in ranked]
+
+    def hub_for_city(self, city: str) -> Optional[CodeMatch]:
+        """Primary code serving a city (e.g. "Mumbai" -> CSMT/BOM), if known."""
+        entries = self._city_entries.get(_normalize(city))
+        if not entries:
+            return None
+        best = next((i for i in entries if self._primary[i]), entries[0])
+        return self._match(best, "city")
+
+    def lookup(self, query: str, limit: int = 3) -> List[CodeMatch]:
+        """
+        Resolve a free-text place, airport or station name into ranked codes.
+
+        Tries, in order: exact code, exact name/alias/city, key prefix and
+        finally fuzzy matching. Returns an empty list when nothing is close.
+        """
+        norm = _normalize(query or "")
+        if not norm:
+            return []
+
+        results: List[CodeMatch] = []
+        seen = set()
+
+        def add(idx: int, match_type: str, confidence: Optional[float] = None):
+            if idx not in seen and len(results) < limit:
+                seen.add(idx)
+                results.append(self._match(idx, match_type, confidence))
+
+        code_idx = self._code_ids.get(query.strip().upper())
+        if code_idx is not None:
+            add(code_idx, "code")
+
+        for candidate in (norm, _strip_noise(norm)):
+            for idx, kind, confidence in self._rank_entries(self._keys.get(candidate, ())):
+                add(idx, kind, confidence)
+        if results:
+            return results
+
+        key = _strip_noise(norm) or norm
+        if len(key) >= 3:
+            pos = bisect_left(self._sorted_keys, key)
+            prefixed = []
+            while pos < len(self._sorted_keys) and self._sorted_keys[pos].startswith(key):
+                prefixed.extend(self._keys[self._sorted_keys[pos]])
+                pos += 1
+            for idx, _ in sorted(prefixed, key=lambda e: not self._primary[e[0]]):
+                add(idx, "prefix")
+            if results:
+                return results
+
+        # Fuzzy: shortlist keys by shared trigrams, then confirm with edit distance.
+        counts: Dict[int, int] = {}
+        for gram in _trigrams(key):
+            for key_id in self._trigram_postings.get(gram, ()):
+                counts[key_id] = counts.get(key_id, 0) + 1
+        shortlist = sorted(counts, key=counts.get, reverse=True)[:_FUZZY_SHORTLIST]
+        scored = []
+        for key_id in shortlist:
+            candidate = self._sorted_keys[key_id]
+            if abs(len(candidate) - len(key)) > (1 - _FUZZY_MIN_SIMILARITY) * max(len(candidate), len(key)):
+                continue  # edit distance can't clear the threshold
+            similarity = _similarity(key, candidate)
+            if similarity >= _FUZZY_MIN_SIMILARITY:
+                for idx, _ in self._keys[candidate]:
+                    scored.append((similarity, self._primary[idx], idx))
+        for similarity, _, idx in sorted(scored, reverse=True):
+            add(idx, "fuzzy", _CONFIDENCE["fuzzy"] * similarity)
+        return results
+
+
+@lru_cache(maxsize=1)
+def get_airport_index() -> CodeIndex:
+    """Airport IATA index, loaded on first use."""
+    return CodeIndex.from_csv(os.getenv("TRIPMATE_AIRPORTS_CSV", AIRPORTS_CSV))
+
+
+@lru_cache(maxsize=1)
+def get_station_index() -> CodeIndex:
+    """Indian railway station code index, loaded on first use."""
+    return CodeIndex.from_csv(os.getenv("TRIPMATE_STATIONS_CSV", STATIONS_CSV))
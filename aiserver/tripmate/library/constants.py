@@ -2,9 +2,19 @@
 
 SYSTEM_TIME = "_time"
 ITIN_INITIALIZED = "_itin_initialized"
+SCENARIO_PATH = "_scenario_path"  # scenario file the session falls back to (tools/memory.py)
+ITIN_REVISION = "_itin_revision"  # bumped by every tool that edits the itinerary
 
 TRMD_KEY = "trip_metadata"
 PROF_KEY = "user_profile"
+ITIN_KEY = "itinerary"
+RECS_KEY = "recommendations"
+RTU_KEY = "real_time_updates"
+BOOKING_KEY = "booking"
+POST_TRIP_KEY = "post_trip"
+
+# Keys making up the trip document (profiles/*.json), persisted by library/state_store.py
+TRIP_DOCUMENT_KEYS = (PROF_KEY, TRMD_KEY, ITIN_KEY, RECS_KEY, RTU_KEY, BOOKING_KEY, POST_TRIP_KEY)
 
 ITIN_START_DATE = "itinerary_start_date"
 ITIN_END_DATE = "itinerary_end_date"
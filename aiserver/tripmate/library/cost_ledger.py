@@ -0,0 +1,206 @@
+"""Incremental cost aggregation for the itinerary document.
+
+Every priced item under `itinerary.days[]` (stays, activities, the transport
+leg attached to an activity, and optional day-level `transport` / `food`
+lists, or a single day-level `transport` mapping) is registered once under its
+JSON path, e.g. `days[0].stays[1]`, `days[0].activities[2].transport` or
+`days[1].transport`. Adding, removing or repricing an item then
+adjusts the running per-day and per-category totals by the difference, and
+re-checks only the budget lines it touches, so totals and overspend flags
+stay current without walking the trip again.
+
+Categories follow `itinerary.cost_breakdown`: stay, food, activities, transport.
+"""
+import threading
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# Day-level list -> cost_breakdown category
+DAY_ITEM_CATEGORIES = {
+    "stays": "stay",
+    "activities": "activities",
+    "transport": "transport",
+    "food": "food",
+}
+CATEGORIES = ("stay", "food", "activities", "transport")
+
+
+def _cost(item: Any) -> float:
+    if not isinstance(item, Mapping):
+        return 0.0
+    value = item.get("cost")
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
+
+def iter_items(itinerary: Mapping[str, Any]) -> Iterator[Tuple[str, int, str, Any]]:
+    """
+    Yield (item path, day index, day-level field, item) for every item under `itinerary.days`.
+
+    A day-level field holding a single mapping (one transport leg) is its own item at
+    `days[i].<field>`; list elements are at `days[i].<field>[j]`.
+    """
+    for day_index, day in enumerate(itinerary.get("days") or []):
+        if not isinstance(day, Mapping):
+            continue
+        for field in DAY_ITEM_CATEGORIES:
+            items = day.get(field) or []
+            if isinstance(items, Mapping):
+                yield f"days[{day_index}].{field}", day_index, field, items
+                continue
+            for item_index, item in enumerate(items):
+                yield f"days[{day_index}].{field}[{item_index}]", day_index, field, item
+
+
+def iter_priced_items(itinerary: Mapping[str, Any]) -> Iterator[Tuple[str, int, str, float]]:
+    """Yield (item path, day index, category, cost) for every priced item in an itinerary."""
+    for path, day_index, field, item in iter_items(itinerary):
+        yield path, day_index, DAY_ITEM_CATEGORIES[field], _cost(item)
+        transport = item.get("transport") if isinstance(item, Mapping) and field == "activities" else None
+        if isinstance(transport, Mapping):
+            yield f"{path}.transport", day_index, "transport", _cost(transport)
+
+
+def budget_lines(preferences: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    """
+    Positive budget amounts from `preferences.budget`: one per allocation category plus "total".
+
+    A zero or missing allocation means "not set" and is never flagged.
+    """
+    budget = (preferences or {}).get("budget") or {}
+    lines = {}
+    for category, amount in (budget.get("allocations") or {}).items():
+        if isinstance(amount, (int, float)) and not isinstance(amount, bool) and amount > 0:
+            lines[category] = float(amount)
+    total = budget.get("total")
+    if isinstance(total, (int, float)) and not isinstance(total, bool) and total > 0:
+        lines["total"] = float(total)
+    return lines
+
+
+class CostLedger:
+    """
+    Running per-day and per-category totals with O(1) updates and budget checks.
+
+    Args:
+        budget: Budget line -> amount, e.g. from `budget_lines(profile["preferences"])`.
+            Category lines use the cost_breakdown names (stay, food, activities,
+            transport); "total" caps the whole trip.
+
+    Methods do no locking themselves. A ledger shared between concurrent tool
+    calls (the per-session ledgers in tools/itineraryCostTool.py) is updated
+    and read under its `lock`.
+    """
+
+    def __init__(self, budget: Optional[Mapping[str, float]] = None):
+        self.lock = threading.RLock()
+        self.budget: Dict[str, float] = dict(budget or {})
+        self._items: Dict[str, Tuple[int, str, float]] = {}
+        self._day_totals: Dict[int, float] = {}
+        self._category_totals: Dict[str, float] = {c: 0.0 for c in CATEGORIES}
+        self._total = 0.0
+        self._overspent: Dict[str, float] = {}
+        self._dirty_days: set = set()
+
+    @classmethod
+    def from_itinerary(cls, itinerary: Mapping[str, Any], budget: Optional[Mapping[str, float]] = None) -> "CostLedger":
+        """Build a ledger with one walk over the itinerary; later changes go through add/remove/reprice."""
+        ledger = cls(budget)
+        for path, day, category, cost in iter_priced_items(itinerary):
+            ledger.add_item(path, day, category, cost)
+        # Only days whose stored day_summary disagrees need rewriting
+        days = itinerary.get("days") or []
+        ledger._dirty_days = {
+            day for day in ledger._dirty_days
+            if day >= len(days) or ((days[day] or {}).get("day_summary") or {}).get("total_cost") != round(ledger.day_total(day), 2)
+        }
+        return ledger
+
+    # ---- Updates ----
+
+    def _apply(self, day: int, category: str, delta: float) -> None:
+        if not delta:
+            return
+        self._day_totals[day] = self._day_totals.get(day, 0.0) + delta
+        self._category_totals[category] = self._category_totals.get(category, 0.0) + delta
+        self._total += delta
+        self._dirty_days.add(day)
+        self._check(category, self._category_totals[category])
+        self._check("total", self._total)
+
+    def _check(self, line: str, spent: float) -> None:
+        allocated = self.budget.get(line)
+        if allocated is not None and spent > allocated:
+            self._overspent[line] = spent - allocated
+        else:
+            self._overspent.pop(line, None)
+
+    def add_item(self, item_id: str, day: int, category: str, cost: float) -> None:
+        """Register an item; re-adding an existing id reprices/moves it."""
+        if item_id in self._items:
+            self.remove_item(item_id)
+        self._items[item_id] = (day, category, float(cost))
+        self._apply(day, category, float(cost))
+
+    def remove_item(self, item_id: str) -> None:
+        day, category, cost = self._items.pop(item_id)
+        self._apply(day, category, -cost)
+
+    def reprice(self, item_id: str, cost: float) -> float:
+        """Change an item's cost; returns the difference applied to the totals."""
+        day, category, old = self._items[item_id]
+        self._items[item_id] = (day, category, float(cost))
+        delta = float(cost) - old
+        self._apply(day, category, delta)
+        return delta
+
+    def set_budget(self, line: str, amount: Optional[float]) -> None:
+        """Change one budget line (None or <= 0 removes it) and re-check just that line."""
+        if amount is None or amount <= 0:
+            self.budget.pop(line, None)
+        else:
+            self.budget[line] = float(amount)
+        self._check(line, self._total if line == "total" else self._category_totals.get(line, 0.0))
+
+    # ---- Totals ----
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    def day_total(self, day: int) -> float:
+        return self._day_totals.get(day, 0.0)
+
+    def category_total(self, category: str) -> float:
+        return self._category_totals.get(category, 0.0)
+
+    def item_cost(self, item_id: str) -> Optional[float]:
+        entry = self._items.get(item_id)
+        return entry[2] if entry else None
+
+    def cost_breakdown(self) -> Dict[str, float]:
+        """Totals in the shape of `itinerary.cost_breakdown`."""
+        breakdown = {c: round(self._category_totals.get(c, 0.0), 2) for c in CATEGORIES}
+        breakdown["total"] = round(self._total, 2)
+        return breakdown
+
+    def overspend(self) -> List[Dict[str, float]]:
+        """Budget lines currently exceeded, largest overrun first."""
+        rows = []
+        for line, over in sorted(self._overspent.items(), key=lambda kv: -kv[1]):
+            spent = self._total if line == "total" else self._category_totals.get(line, 0.0)
+            rows.append({"line": line, "allocated": self.budget[line], "spent": round(spent, 2), "over": round(over, 2)})
+        return rows
+
+    def apply_to(self, itinerary: Dict[str, Any]) -> List[int]:
+        """
+        Write `day_summary.total_cost` for days whose total changed since the last call,
+        plus `cost_breakdown`, into a mutable itinerary. Returns the days written.
+        """
+        days = itinerary.get("days") or []
+        written = []
+        for day in sorted(self._dirty_days):
+            if day < len(days) and isinstance(days[day], dict):
+                days[day].setdefault("day_summary", {})["total_cost"] = round(self.day_total(day), 2)
+                written.append(day)
+        self._dirty_days.clear()
+        itinerary["cost_breakdown"] = self.cost_breakdown()
+        return written
@@ -0,0 +1,285 @@
+"""Deterministic day-by-day routing of a trip's activities.
+
+1. One travel-time matrix over every activity and hotel (haversine distance
+   from library/geo.py, times a detour factor, at a city speed), built once.
+2. Activities are clustered into days by geography: farthest-point seeds,
+   then capacitated assignment (most constrained activity first) and
+   centroid updates until stable, so each day fits its visiting hours.
+3. Each day is ordered from its hotel with a nearest-neighbour tour that
+   respects opening hours, improved with 2-opt moves that stay feasible.
+   Activities that fit no tour are inserted where they cost least, on any
+   day, or reported as unscheduled.
+
+Times are minutes since midnight; `clock()` / `clock_minutes()` convert.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tripmate.library.geo import haversine_km
+
+DEFAULT_SPEED_KMH = 25.0  # door-to-door city travel, including waits
+DEFAULT_DETOUR = 1.3  # road distance over straight-line distance
+DEFAULT_DURATION_MIN = 90.0
+
+
+def clock_minutes(value: Any, default: float) -> float:
+    """Minutes since midnight from "HH:MM" (or a number of minutes); `default` if unparseable."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        hours, minutes = str(value).strip().split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return default
+
+
+def clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def travel_matrix(points: np.ndarray, speed_kmh: float = DEFAULT_SPEED_KMH, detour: float = DEFAULT_DETOUR) -> np.ndarray:
+    """(n, n) travel minutes between (lat, lng) points, in one broadcast haversine pass."""
+    lat, lng = points[:, 0], points[:, 1]
+    km = haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+    return km * detour / speed_kmh * 60
+
+
+@dataclass(frozen=True)
+class Stop:
+    """An activity to place: its node in the travel matrix, visit length and opening window."""
+    node: int
+    duration: float = DEFAULT_DURATION_MIN
+    open: float = 0.0
+    close: float = 24 * 60.0
+
+
+@dataclass
+class Visit:
+    stop: int  # index into the planner's stops
+    arrival: float
+    start: float  # after waiting for opening
+    end: float
+    travel: float  # minutes from the previous stop (or the hotel)
+
+
+@dataclass
+class DayRoute:
+    visits: List[Visit] = field(default_factory=list)
+    travel_minutes: float = 0.0  # including the way back to the hotel
+
+
+# ---------------- Routing one day ----------------
+
+class _Day:
+    def __init__(self, matrix: List[List[float]], stops: Sequence[Stop], depot: int, start: float, end: float):
+        self.matrix, self.stops, self.depot, self.start, self.end = matrix, stops, depot, start, end
+
+    def travel(self, order: Sequence[int]) -> Optional[float]:
+        """Total travel of `order` if it meets every window and ends by day end, else None."""
+        t, node, total, matrix = self.start, self.depot, 0.0, self.matrix
+        for i in order:
+            stop = self.stops[i]
+            leg = matrix[node][stop.node]
+            begin = t + leg if t + leg > stop.open else stop.open
+            if begin + stop.duration > stop.close:
+                return None
+            t, node, total = begin + stop.duration, stop.node, total + leg
+        back = matrix[node][self.depot]
+        return total + back if t + back <= self.end else None
+
+    def visits(self, order: Sequence[int]) -> List[Visit]:
+        t, node, visits = self.start, self.depot, []
+        for i in order:
+            stop = self.stops[i]
+            leg = self.matrix[node][stop.node]
+            begin = max(t + leg, stop.open)
+            visits.append(Visit(i, t + leg, begin, begin + stop.duration, leg))
+            t, node = begin + stop.duration, stop.node
+        return visits
+
+    def nearest_neighbour(self, members: Sequence[int]) -> Tuple[List[int], List[int]]:
+        """Greedy tour: always the stop that can start soonest; returns (order, stops that did not fit)."""
+        order, left = [], list(members)
+        t, node = self.start, self.depot
+        while left:
+            best, best_key = None, None
+            for i in left:
+                stop = self.stops[i]
+                begin = max(t + self.matrix[node][stop.node], stop.open)
+                if begin + stop.duration > stop.close:
+                    continue
+                key = (begin, stop.close)
+                if best_key is None or key < best_key:
+                    best, best_key = i, key
+            if best is None or self.travel(order + [best]) is None:
+                break
+            order.append(best)
+            left.remove(best)
+            t, node = best_key[0] + self.stops[best].duration, self.stops[best].node
+        return order, left
+
+    def two_opt(self, order: List[int]) -> List[int]:
+        """Reverse segments while that shortens travel and keeps every window."""
+        best = self.travel(order)
+        if best is None:
+            return order
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    total = self.travel(candidate)
+                    if total is not None and total < best - 1e-9:
+                        order, best, improved = candidate, total, True
+        return order
+
+    def cheapest_insertion(self, order: List[int], stop: int) -> Optional[Tuple[float, List[int]]]:
+        """(added travel, new order) for the best feasible position of `stop`, or None."""
+        base = self.travel(order)
+        if base is None:
+            return None
+        best = None
+        for position in range(len(order) + 1):
+            candidate = order[:position] + [stop] + order[position:]
+            total = self.travel(candidate)
+            if total is not None and (best is None or total - base < best[0]):
+                best = (total - base, candidate)
+        return best
+
+
+# ---------------- Clustering ----------------
+
+def _seeds(points: np.ndarray, k: int) -> np.ndarray:
+    """Farthest-point seeds, starting from the point farthest from the centroid (deterministic)."""
+    center = points.mean(axis=0)
+    first = int(np.argmax(haversine_km(points[:, 0], points[:, 1], center[0], center[1])))
+    seeds = [first]
+    nearest = haversine_km(points[:, 0], points[:, 1], points[first, 0], points[first, 1])
+    while len(seeds) < k:
+        nxt = int(np.argmax(nearest))
+        seeds.append(nxt)
+        nearest = np.minimum(nearest, haversine_km(points[:, 0], points[:, 1], points[nxt, 0], points[nxt, 1]))
+    return points[seeds].copy()
+
+
+def cluster_days(points: np.ndarray, durations: np.ndarray, k: int, capacity: float, iterations: int = 10) -> List[List[int]]:
+    """
+    Split points into k geographic groups whose visit durations fit `capacity` minutes.
+
+    Each pass assigns the points with the most to lose (largest gap between
+    their nearest and second-nearest centre) first, to the nearest centre with
+    room left; a point that fits nowhere goes to its nearest centre.
+    """
+    n = len(points)
+    if n == 0:
+        return [[] for _ in range(k)]
+    k = min(k, n)
+    centers = _seeds(points, k)
+    groups: List[List[int]] = []
+    for _ in range(iterations):
+        distance = haversine_km(points[:, None, 0], points[:, None, 1], centers[None, :, 0], centers[None, :, 1])
+        ranked = np.argsort(distance, axis=1)
+        gap = distance[np.arange(n), ranked[:, 1]] - distance[np.arange(n), ranked[:, 0]] if k > 1 else np.zeros(n)
+        load = np.zeros(k)
+        assignment = np.empty(n, dtype=int)
+        for i in np.argsort(-gap, kind="stable"):
+            choice = next((c for c in ranked[i] if load[c] + durations[i] <= capacity), ranked[i, 0])
+            assignment[i] = choice
+            load[choice] += durations[i]
+        new_groups = [np.flatnonzero(assignment == c).tolist() for c in range(k)]
+        if new_groups == groups:
+            break
+        groups = new_groups
+        centers = np.array([points[g].mean(axis=0) if g else centers[c] for c, g in enumerate(groups)])
+    return groups
+
+
+# ---------------- Planner ----------------
+
+def plan_days(
+    points: np.ndarray,
+    stops: Sequence[Stop],
+    depots: Sequence[int],
+    day_start: float = 9 * 60,
+    day_end: float = 20 * 60,
+    speed_kmh: float = DEFAULT_SPEED_KMH,
+) -> Tuple[List[DayRoute], List[int]]:
+    """
+    Route `stops` over len(depots) days.
+
+    Args:
+        points: (n, 2) lat/lng of every matrix node (activities and hotels).
+        stops: Activities, each pointing at its node in `points`.
+        depots: Per day, the node the day starts and ends at (its hotel).
+        day_start / day_end: Day window, minutes since midnight.
+        speed_kmh: Average door-to-door speed.
+
+    Returns:
+        (one DayRoute per day, indices of stops that fit no day).
+    """
+    k = len(depots)
+    matrix = travel_matrix(points, speed_kmh)
+    stop_points = np.array([points[s.node] for s in stops], dtype=float).reshape(-1, 2)
+    durations = np.array([s.duration for s in stops], dtype=float)
+    # Leave about a quarter of the day for getting around
+    groups = cluster_days(stop_points, durations, k, capacity=0.75 * (day_end - day_start))
+    groups += [[] for _ in range(k - len(groups))]
+
+    # Give each group the day whose hotel is nearest to it
+    order_of_days: List[Optional[int]] = [None] * k
+    free = list(range(k))
+    for g in sorted(range(k), key=lambda g: -len(groups[g])):
+        if not groups[g]:
+            continue
+        center = stop_points[groups[g]].mean(axis=0)
+        day = min(free, key=lambda d: (haversine_km(center[0], center[1], *points[depots[d]]), d))
+        order_of_days[day] = g
+        free.remove(day)
+
+    # Nested lists: scalar lookups in the routing loops are much cheaper than on an ndarray
+    rows = matrix.tolist()
+    days = [_Day(rows, stops, depots[d], day_start, day_end) for d in range(k)]
+    orders: List[List[int]] = []
+    leftover: List[int] = []
+    for d in range(k):
+        members = groups[order_of_days[d]] if order_of_days[d] is not None else []
+        order, left = days[d].nearest_neighbour(members)
+        orders.append(days[d].two_opt(order))
+        leftover.extend(left)
+
+    unscheduled = []
+    for stop in sorted(leftover, key=lambda i: stops[i].close - stops[i].open):
+        options = [(r[0], d, r[1]) for d in range(k) for r in [days[d].cheapest_insertion(orders[d], stop)] if r is not None]
+        if not options:
+            unscheduled.append(stop)
+            continue
+        _, d, order = min(options, key=lambda o: (o[0], o[1]))
+        orders[d] = days[d].two_opt(order)
+
+    routes = [DayRoute(visits=days[d].visits(orders[d]), travel_minutes=float(days[d].travel(orders[d]) or 0.0)) for d in range(k)]
+    return routes, unscheduled
+
+
+def activity_stop(activity: Mapping[str, Any], node: int, default_duration: float = DEFAULT_DURATION_MIN) -> Stop:
+    """Stop for an itinerary-style activity: `duration_minutes`, and `open`/`close` ("HH:MM") or `opening_hours`."""
+    hours = activity.get("opening_hours") if isinstance(activity.get("opening_hours"), Mapping) else activity
+    duration = activity.get("duration_minutes")
+    opens = clock_minutes(hours.get("open"), 0.0)
+    closes = clock_minutes(hours.get("close"), 24 * 60.0)
+    if closes <= opens:  # closes at or after midnight
+        closes += 24 * 60
+    return Stop(
+        node=node,
+        duration=float(duration) if isinstance(duration, (int, float)) and duration > 0 else default_duration,
+        open=opens,
+        close=closes,
+    )
+
+
+def days_for(count: int, per_day: int = 5) -> int:
+    return max(1, math.ceil(count / per_day))
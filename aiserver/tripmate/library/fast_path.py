@@ -0,0 +1,316 @@
+"""Rule-based fast path that routes unambiguous requests without a model turn.
+
+"flights BLR to DEL on 2026-11-02" needs no model to decide that the
+TransportAgent should search flights. `attach_fast_path(root_agent)` adds a
+before_model callback to the root that classifies the user's message
+(keyword scores, dates, passenger counts, and places resolved with the
+offline code indexes of library/code_resolver.py). When the message is
+confident it answers with a synthesized `transfer_to_agent` call instead of
+calling the model; when every parameter of a search is known as well and
+the message asks for nothing else, the sub-agent's first model turn is
+replaced by the search tool call itself. Anything else (follow-ups, several
+intents, unknown places, bookings to cancel or change) goes to the model as
+before.
+
+    TRIPMATE_FAST_PATH   "0" disables the fast path (default on).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tripmate.library.code_resolver import get_airport_index, get_station_index
+from tripmate.library.telemetry import add_to_span, close_model_span, set_span_attributes
+
+# Keyword weights per intent; a message is routed only when one intent clearly wins.
+INTENT_KEYWORDS = {
+    "flight": {"flight": 2, "flights": 2, "fly": 2, "flying": 2, "airfare": 2, "airfares": 2, "airline": 1.5, "airlines": 1.5, "plane": 1.5},
+    "train": {"train": 2, "trains": 2, "rail": 1.5, "railway": 1.5, "railways": 1.5, "irctc": 2, "sleeper": 1},
+    "hotel": {"hotel": 2, "hotels": 2, "stay": 1.5, "stays": 1.5, "room": 1.5, "rooms": 1.5, "resort": 1.5, "resorts": 1.5, "accommodation": 2, "hostel": 1.5},
+}
+_COMPARE = re.compile(r"\b(flights? or trains?|trains? or flights?|compare|how (do|can|should) i (get|go|travel)|how to (reach|get|go)|best way)\b")
+_RETURN = re.compile(r"\b(return(ing)?|back|round[ -]?trip)\b")
+MIN_SCORE = 2.0
+MIN_PLACE_CONFIDENCE = 0.9  # exact code, name, alias or city matches only
+MAX_WORDS = 30  # longer messages usually carry more than one request
+
+AGENT_FOR_INTENT = {"flight": "TransportAgent", "train": "TransportAgent", "compare": "TransportAgent", "hotel": "HotelAgent"}
+
+_MONTHS = {m: i + 1 for i, m in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"))}
+_WEEKDAYS = {d: i for i, d in enumerate(("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"))}
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_DATE_PATTERNS = (
+    ("iso", re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")),
+    ("dmy", re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{4})\b")),
+    ("day_month", re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(\d{{4}}))?")),
+    ("month_day", re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?")),
+    ("relative", re.compile(r"\b(day after tomorrow|tomorrow|today|tonight)\b")),
+    ("weekday", re.compile(r"\b(?:(next|this|on|coming)\s+)(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")),
+)
+# Requests about an existing booking, not a search: always left to the model
+_ACTIONS = re.compile(r"\b(cancel\w*|book\w*|reserv\w*|change|changing|modify|reschedul\w*|refund\w*|status|pnr|upgrade|delay\w*)\b")
+# Words that add nothing to a search; anything else left over (a price cap, "cheapest", "direct") blocks the tool call
+_FILLER = {
+    "a", "an", "the", "me", "my", "i", "we", "us", "our", "for", "from", "to", "on", "in", "at", "near", "and",
+    "please", "pls", "find", "search", "show", "get", "look", "looking", "need", "want", "would", "like", "any",
+    "some", "available", "options", "option", "between", "can", "you", "could", "what", "are", "there", "is",
+    "with", "of", "list", "go", "going", "travel", "traveling", "travelling", "leaving", "departing", "one-way", "-",
+}
+_PEOPLE = re.compile(r"\b(\d{1,2})\s*(?:adults?|people|persons?|passengers?|pax|travell?ers?|guests?)\b")
+_NIGHTS = re.compile(r"\b(\d{1,2})\s*nights?\b")
+
+
+def enabled() -> bool:
+    return os.getenv("TRIPMATE_FAST_PATH", "1") != "0"
+
+
+@dataclass
+class Intent:
+    """A routing decision: the sub-agent, and the tool call to make when every argument is known."""
+    name: str  # flight | train | compare | hotel
+    agent: str
+    tool: Optional[str] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+# ---------------- Slot extraction ----------------
+
+def _date(kind: str, groups: Tuple[Optional[str], ...], today: date) -> Optional[date]:
+    try:
+        if kind == "iso":
+            return date(int(groups[0]), int(groups[1]), int(groups[2]))
+        if kind == "dmy":
+            return date(int(groups[2]), int(groups[1]), int(groups[0]))
+        if kind in ("day_month", "month_day"):
+            day, month, year = (groups[0], groups[1], groups[2]) if kind == "day_month" else (groups[1], groups[0], groups[2])
+            found = date(int(year) if year else today.year, _MONTHS[month[:3]], int(day))
+            # Without a year, the next such date
+            return found.replace(year=found.year + 1) if not year and found < today else found
+    except ValueError:
+        return None
+    if kind == "relative":
+        return today + timedelta(days={"today": 0, "tonight": 0, "tomorrow": 1}.get(groups[0], 2))
+    if kind == "weekday":
+        ahead = (_WEEKDAYS[groups[1]] - today.weekday()) % 7
+        return today + timedelta(days=ahead or (0 if groups[0] == "this" else 7))
+    return None
+
+
+def extract_dates(text: str, today: date) -> Tuple[List[date], str]:
+    """Dates mentioned in `text`, in order, and the text with them blanked out."""
+    found: List[Tuple[int, date]] = []
+    for kind, pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            value = _date(kind, match.groups(), today)
+            if value is not None:
+                found.append((match.start(), value))
+            text = text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+    return [d for _, d in sorted(found, key=lambda f: f[0])], text
+
+
+def _resolve(words: List[str], index: Any) -> Optional[Tuple[str, Any]]:
+    """(phrase, best match) for the longest phrase of up to three `words` that names a known place."""
+    for size in range(min(3, len(words)), 0, -1):
+        phrase = " ".join(words[:size])
+        matches = index.lookup(phrase, limit=1)
+        if matches and matches[0].confidence >= MIN_PLACE_CONFIDENCE:
+            return phrase, matches[0]
+    return None
+
+
+def extract_route(text: str, index: Any) -> Optional[Tuple[Tuple[str, Any], Tuple[str, Any]]]:
+    """((origin phrase, match), (destination phrase, match)) for "[from] X to Y", if both are known places."""
+    words = text.split()
+    for i, word in enumerate(words):
+        if word != "to" or i == 0:
+            continue
+        before = words[:i]
+        if "from" in before:
+            before = before[len(before) - before[::-1].index("from"):]
+        origin = next((r for start in range(max(0, len(before) - 3), len(before)) if (r := _resolve(before[start:], index))), None)
+        destination = _resolve(words[i + 1:], index)
+        if origin and destination and origin[1].code != destination[1].code:
+            return origin, destination
+    return None
+
+
+def extract_place(text: str, index: Any) -> Optional[Tuple[str, Any]]:
+    """The place after "in"/"at"/"near" (hotel searches), if known."""
+    words = text.split()
+    for i, word in enumerate(words[:-1]):
+        if word in ("in", "at", "near"):
+            found = _resolve(words[i + 1:], index)
+            if found:
+                return found
+    return None
+
+
+# ---------------- Classification ----------------
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9\-/.:, ]+", " ", text.casefold()).replace(",", " , ").split())
+
+
+def unexplained_words(text: str, phrases: List[str]) -> List[str]:
+    """Words of `text` that are not one of the slot `phrases`, an intent keyword, a count or filler."""
+    for pattern in (_COMPARE, _RETURN, _PEOPLE, _NIGHTS):
+        text = pattern.sub(" ", text)
+    for phrase in phrases:
+        text = re.sub(rf"(?<!\S){re.escape(phrase)}(?!\S)", " ", text)
+    keywords = set().union(*INTENT_KEYWORDS.values())
+    return [w for w in re.sub(r"[.,]", " ", text).split() if w not in keywords and w not in _FILLER]
+
+
+def classify(message: str, today: Optional[date] = None) -> Optional[Intent]:
+    """
+    Route a user message, or None when the model should decide.
+
+    Returns an Intent with a tool call when the intent is clear, every required
+    argument was found and nothing else is asked for; an Intent without a tool
+    when only the intent is clear. Messages about an existing booking (cancel,
+    change, status, ...) always go to the model.
+    """
+    today = today or date.today()
+    text = _normalize(message)
+    if not text or len(text.split()) > MAX_WORDS or _ACTIONS.search(text):
+        return None
+    tokens = text.replace(",", " ").replace(".", " ").split()
+    scores = {name: sum(weights.get(t, 0) for t in tokens) for name, weights in INTENT_KEYWORDS.items()}
+    mentioned = [name for name, score in scores.items() if score > 0]
+    if _COMPARE.search(text) and "hotel" not in mentioned:
+        name = "compare"
+    elif len(mentioned) == 1 and scores[mentioned[0]] >= MIN_SCORE:
+        name = mentioned[0]
+    else:
+        return None  # no clear intent, or several (e.g. "flight to Goa and a hotel there")
+    intent = Intent(name=name, agent=AGENT_FOR_INTENT[name])
+
+    dates, rest = extract_dates(text, today)
+    rest = " ".join(re.sub(r"[.,]+(\s|$)", " ", rest).split())
+    if any(d < today for d in dates):
+        return intent  # let the model ask about a date in the past
+    people = _PEOPLE.search(text)
+    passengers = int(people.group(1)) if people and 0 < int(people.group(1)) <= 9 else None
+
+    if name == "hotel":
+        place = extract_place(rest, get_airport_index()) or extract_place(rest, get_station_index())
+        nights = _NIGHTS.search(text)
+        if dates and len(dates) == 1 and nights:
+            dates.append(dates[0] + timedelta(days=int(nights.group(1))))
+        if place and len(dates) == 2 and dates[1] > dates[0] and not unexplained_words(rest, [place[0]]):
+            intent.tool = "hotels_search_async"
+            intent.args = {"search_query": place[1].city or place[0], "check_in_date": dates[0].isoformat(), "check_out_date": dates[1].isoformat()}
+            if passengers:
+                intent.args["num_passengers"] = passengers
+        return intent
+
+    index = get_station_index() if name == "train" else get_airport_index()
+    route = extract_route(rest, index)
+    returning = bool(_RETURN.search(text))
+    if not route or not dates or len(dates) > (2 if returning and name == "flight" else 1):
+        return intent  # missing slots, or a date window the model should read
+    (origin_text, origin), (destination_text, destination) = route
+    if unexplained_words(rest, [origin_text, destination_text]):
+        return intent  # e.g. a price cap or "cheapest" the search arguments cannot carry
+    if name == "compare":
+        intent.tool = "transport_compare_async"
+        intent.args = {"origin": origin_text, "destination": destination_text, "departure_date": dates[0].isoformat()}
+    else:
+        intent.tool = "flights_search_async" if name == "flight" else "train_search_async"
+        intent.args = {"origin": origin.code, "destination": destination.code, "departure_date": dates[0].isoformat()}
+        if name == "flight" and len(dates) == 2:
+            if dates[1] < dates[0]:
+                return intent
+            intent.args["return_date"] = dates[1].isoformat()
+            intent.args["type"] = 1  # round trip
+    if passengers:
+        intent.args["num_passengers"] = passengers
+    return intent
+
+
+# ---------------- ADK callbacks ----------------
+
+# (invocation id, agent name) -> (tool, args) for the sub-agent's first model turn
+_dispatches: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+_dispatches_lock = threading.Lock()
+_MAX_DISPATCHES = 1024
+
+
+def _user_text(llm_request: Any) -> Optional[str]:
+    """Text of a fresh user message ending the request, or None (tool results, transfers, ...)."""
+    contents = llm_request.contents or []
+    if not contents or contents[-1].role != "user":
+        return None
+    parts = contents[-1].parts or []
+    if any(p.function_response or p.function_call for p in parts):
+        return None
+    text = " ".join(p.text for p in parts if p.text)
+    return text or None
+
+
+def _call(callback_context: Any, name: str, args: Dict[str, Any], intent: str) -> Any:
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+
+    response = LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))]),
+        custom_metadata={"fast_path": intent},
+    )
+    add_to_span("fast_path")
+    set_span_attributes(fast_path_intent=intent)
+    # ADK skips after_model callbacks when a before_model callback answers
+    close_model_span(callback_context, response)
+    return response
+
+
+def _route(callback_context: Any, llm_request: Any) -> Optional[Any]:
+    """Root before_model callback: transfer confident requests without calling the model."""
+    text = _user_text(llm_request)
+    if text is None or "transfer_to_agent" not in (llm_request.tools_dict or {}):
+        return None
+    intent = classify(text)
+    if intent is None:
+        return None
+    if intent.tool:
+        with _dispatches_lock:
+            _dispatches[(callback_context.invocation_id, intent.agent)] = (intent.tool, intent.args)
+            while len(_dispatches) > _MAX_DISPATCHES:
+                _dispatches.popitem(last=False)
+    return _call(callback_context, "transfer_to_agent", {"agent_name": intent.agent}, intent.name)
+
+
+def _dispatch(callback_context: Any, llm_request: Any) -> Optional[Any]:
+    """Sub-agent before_model callback: make the routed search call on the agent's first turn."""
+    with _dispatches_lock:
+        pending = _dispatches.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if pending is None or pending[0] not in (llm_request.tools_dict or {}):
+        return None
+    tool, args = pending
+    return _call(callback_context, tool, args, tool)
+
+
+def _append(existing: Any, callback: Callable) -> List[Callable]:
+    if existing is None:
+        return [callback]
+    existing = existing if isinstance(existing, list) else [existing]
+    return existing if callback in existing else [*existing, callback]
+
+
+def attach_dispatch(agent: Any) -> Any:
+    """Add the dispatch callback to `agent` if the fast path routes to it. Idempotent; returns `agent`."""
+    if enabled() and agent.name in set(AGENT_FOR_INTENT.values()) and hasattr(agent, "before_model_callback"):
+        agent.before_model_callback = _append(agent.before_model_callback, _dispatch)
+    return agent
+
+
+def attach_fast_path(root: Any) -> Any:
+    """Add the routing callback to `root` and the dispatch callback to its routed sub-agents. Idempotent."""
+    if not enabled():
+        return root
+    root.before_model_callback = _append(root.before_model_callback, _route)
+    for sub_agent in root.sub_agents or []:
+        attach_dispatch(sub_agent)
+    return root
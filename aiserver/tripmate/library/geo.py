@@ -0,0 +1,158 @@
+"""Vectorized geo helpers and a grid index over hotel candidates.
+
+`GeoGrid` projects a batch of points onto a local equirectangular plane (km)
+and buckets them into square cells, sorted by cell key. A radius query
+touches only the cell rows it overlaps, so "distance from every hotel to its
+nearest activity" costs one vectorized pass per activity over nearby hotels,
+never a Python loop over hotels x activities.
+"""
+import math
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Activities further than this from the hotel batch are treated as another city.
+MAX_ANCHOR_KM = 50.0
+
+
+def haversine_km(lat1: Any, lng1: Any, lat2: Any, lng2: Any) -> np.ndarray:
+    """Great-circle distance in km; arguments broadcast like NumPy arrays."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def coordinates(records: Sequence[Any]) -> np.ndarray:
+    """
+    (n, 2) array of (lat, lng) from records exposing `gps_coordinates` as a
+    (lat, lng) tuple or {"latitude", "longitude"} mapping. Missing -> NaN.
+    """
+    nan = float("nan")
+    rows = []
+    for record in records:
+        gps = record.get("gps_coordinates") if isinstance(record, Mapping) else getattr(record, "gps_coordinates", None)
+        if isinstance(gps, Mapping):
+            gps = (gps.get("latitude"), gps.get("longitude"))
+        if isinstance(gps, (tuple, list)) and len(gps) == 2 and None not in gps:
+            rows.append((float(gps[0]), float(gps[1])))
+        else:
+            rows.append((nan, nan))
+    return np.array(rows, dtype=float).reshape(len(rows), 2)
+
+
+def location_points(items: Iterable[Any]) -> np.ndarray:
+    """(n, 2) array of (lat, lng) from itinerary-style items with `location: {lat, lng}`; items without one are skipped."""
+    rows = []
+    for item in items:
+        location = item.get("location") if isinstance(item, Mapping) else None
+        if not isinstance(location, Mapping):
+            continue
+        lat, lng = location.get("lat"), location.get("lng")
+        if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+            rows.append((float(lat), float(lng)))
+    return np.array(rows, dtype=float).reshape(len(rows), 2)
+
+
+class GeoGrid:
+    """
+    Uniform grid index over a batch of (lat, lng) points.
+
+    Args:
+        points: (n, 2) array of lat/lng; NaN rows are kept out of the index.
+        cell_km: Cell edge length in km.
+    """
+
+    def __init__(self, points: np.ndarray, cell_km: float = 2.0):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_km = cell_km
+        valid = ~np.isnan(self.points).any(axis=1)
+        self.valid = valid
+        if valid.any():
+            self.origin = self.points[valid].mean(axis=0)
+        else:
+            self.origin = np.zeros(2)
+        self._kx = math.cos(math.radians(self.origin[0])) * math.pi / 180 * EARTH_RADIUS_KM
+        self._ky = math.pi / 180 * EARTH_RADIUS_KM
+
+        indices = np.flatnonzero(valid)
+        cx, cy = self._cells(self.points[indices])
+        keys = self._key(cx, cy)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._indices = indices[order]
+
+    def _xy(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return (points[:, 1] - self.origin[1]) * self._kx, (points[:, 0] - self.origin[0]) * self._ky
+
+    def _cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x, y = self._xy(points)
+        return np.floor(x / self.cell_km).astype(np.int64), np.floor(y / self.cell_km).astype(np.int64)
+
+    @staticmethod
+    def _key(cx: Any, cy: Any) -> Any:
+        # Row-major key: cells of one x column are contiguous in sorted order
+        return cx * (1 << 32) + cy
+
+    def within(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Indices (into `points`) of points within radius_km of (lat, lng)."""
+        if not len(self._keys):
+            return np.empty(0, dtype=int)
+        (cx,), (cy,) = self._cells(np.array([[lat, lng]]))
+        reach = int(math.ceil(radius_km / self.cell_km))
+        spans = []
+        for column in range(cx - reach, cx + reach + 1):
+            lo, hi = np.searchsorted(self._keys, [self._key(column, cy - reach), self._key(column, cy + reach + 1)])
+            if hi > lo:
+                spans.append(self._indices[lo:hi])
+        if not spans:
+            return np.empty(0, dtype=int)
+        candidates = np.concatenate(spans)
+        d = haversine_km(lat, lng, self.points[candidates, 0], self.points[candidates, 1])
+        return candidates[d <= radius_km]
+
+    def nearest_anchor_km(self, anchors: np.ndarray, max_km: float) -> np.ndarray:
+        """
+        Distance from every point to its nearest anchor, capped at max_km.
+
+        One vectorized pass per anchor over the grid cells within max_km of it.
+        Points without coordinates get NaN.
+        """
+        distances = np.full(len(self.points), float(max_km))
+        distances[~self.valid] = np.nan
+        for lat, lng in np.asarray(anchors, dtype=float).reshape(-1, 2):
+            nearby = self.within(lat, lng, max_km)
+            if nearby.size:
+                d = haversine_km(lat, lng, self.points[nearby, 0], self.points[nearby, 1])
+                distances[nearby] = np.minimum(distances[nearby], d)
+        return distances
+
+    def centroid_km(self) -> np.ndarray:
+        """Distance from every point to the batch's median location (a proxy for the city centre)."""
+        if not self.valid.any():
+            return np.full(len(self.points), np.nan)
+        center = np.median(self.points[self.valid], axis=0)
+        return haversine_km(self.points[:, 0], self.points[:, 1], center[0], center[1])
+
+
+def proximity_distances(
+    records: Sequence[Any],
+    anchors: Optional[np.ndarray] = None,
+    max_km: float = 15.0,
+    cell_km: float = 2.0,
+) -> Optional[np.ndarray]:
+    """
+    Per-record distance in km to the nearest anchor (e.g. itinerary activities),
+    or to the batch centre when no anchor lies within MAX_ANCHOR_KM of the batch.
+    Returns None if no record has coordinates.
+    """
+    grid = GeoGrid(coordinates(records), cell_km=cell_km)
+    if not grid.valid.any():
+        return None
+    if anchors is not None and len(anchors):
+        anchors = np.asarray(anchors, dtype=float).reshape(-1, 2)
+        local = haversine_km(anchors[:, 0], anchors[:, 1], grid.origin[0], grid.origin[1]) <= MAX_ANCHOR_KM
+        if local.any():
+            return grid.nearest_anchor_km(anchors[local], max_km)
+    return np.minimum(grid.centroid_km(), max_km)
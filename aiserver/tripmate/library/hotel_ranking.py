@@ -0,0 +1,228 @@
+"""Vectorized batch ranking for hotel search results.
+
+Scores hotels on a weighted mix of price (square-root scaled, with a
+penalty for hotels under 3 stars), star class, rating, log-scaled review
+count, location rating and optionally proximity. Every feature is pulled
+into NumPy arrays in one pass and the whole batch is scored at once, so
+ranking stays cheap when several pages or queries are merged into
+thousands of properties.
+"""
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tripmate.library.geo import proximity_distances
+
+DEFAULT_WEIGHTS = {
+    "price": 0.15,
+    "hotel_class": 0.3,
+    "rating": 0.25,
+    "reviews": 0.2,
+    "location": 0.1,
+    "proximity": 0.0,
+}
+
+# Proximity weight used when the profile sets `proximity_preference` without an explicit weight.
+PROXIMITY_PREFERENCE_WEIGHT = 0.15
+# Distance (km) at which the proximity score reaches 0.
+PROXIMITY_MAX_KM = 15.0
+
+# Feature columns, in array order.
+FEATURES = ("price", "hotel_class", "rating", "reviews", "location")
+
+
+def weights_from_profile(accommodation_preferences: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    """
+    Ranking weights for a user, from `user_profile.preferences.accommodation_preferences`.
+
+    `ranking_weights` entries override DEFAULT_WEIGHTS; unknown keys and
+    negative values are ignored and the result is renormalized to sum to 1.
+    A `proximity_preference` (e.g. "city_center") turns on the proximity
+    factor unless `ranking_weights.proximity` is given.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    overrides = (accommodation_preferences or {}).get("ranking_weights") or {}
+    if (accommodation_preferences or {}).get("proximity_preference"):
+        weights["proximity"] = PROXIMITY_PREFERENCE_WEIGHT
+    for key, value in overrides.items():
+        if key in weights and isinstance(value, (int, float)) and value >= 0:
+            weights[key] = float(value)
+    total = sum(weights.values())
+    if total <= 0:
+        return dict(DEFAULT_WEIGHTS)
+    return {k: v / total for k, v in weights.items()}
+
+
+def _get(hotel: Any, key: str) -> Any:
+    if isinstance(hotel, Mapping):
+        return hotel.get(key)
+    return getattr(hotel, key, None)
+
+
+def extract_features(hotels: Sequence[Any]) -> np.ndarray:
+    """
+    Build an (n, 5) float array of price, hotel_class, rating, reviews and
+    location_rating. Missing values are NaN. Accepts dicts or objects.
+    """
+    nan = float("nan")
+    rows = []
+    for hotel in hotels:
+        rate = _get(hotel, "rate_per_night")
+        price = _get(rate, "extracted_lowest") if rate is not None else None
+        rows.append((
+            nan if price is None else price,
+            *(nan if v is None else v for v in (
+                _get(hotel, "hotel_class"),
+                _get(hotel, "overall_rating"),
+                _get(hotel, "reviews"),
+                _get(hotel, "location_rating"),
+            )),
+        ))
+    return np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+
+
+def proximity_scores(distance_km: np.ndarray, max_km: float = PROXIMITY_MAX_KM) -> np.ndarray:
+    """1 at distance 0 falling to 0 at max_km (square-root scaling, like price); unknown -> batch median."""
+    distance = np.asarray(distance_km, dtype=float)
+    known = distance[~np.isnan(distance)]
+    distance = np.where(np.isnan(distance), np.median(known) if known.size else max_km / 2, distance)
+    return 1 - np.sqrt(np.clip(distance / max_km, 0, 1))
+
+
+def score_features(
+    features: np.ndarray,
+    weights: Optional[Mapping[str, float]] = None,
+    distance_km: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Score every row of `features` in one vectorized pass.
+
+    Missing inputs are filled per batch: price -> batch max, stars (missing
+    or 0) -> average of the known non-zero stars, rating/reviews -> 0,
+    location -> 5. `distance_km` (see library/geo.py) adds the proximity
+    factor when its weight is non-zero.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    if len(features) == 0:
+        return np.empty(0)
+
+    price, stars, rating, reviews, location = (features[:, i] for i in range(len(FEATURES)))
+
+    known_prices = price[~np.isnan(price)]
+    min_price = known_prices.min() if known_prices.size else 0.0
+    max_price = known_prices.max() if known_prices.size else 1.0
+    known_stars = stars[~np.isnan(stars) & (stars > 0)]
+    avg_stars = known_stars.mean() if known_stars.size else 3.0
+
+    price = np.where(np.isnan(price), max_price, price)
+    stars = np.where(np.isnan(stars) | (stars == 0), avg_stars, stars)
+    rating = np.nan_to_num(rating, nan=0.0)
+    reviews = np.nan_to_num(reviews, nan=0.0)
+    location = np.nan_to_num(location, nan=5.0)
+
+    # Non-linear price scaling: cheap != huge advantage
+    if max_price > min_price:
+        price_score = 1 - np.sqrt(np.clip((price - min_price) / (max_price - min_price), 0, 1))
+    else:
+        price_score = np.ones_like(price)
+    # Penalize very low-star hotels so cheap 2-star doesn't dominate
+    price_score = np.where(stars < 3, price_score * 0.7, price_score)
+
+    max_reviews = reviews.max()
+    reviews_score = np.log1p(reviews) / math.log1p(max_reviews) if max_reviews > 0 else np.zeros_like(reviews)
+
+    scores = (
+        weights["price"] * price_score
+        + weights["hotel_class"] * (stars / 5)
+        + weights["rating"] * (rating / 5)
+        + weights["reviews"] * reviews_score
+        + weights["location"] * (location / 5)
+    )
+    if distance_km is not None and weights.get("proximity"):
+        scores = scores + weights["proximity"] * proximity_scores(distance_km)
+    return scores
+
+
+def top_k(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Indices of the k best scores, best first, via partial selection (no full sort)."""
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=int)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def rank_hotels(
+    hotels: Sequence[Any],
+    weights: Optional[Mapping[str, float]] = None,
+    k: Optional[int] = None,
+    anchors: Optional[np.ndarray] = None,
+) -> List[Tuple[int, float]]:
+    """
+    Rank hotels; returns (index into `hotels`, score) pairs for the top k, best first.
+
+    With a proximity weight, hotels are scored by distance to the nearest of
+    `anchors` ((n, 2) lat/lng, e.g. itinerary activities) or, without anchors
+    in the area, to the centre of the batch.
+    """
+    distance_km = None
+    if (weights or DEFAULT_WEIGHTS).get("proximity"):
+        distance_km = proximity_distances(hotels, anchors, max_km=PROXIMITY_MAX_KM)
+    scores = score_features(extract_features(hotels), weights, distance_km)
+    return [(int(i), float(scores[i])) for i in top_k(scores, k)]
+
+
+class IncrementalRanker:
+    """
+    Merge hotels page by page and re-rank the whole set after each page.
+
+    Scores are normalized over the batch (price range, review counts), so the
+    merged set is rescored every time; with vectorized scoring that stays
+    cheap. `stable_pages` counts consecutive pages after which the top-k
+    membership did not change, which callers use to stop paginating early.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Mapping[str, float]] = None,
+        k: Optional[int] = None,
+        anchors: Optional[np.ndarray] = None,
+    ):
+        self.weights = weights
+        self.k = k
+        self.anchors = anchors
+        self.hotels: List[Any] = []
+        self.ranked: List[Tuple[int, float]] = []
+        self.pages = 0
+        self.stable_pages = 0
+        self._seen = set()
+
+    @staticmethod
+    def _identity(hotel: Any) -> Any:
+        raw = getattr(hotel, "raw", None)
+        token = raw.get("property_token") if isinstance(raw, Mapping) else None
+        return token or _get(hotel, "name")
+
+    def add_page(self, hotels: Sequence[Any]) -> List[Tuple[int, float]]:
+        """Add one page (duplicates of already-seen properties are skipped) and return the new ranking."""
+        for hotel in hotels:
+            identity = self._identity(hotel)
+            if identity in self._seen:
+                continue
+            self._seen.add(identity)
+            self.hotels.append(hotel)
+
+        previous = {i for i, _ in self.ranked}
+        self.ranked = rank_hotels(self.hotels, self.weights, self.k, self.anchors)
+        if self.pages and {i for i, _ in self.ranked} == previous:
+            self.stable_pages += 1
+        else:
+            self.stable_pages = 0
+        self.pages += 1
+        return self.ranked
+
+    def top(self) -> List[Any]:
+        return [self.hotels[i] for i, _ in self.ranked]
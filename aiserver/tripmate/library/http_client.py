@@ -0,0 +1,333 @@
+"""Shared HTTP client for provider APIs (SerpApi, RailRadar).
+
+One client per provider keeps a keep-alive connection pool, applies a
+token-bucket rate limit shared by every tool and thread, uses the same
+timeouts everywhere, and retries 429/5xx and transport errors with jittered
+exponential backoff. Each client has a sync face (`get_json`, on
+`requests`) and an async face (`aget_json`, on `httpx`). Every request is
+recorded as an `http` span (library/telemetry.py) with its retries.
+
+Identical JSON requests that are already in flight on the same face are
+coalesced into one upstream call (library/singleflight.py).
+
+`run_sync(coro)` lets sync callers (the sync faces of the async tools) run a
+coroutine on one shared background event loop, so its httpx clients and their
+connection pools are reused across calls.
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, Optional, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from tripmate.library.response_cache import make_cache_key
+from tripmate.library import singleflight
+from tripmate.library.telemetry import add_to_span, set_span_attributes, span
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `reserve()` takes a token and returns how long
+    the caller must wait before using it, so sync and async callers share one
+    bucket and only differ in how they sleep.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass
+class ProviderConfig:
+    name: str
+    base_url: str
+    rate: float  # requests per second; 0 disables limiting
+    burst: int
+    timeout: float  # read timeout, seconds
+    connect_timeout: float = 5.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 8.0
+    pool_size: int = 16
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def _env_config(name: str, base_url: str, rate: float, burst: int, timeout: float) -> ProviderConfig:
+    prefix = name.upper()
+    return ProviderConfig(
+        name=name,
+        base_url=os.getenv(f"{prefix}_BASE_URL", base_url).rstrip("/"),
+        rate=float(os.getenv(f"{prefix}_RATE_LIMIT", rate)),
+        burst=int(os.getenv(f"{prefix}_RATE_BURST", burst)),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", timeout)),
+        max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", 3)),
+        pool_size=int(os.getenv("HTTP_POOL_SIZE", 16)),
+    )
+
+
+def provider_configs() -> Dict[str, ProviderConfig]:
+    """Provider settings, overridable with <PROVIDER>_BASE_URL/_RATE_LIMIT/_RATE_BURST/_TIMEOUT/_MAX_RETRIES."""
+    return {
+        "serpapi": _env_config("serpapi", "https://serpapi.com", rate=5, burst=10, timeout=20),
+        "railradar": _env_config("railradar", "https://railradar.in/api/v1", rate=10, burst=20, timeout=10),
+    }
+
+
+class ProviderClient:
+    """Pooled, rate-limited, retrying client for one provider."""
+
+    def __init__(self, config: ProviderConfig):
+        self.config = config
+        self.bucket = TokenBucket(config.rate, config.burst)
+        self.session = requests.Session()
+        self.session.headers.update(config.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # httpx clients are bound to the event loop they were created on.
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.config.base_url}/{path.lstrip('/')}"
+
+    def flight_key(self, path: str, params: Optional[Dict[str, Any]], face: str = "sync") -> str:
+        """
+        Coalescing key: client face, provider, path and normalized params, without credentials.
+        Sync and async calls never share a flight, so waiters get the exception types their
+        face raises (`requests` vs `httpx`).
+        """
+        return make_cache_key(f"{face} {self.config.name} {path}", dict(params or {}))
+
+    def flight_wait(self) -> float:
+        """Longest a coalesced caller waits for the leader: every attempt timing out, plus backoff."""
+        return (self.config.connect_timeout + self.config.timeout + 30.0) * (self.config.max_retries + 1)
+
+    def span_name(self, path: str) -> str:
+        """Low-cardinality span name: numeric path segments (train numbers, ...) become {id}."""
+        return f"{self.config.name} {_ID_SEGMENT.sub('/{id}', path.split('?')[0])}"
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(self.config.backoff_cap, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(self.config.backoff_cap, self.config.backoff_base * 2 ** attempt))
+
+    # ---- Sync face ----
+
+    def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        GET with rate limiting and retries. Returns the final response after
+        `raise_for_status()`, so callers see `requests.HTTPError` on failure.
+        """
+        with span("http", self.span_name(path)):
+            return self._get(path, params, headers, timeout)
+
+    def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+    ) -> requests.Response:
+        url = self.url(path)
+        timeouts = (self.config.connect_timeout, timeout or self.config.timeout)
+        for attempt in range(self.config.max_retries + 1):
+            wait = self.bucket.reserve()
+            if wait:
+                add_to_span("rate_limit_wait_ms", round(wait * 1000, 1))
+                time.sleep(wait)
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=timeouts)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.config.max_retries:
+                    raise
+                delay = self._backoff(attempt, None)
+                logging.warning(f"{self.config.name}: {type(e).__name__} on {url}, retrying in {delay:.2f}s")
+                add_to_span("retries")
+                time.sleep(delay)
+                continue
+
+            if resp.status_code in RETRY_STATUSES and attempt < self.config.max_retries:
+                delay = self._backoff(attempt, resp.headers.get("Retry-After"))
+                logging.warning(f"{self.config.name}: HTTP {resp.status_code} on {url}, retrying in {delay:.2f}s")
+                resp.close()
+                add_to_span("retries")
+                time.sleep(delay)
+                continue
+            set_span_attributes(status_code=resp.status_code, response_bytes=len(resp.content))
+            resp.raise_for_status()
+            return resp
+        raise AssertionError("unreachable")
+
+    def get_json(self, path: str, **kwargs: Any) -> Any:
+        """GET and parse JSON; concurrent identical requests share one upstream call and its result."""
+        if not singleflight.enabled():
+            return self.get(path, **kwargs).json()
+        key = self.flight_key(path, kwargs.get("params"), "sync")
+        return singleflight.get_single_flight().do(key, lambda: self.get(path, **kwargs).json(), timeout=self.flight_wait())
+
+    # ---- Async face ----
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    headers=self.config.headers,
+                    # Like the requests pool: no cap on open connections (the token bucket
+                    # bounds provider load), only on how many idle ones are kept alive.
+                    limits=httpx.Limits(
+                        max_connections=None,
+                        max_keepalive_connections=self.config.pool_size,
+                    ),
+                )
+                self._async_clients[loop] = client
+            return client
+
+    async def aget(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """Async GET with the same limits/retries as `get`; raises `httpx.HTTPError` on failure."""
+        with span("http", self.span_name(path)):
+            return await self._aget(path, params, headers, timeout)
+
+    async def _aget(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+    ) -> httpx.Response:
+        client = self._async_client()
+        url = self.url(path)
+        timeouts = httpx.Timeout(timeout or self.config.timeout, connect=self.config.connect_timeout)
+        for attempt in range(self.config.max_retries + 1):
+            wait = self.bucket.reserve()
+            if wait:
+                add_to_span("rate_limit_wait_ms", round(wait * 1000, 1))
+                await asyncio.sleep(wait)
+            try:
+                resp = await client.get(url, params=params, headers=headers, timeout=timeouts)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if attempt >= self.config.max_retries:
+                    raise
+                delay = self._backoff(attempt, None)
+                logging.warning(f"{self.config.name}: {type(e).__name__} on {url}, retrying in {delay:.2f}s")
+                add_to_span("retries")
+                await asyncio.sleep(delay)
+                continue
+
+            if resp.status_code in RETRY_STATUSES and attempt < self.config.max_retries:
+                delay = self._backoff(attempt, resp.headers.get("Retry-After"))
+                logging.warning(f"{self.config.name}: HTTP {resp.status_code} on {url}, retrying in {delay:.2f}s")
+                add_to_span("retries")
+                await asyncio.sleep(delay)
+                continue
+            set_span_attributes(status_code=resp.status_code, response_bytes=len(resp.content))
+            resp.raise_for_status()
+            return resp
+        raise AssertionError("unreachable")
+
+    async def aget_json(self, path: str, **kwargs: Any) -> Any:
+        """Async `get_json`, coalesced with other async callers."""
+        if not singleflight.enabled():
+            return (await self.aget(path, **kwargs)).json()
+
+        async def _fetch():
+            return (await self.aget(path, **kwargs)).json()
+
+        return await singleflight.get_single_flight().ado(self.flight_key(path, kwargs.get("params"), "async"), _fetch)
+
+
+_clients: Dict[str, ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider: str) -> ProviderClient:
+    """Shared client for "serpapi" or "railradar", created on first use."""
+    with _clients_lock:
+        client = _clients.get(provider)
+        if client is None:
+            client = _clients[provider] = ProviderClient(provider_configs()[provider])
+        return client
+
+
+# ---------------- Sync bridge ----------------
+
+_bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+_bridge_lock = threading.Lock()
+
+
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    global _bridge_loop
+    with _bridge_lock:
+        if _bridge_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tripmate-sync-bridge", daemon=True).start()
+            _bridge_loop = loop
+        return _bridge_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run `coro` to completion on the shared background loop and return its result.
+
+    Works from plain threads and from inside another event loop (the caller's
+    thread blocks meanwhile). The caller's contextvars (telemetry spans) carry over.
+    """
+    loop = _get_bridge_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync called from the sync bridge loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -0,0 +1,275 @@
+"""Response cache for model calls, attached to agents as ADK model callbacks.
+
+Code-resolution agents and the root router see the same requests again and
+again ("IATA code for Bangalore", the same first message of a templated
+query). `cache_agent_tree(root_agent)` gives every opted-in agent a
+before_model callback that answers a repeated request from the cache without
+calling the model, and an after_model callback that stores final responses.
+
+Requests are keyed on a hash of the model, system instruction, tool
+declarations, generation config and contents, normalized so that whitespace
+and ADK's per-call function-call ids do not split entries. Storage is
+pluggable (any object with the `ResponseCache` get/set/stats interface); the
+default is a `ResponseCache` (library/response_cache.py), i.e. a bounded LRU
+in memory in front of an SQLite file, with the agent name as the TTL engine.
+
+    TRIPMATE_MODEL_CACHE            "0" disables the cache (default on).
+    TRIPMATE_MODEL_CACHE_AGENTS     Opted-in agents and TTLs in seconds, e.g.
+                                    "AirportIATACodeAgent=604800,tripmate_agent=600"
+                                    (replaces DEFAULT_AGENT_TTLS).
+    TRIPMATE_MODEL_CACHE_PATH       SQLite file (default ~/.cache/tripmate/model_responses.sqlite3, "" = memory only).
+    TRIPMATE_MODEL_CACHE_MAX_MB     Disk cap in megabytes (default 32).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+from tripmate.library.response_cache import ResponseCache
+from tripmate.library.telemetry import add_to_span, close_model_span
+
+DEFAULT_MODEL_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tripmate", "model_responses.sqlite3")
+
+# Agents cached by default: code lookups change rarely, routing decisions are short-lived.
+DEFAULT_AGENT_TTLS = {
+    "AirportIATACodeAgent": 7 * 24 * 60 * 60,
+    "TrainStationCodeAgent": 7 * 24 * 60 * 60,
+    "tripmate_agent": 10 * 60,
+}
+
+_MAX_PENDING = 1024
+
+# Config fields that never change the model's answer.
+_IGNORED_CONFIG = {"system_instruction", "tools", "labels", "http_options"}
+
+
+def enabled() -> bool:
+    return os.getenv("TRIPMATE_MODEL_CACHE", "1") != "0"
+
+
+class CacheBackend(Protocol):
+    def get(self, engine: str, params: Dict[str, Any]) -> Optional[Any]: ...
+    def set(self, engine: str, params: Dict[str, Any], value: Any) -> None: ...
+    def stats(self) -> Dict[str, Any]: ...
+
+
+# ---------------- Keys ----------------
+
+def _dump(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        try:
+            return value.model_dump(mode="json", exclude_none=True)
+        except Exception:  # e.g. a response_schema given as a Python type
+            return repr(value)
+    return value
+
+
+def _part(part: Any) -> Any:
+    if part.text is not None:
+        return {"text": " ".join(part.text.split()), "thought": bool(part.thought)}
+    if part.function_call is not None:
+        return {"call": part.function_call.name, "args": part.function_call.args or {}}
+    if part.function_response is not None:
+        return {"response": part.function_response.name, "value": part.function_response.response or {}}
+    # Thought signatures differ on every call without changing the request
+    return part.model_dump(mode="json", exclude_none=True, exclude={"thought_signature"})
+
+
+def _text(instruction: Any) -> Any:
+    if instruction is None or isinstance(instruction, str):
+        return " ".join((instruction or "").split())
+    if hasattr(instruction, "parts"):
+        return [_part(p) for p in instruction.parts or []]
+    return _dump(instruction)
+
+
+def request_key(llm_request: Any) -> str:
+    """Stable hash of everything that determines the model's answer to `llm_request`."""
+    config = llm_request.config
+    payload = {
+        "model": llm_request.model,
+        "instruction": _text(getattr(config, "system_instruction", None)),
+        "tools": sorted(
+            (json.dumps(_dump(t), sort_keys=True, default=str) for t in getattr(config, "tools", None) or []),
+        ),
+        "config": {
+            k: _dump(getattr(config, k)) for k in type(config).model_fields
+            if k not in _IGNORED_CONFIG and getattr(config, k) is not None
+        } if config is not None else {},
+        "contents": [
+            {"role": c.role, "parts": [_part(p) for p in c.parts or []]}
+            for c in llm_request.contents or []
+        ],
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _cacheable(llm_response: Any) -> bool:
+    content = getattr(llm_response, "content", None)
+    return (
+        not getattr(llm_response, "partial", False)
+        and not getattr(llm_response, "error_code", None)
+        and content is not None
+        and bool(content.parts)
+    )
+
+
+# ---------------- Cache ----------------
+
+class ModelResponseCache:
+    """
+    Per-agent model response cache exposed as ADK before/after model callbacks.
+
+    Args:
+        backend: Storage; defaults to an in-memory ResponseCache.
+        agent_ttls: Opted-in agent name -> TTL in seconds. Other agents are never cached.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, agent_ttls: Optional[Dict[str, float]] = None):
+        self.agent_ttls = dict(DEFAULT_AGENT_TTLS if agent_ttls is None else agent_ttls)
+        self.backend = backend if backend is not None else ResponseCache(path=None, ttls=self.agent_ttls)
+        if isinstance(self.backend, ResponseCache):
+            self.backend.ttls.update(self.agent_ttls)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # (invocation id, agent name) -> key of the request awaiting its response; bounded
+        # because a failed model call never reaches after_model
+        self._pending: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def _count(self, agent: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(agent, {"hits": 0, "misses": 0, "stores": 0})
+            counts[outcome] += 1
+
+    def before_model(self, callback_context: Any, llm_request: Any) -> Optional[Any]:
+        """Return the cached response for a repeated request (skipping the model call), else None."""
+        agent = callback_context.agent_name
+        if agent not in self.agent_ttls:
+            return None
+        from google.adk.models.llm_response import LlmResponse
+        from google.genai import types
+
+        key = request_key(llm_request)
+        cached = self.backend.get(agent, {"request": key})
+        if cached is None:
+            self._count(agent, "misses")
+            add_to_span("cache_misses")
+            with self._lock:
+                self._pending[(callback_context.invocation_id, agent)] = key
+                while len(self._pending) > _MAX_PENDING:
+                    self._pending.popitem(last=False)
+            return None
+
+        self._count(agent, "hits")
+        add_to_span("cache_hits")
+        response = LlmResponse(
+            content=types.Content.model_validate(cached["content"]),
+            finish_reason=cached.get("finish_reason"),
+            model_version=cached.get("model_version"),
+            custom_metadata={"model_cache": "hit"},
+        )
+        # ADK skips after_model callbacks when a before_model callback answers
+        close_model_span(callback_context, response)
+        return response
+
+    def after_model(self, callback_context: Any, llm_response: Any) -> None:
+        """Store the final response of a request that missed; never alters the response."""
+        if getattr(llm_response, "partial", False):
+            return None
+        agent = callback_context.agent_name
+        with self._lock:
+            key = self._pending.pop((callback_context.invocation_id, agent), None)
+        if key is None or not _cacheable(llm_response):
+            return None
+        content = llm_response.content.model_dump(mode="json", exclude_none=True)
+        for part in content.get("parts", []):
+            # Fresh ids are assigned to function calls each time the response is used
+            part.get("function_call", {}).pop("id", None)
+            part.pop("thought_signature", None)
+        self.backend.set(agent, {"request": key}, {
+            "content": content,
+            "finish_reason": _dump(llm_response.finish_reason),
+            "model_version": llm_response.model_version,
+        })
+        self._count(agent, "stores")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, stores and hit rate per agent, plus the backend's own counters."""
+        with self._lock:
+            agents = {name: dict(counts) for name, counts in self._stats.items()}
+        for counts in agents.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return {"agents": agents, "backend": self.backend.stats()}
+
+
+def _append(existing: Any, callback: Callable) -> List[Callable]:
+    """Run our callback last, so it sees the request (and response) the agent's own callbacks produce."""
+    if existing is None:
+        return [callback]
+    existing = existing if isinstance(existing, list) else [existing]
+    return existing if callback in existing else [*existing, callback]
+
+
+def parse_agent_ttls(spec: str) -> Dict[str, float]:
+    """'Agent=ttl,Other=ttl' -> {"Agent": ttl, ...}; an entry without '=ttl' uses one hour."""
+    ttls = {}
+    for entry in spec.split(","):
+        name, _, ttl = entry.strip().partition("=")
+        if name:
+            try:
+                ttls[name] = float(ttl) if ttl else 3600.0
+            except ValueError:
+                logging.warning(f"Model cache: ignoring bad TTL for {name}: {ttl!r}")
+    return ttls
+
+
+_model_cache: Optional[ModelResponseCache] = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelResponseCache:
+    """Shared model response cache, created on first use from the TRIPMATE_MODEL_CACHE_* settings."""
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            spec = os.getenv("TRIPMATE_MODEL_CACHE_AGENTS")
+            agent_ttls = parse_agent_ttls(spec) if spec is not None else dict(DEFAULT_AGENT_TTLS)
+            backend = ResponseCache(
+                path=os.getenv("TRIPMATE_MODEL_CACHE_PATH", DEFAULT_MODEL_CACHE_PATH) or None,
+                ttls=agent_ttls,
+                max_disk_bytes=int(float(os.getenv("TRIPMATE_MODEL_CACHE_MAX_MB", "32")) * 1024 * 1024),
+            )
+            _model_cache = ModelResponseCache(backend, agent_ttls)
+        return _model_cache
+
+
+def cache_agent_tree(root: Any, cache: Optional[ModelResponseCache] = None) -> Any:
+    """
+    Attach the model cache callbacks to `root` and every agent under it (sub_agents
+    and AgentTool agents) that is opted in. Idempotent; returns `root`.
+    """
+    if not enabled():
+        return root
+    from google.adk.tools.agent_tool import AgentTool
+
+    cache = cache or get_model_cache()
+    seen = set()
+    pending = [root]
+    while pending:
+        agent = pending.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        if hasattr(agent, "before_model_callback"):
+            if agent.name in cache.agent_ttls:
+                agent.before_model_callback = _append(agent.before_model_callback, cache.before_model)
+                agent.after_model_callback = _append(agent.after_model_callback, cache.after_model)
+            pending.extend(t.agent for t in getattr(agent, "tools", []) if isinstance(t, AgentTool))
+        pending.extend(agent.sub_agents or [])
+    return root
@@ -0,0 +1,241 @@
+"""Normalization of SerpApi flight and hotel responses into compact records.
+
+Each provider entry is validated and coerced exactly once into a
+`__slots__` record. Records keep a reference to their raw entry (no copy),
+and the raw payload is only serialized when a caller asks for it with
+`include_raw=True`. Tools hand the records' dicts to their Pydantic output
+model in one batch `model_validate` call instead of building a model per
+entry.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def format_duration(minutes: int | None) -> str | None:
+    """Convert minutes into H:MM format (e.g., 70 → '1h 10m')."""
+    if minutes is None:
+        return None
+    try:
+        minutes = int(minutes)
+        hours, mins = divmod(minutes, 60)
+        if hours > 0:
+            return f"{hours}h {mins}m"
+        return f"{mins}m"
+    except Exception:
+        return None
+
+
+def _safe(d: Any, *keys: Any, default: Any = None) -> Any:
+    """Walk nested dicts/lists, returning `default` on any missing step."""
+    cur = d
+    for k in keys:
+        if isinstance(cur, dict):
+            if k not in cur:
+                return default
+        elif isinstance(cur, list) and isinstance(k, int):
+            if k >= len(cur):
+                return default
+        else:
+            return default
+        cur = cur[k]
+    return cur
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _str_list(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list):
+        return None
+    return [v for v in value if isinstance(v, str)]
+
+
+# ---------------- Flights ----------------
+
+class FlightSegment:
+    __slots__ = ("departure_airport", "arrival_airport", "departure_time", "arrival_time", "airline", "flight_number", "duration")
+
+    def __init__(self, seg: Dict[str, Any]):
+        dep = seg.get("departure_airport")
+        arr = seg.get("arrival_airport")
+        airline = seg.get("airline")
+        self.departure_airport = (dep.get("id") or dep.get("name")) if isinstance(dep, dict) else None
+        self.arrival_airport = (arr.get("id") or arr.get("name")) if isinstance(arr, dict) else None
+        self.departure_time = (dep.get("time") if isinstance(dep, dict) else None) or seg.get("departure_time")
+        self.arrival_time = (arr.get("time") if isinstance(arr, dict) else None) or seg.get("arrival_time")
+        self.airline = (airline.get("name") if isinstance(airline, dict) else airline) or None
+        self.flight_number = seg.get("flight_number") or None
+        self.duration = seg.get("duration")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class FlightRecord:
+    __slots__ = ("price", "currency", "airlines", "total_duration", "stops", "segments", "booking_token", "_raw")
+
+    def __init__(self, entry: Dict[str, Any], default_currency: Optional[str]):
+        # price extraction - can be int, str, or dict
+        price = None
+        currency_code = None
+        price_field = entry.get("price")
+        if isinstance(price_field, (int, float, str)):
+            price = _to_float(price_field)
+        elif isinstance(price_field, dict):
+            price = _to_float(price_field.get("total") or price_field.get("price") or price_field.get("value"))
+            currency_code = price_field.get("currency")
+        if price is None:
+            price = _to_float(entry.get("total_price"))
+
+        raw_segments = entry.get("flights") or entry.get("segments") or []
+        segments: Tuple[FlightSegment, ...] = tuple(
+            FlightSegment(seg) for seg in raw_segments if isinstance(seg, dict)
+        ) if isinstance(raw_segments, list) else ()
+
+        stops_field = entry.get("stops")
+        if isinstance(stops_field, (int, str)):
+            stops = _to_int(stops_field)
+        else:
+            # infer from segments
+            stops = max(0, len(segments) - 1) if segments else None
+
+        self.price = price
+        self.currency = currency_code or default_currency
+        self.airlines = tuple(dict.fromkeys(s.airline for s in segments if s.airline))  # unique preserving order
+        self.total_duration = format_duration(
+            entry.get("total_duration") or entry.get("duration") or entry.get("total_trip_duration")
+        )
+        self.stops = stops
+        self.segments = segments
+        self.booking_token = entry.get("booking_token") or _safe(entry, "booking_options", 0, "booking_token")
+        self._raw = entry
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        return self._raw
+
+    def to_dict(self, include_raw: bool = False) -> Dict[str, Any]:
+        return {
+            "price": self.price,
+            "currency": self.currency,
+            "airlines": list(self.airlines),
+            "total_duration": self.total_duration,
+            "stops": self.stops,
+            "segments": [s.to_dict() for s in self.segments] or None,
+            "booking_token": self.booking_token,
+            "raw": self._raw if include_raw else None,
+        }
+
+
+def flight_candidates(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """best_flights first (if present), then other_flights; 'flights' as a fallback shape."""
+    candidates: List[Dict[str, Any]] = []
+    for key in ("best_flights", "other_flights"):
+        if isinstance(data.get(key), list):
+            candidates.extend(data[key])
+    # some responses may include 'flights' or differently structured entries; be defensive
+    if not candidates and isinstance(data.get("flights"), list):
+        candidates.extend(data["flights"])
+    return candidates
+
+
+def normalize_flights(
+    data: Dict[str, Any],
+    currency: Optional[str] = None,
+    budget: Optional[float] = None,
+) -> List[FlightRecord]:
+    """
+    Parse a google_flights response into FlightRecords.
+
+    Results over `budget` are dropped; results with an unknown price are kept.
+    """
+    records = []
+    for entry in flight_candidates(data):
+        if not isinstance(entry, dict):
+            continue
+        record = FlightRecord(entry, currency)
+        if budget is not None and record.price is not None and record.price > budget:
+            continue
+        records.append(record)
+    return records
+
+
+# ---------------- Hotels ----------------
+
+class Rate:
+    __slots__ = ("lowest", "extracted_lowest")
+
+    def __init__(self, raw: Any):
+        raw = raw if isinstance(raw, dict) else {}
+        self.lowest = raw.get("lowest")
+        self.extracted_lowest = _to_float(raw.get("extracted_lowest"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"lowest": self.lowest, "extracted_lowest": self.extracted_lowest}
+
+
+class HotelRecord:
+    __slots__ = (
+        "name", "description", "link", "gps_coordinates", "check_in_time", "check_out_time",
+        "rate_per_night", "total_rate", "deal", "hotel_class", "overall_rating", "reviews",
+        "location_rating", "amenities", "excluded_amenities", "essential_info", "_raw",
+    )
+
+    def __init__(self, raw: Dict[str, Any]):
+        gps = raw.get("gps_coordinates")
+        lat = _to_float(gps.get("latitude")) if isinstance(gps, dict) else None
+        lng = _to_float(gps.get("longitude")) if isinstance(gps, dict) else None
+
+        self.name = raw["name"]
+        self.description = raw.get("description")
+        self.link = raw.get("link")
+        self.gps_coordinates = (lat, lng) if lat is not None and lng is not None else None
+        self.check_in_time = raw.get("check_in_time")
+        self.check_out_time = raw.get("check_out_time")
+        self.rate_per_night = Rate(raw["rate_per_night"]) if "rate_per_night" in raw else None
+        self.total_rate = Rate(raw["total_rate"]) if "total_rate" in raw else None
+        self.deal = raw.get("deal")
+        self.hotel_class = _to_int(raw.get("extracted_hotel_class"))
+        self.overall_rating = _to_float(raw.get("overall_rating"))
+        self.reviews = _to_int(raw.get("reviews"))
+        self.location_rating = _to_float(raw.get("location_rating"))
+        self.amenities = _str_list(raw.get("amenities"))
+        self.excluded_amenities = _str_list(raw.get("excluded_amenities"))
+        self.essential_info = _str_list(raw.get("essential_info"))
+        self._raw = raw
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        return self._raw
+
+    def to_dict(self, include_raw: bool = False) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        if self.gps_coordinates is not None:
+            out["gps_coordinates"] = {"latitude": self.gps_coordinates[0], "longitude": self.gps_coordinates[1]}
+        for key in ("rate_per_night", "total_rate"):
+            if out[key] is not None:
+                out[key] = out[key].to_dict()
+        out["rawSearchData"] = self._raw if include_raw else None
+        return out
+
+
+def normalize_hotels(properties: Iterable[Any]) -> List[HotelRecord]:
+    """Parse google_hotels `properties` into HotelRecords, skipping entries without a name."""
+    return [
+        HotelRecord(p) for p in properties
+        if isinstance(p, dict) and isinstance(p.get("name"), str)
+    ]
@@ -0,0 +1,309 @@
+"""Compact, token-budgeted projections of tool outputs for the model.
+
+Search tools return everything they parsed (segments, descriptions, amenity
+lists, ...). The model only needs a few fields of the best few results, so an
+after_tool_callback replaces each registered tool's output with a projection:
+
+- per-tool field whitelists (nested for objects and list items), with caps on
+  long strings and inner lists;
+- a top-N limit on the ranked result lists;
+- trailing results dropped until the projection fits a token budget.
+
+The full output is kept server-side under a short `result_handle`, scoped to
+the session, so a follow-up call (`tool_result_details`) can fetch the
+details of any result on demand.
+
+    TRIPMATE_TOOL_TOKEN_BUDGET   Approximate token budget per projected tool output (default 2000).
+    TRIPMATE_RESULT_TTL          Seconds a full result stays fetchable by handle (default 1800).
+    TRIPMATE_RESULT_MAX_ENTRIES  Full results kept in memory, least recently used evicted first (default 256).
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+# Rough size of a token in compact JSON; good enough to budget, no tokenizer needed.
+CHARS_PER_TOKEN = 4
+
+# Field shape: None keeps the value, an int caps a string's length or a list's
+# items, and a nested mapping projects an object (or each object in a list).
+Shape = Mapping[str, Union[None, int, "Shape"]]
+
+
+@dataclass(frozen=True)
+class ProjectionSpec:
+    """
+    How one tool's output is shown to the model.
+
+    Args:
+        fields: Whitelisted top-level fields and their shapes; other fields are dropped.
+        ranked: Top-level lists ordered best first; these are cut to top_n and then
+            shortened from the end to fit the token budget.
+        top_n: Results kept per ranked list before budgeting.
+        budget_tokens: Overrides TRIPMATE_TOOL_TOKEN_BUDGET for this tool.
+    """
+    fields: Shape
+    ranked: Tuple[str, ...] = ()
+    top_n: int = 10
+    budget_tokens: Optional[int] = None
+
+
+_SEGMENT = {"departure_airport": None, "arrival_airport": None, "departure_time": None, "arrival_time": None, "airline": None}
+_FLIGHT = {"price": None, "currency": None, "airlines": 3, "total_duration": None, "stops": None, "segments": _SEGMENT}
+_RATE = {"lowest": None}
+_HOTEL = {
+    "name": None, "description": 160, "link": None, "check_in_time": None, "check_out_time": None,
+    "rate_per_night": _RATE, "total_rate": _RATE, "deal": None, "hotel_class": None,
+    "overall_rating": None, "reviews": None, "location_rating": None, "amenities": 6,
+}
+_TRANSPORT_OPTION = {
+    "mode": None, "name": None, "departure": None, "arrival": None, "price": None, "currency": None,
+    "stops": None, "travel_minutes": None, "door_to_door_minutes": None,
+}
+
+_FLIGHTS_SPEC = ProjectionSpec(fields={"flights": _FLIGHT}, ranked=("flights",), top_n=8)
+_FLEXIBLE_SPEC = ProjectionSpec(
+    fields={
+        "calendar": None,
+        "cheapest_departure_date": None,
+        "best_options": {**_FLIGHT, "departure_date": None, "return_date": None},
+    },
+    ranked=("best_options",),
+    top_n=5,
+)
+_HOTELS_SPEC = ProjectionSpec(fields={"hotels": _HOTEL, "currency": None}, ranked=("hotels",), top_n=10)
+_TRAINS_SPEC = ProjectionSpec(
+    fields={"trains": {
+        "trainNumber": None, "trainName": None, "sourceStationCode": None, "destinationStationCode": None,
+        "departureTime": None, "departureDate": None, "arrivalTime": None, "arrivalDate": None,
+    }},
+    ranked=("trains",),
+    top_n=15,
+)
+_COMPARE_SPEC = ProjectionSpec(
+    fields={
+        "origin_airport": None, "destination_airport": None, "origin_station": None, "destination_station": None,
+        "options": _TRANSPORT_OPTION, "fastest": _TRANSPORT_OPTION, "cheapest": _TRANSPORT_OPTION, "errors": None,
+    },
+    ranked=("options",),
+    top_n=10,
+)
+
+# Tool name (as the model calls it) -> projection; tools not listed pass through unchanged.
+PROJECTIONS: Dict[str, ProjectionSpec] = {
+    "flights_search": _FLIGHTS_SPEC,
+    "flights_search_async": _FLIGHTS_SPEC,
+    "flights_search_flexible": _FLEXIBLE_SPEC,
+    "flights_search_flexible_async": _FLEXIBLE_SPEC,
+    "hotels_search": _HOTELS_SPEC,
+    "hotels_search_async": _HOTELS_SPEC,
+    "train_search": _TRAINS_SPEC,
+    "train_search_async": _TRAINS_SPEC,
+    "transport_compare": _COMPARE_SPEC,
+    "transport_compare_async": _COMPARE_SPEC,
+}
+
+
+def token_budget(spec: Optional[ProjectionSpec] = None) -> int:
+    if spec is not None and spec.budget_tokens:
+        return spec.budget_tokens
+    return int(os.getenv("TRIPMATE_TOOL_TOKEN_BUDGET", "2000"))
+
+
+def estimate_tokens(value: Any) -> int:
+    return -(-len(_compact(value)) // CHARS_PER_TOKEN)
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+# ---------------- Projection ----------------
+
+def _shape(value: Any, shape: Union[None, int, Shape]) -> Any:
+    if shape is None or value is None:
+        return value
+    if isinstance(shape, int):
+        if isinstance(value, str) and len(value) > shape:
+            return value[: shape - 1].rstrip() + "…"
+        if isinstance(value, list) and len(value) > shape:
+            return value[:shape]
+        return value
+    if isinstance(value, list):
+        return [_shape(v, shape) for v in value]
+    if isinstance(value, Mapping):
+        return {k: _shape(value[k], sub) for k, sub in shape.items() if value.get(k) is not None}
+    return value
+
+
+def fit_lists(document: Dict[str, Any], lists: Tuple[str, ...], budget: int) -> Dict[str, int]:
+    """
+    Drop trailing items of `lists` in `document` (in place) until it fits `budget`
+    tokens, always keeping each list's first item. Returns the items kept per list.
+
+    Item sizes are measured once, so this is one serialization pass, not one per drop.
+    """
+    present = [name for name in lists if isinstance(document.get(name), list)]
+    sizes = {name: [len(_compact(item)) + 1 for item in document[name]] for name in present}
+    kept = {name: len(sizes[name]) for name in present}
+    overhead = len(_compact({k: ([] if k in sizes else v) for k, v in document.items()}))
+    total = overhead + sum(sum(s) for s in sizes.values())
+    limit = budget * CHARS_PER_TOKEN
+    while total > limit:
+        # Shorten the list whose last kept item is largest
+        candidates = [name for name in present if kept[name] > 1]
+        if not candidates:
+            break
+        name = max(candidates, key=lambda n: sizes[n][kept[n] - 1])
+        kept[name] -= 1
+        total -= sizes[name][kept[name]]
+    for name in present:
+        del document[name][kept[name]:]
+    return kept
+
+
+def project(spec: ProjectionSpec, result: Mapping[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, int]]]:
+    """
+    Project `result` through `spec` within its token budget.
+
+    Returns:
+        The projected document and, per ranked list that was cut, {"shown": n, "total": m}.
+    """
+    projected = {k: _shape(result[k], shape) for k, shape in spec.fields.items() if result.get(k) is not None}
+    totals = {}
+    for name in spec.ranked:
+        items = projected.get(name)
+        if isinstance(items, list):
+            totals[name] = len(items)
+            projected[name] = items[:spec.top_n]
+    kept = fit_lists(projected, spec.ranked, token_budget(spec))
+    truncated = {name: {"shown": kept[name], "total": totals[name]} for name in kept if kept[name] < totals[name]}
+    return projected, truncated
+
+
+def _as_document(tool_response: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(tool_response, BaseModel):
+        return tool_response.model_dump(exclude_none=True)
+    if isinstance(tool_response, dict):
+        return tool_response
+    return None
+
+
+# ---------------- Full Results by Handle ----------------
+
+class ResultStore:
+    """
+    In-memory LRU/TTL store of full tool outputs, keyed by (session id, handle).
+
+    Args:
+        ttl: Seconds an entry stays fetchable.
+        max_entries: Cap on entries across all sessions.
+    """
+
+    def __init__(self, ttl: float = 1800, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str, Dict[str, Any], Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, tool_name: str, result: Dict[str, Any], shown: Dict[str, int]) -> str:
+        """Keep a full result and the number of items shown per ranked list; returns its handle."""
+        handle = uuid.uuid4().hex[:10]
+        with self._lock:
+            self._entries[(session_id, handle)] = (time.time() + self.ttl, tool_name, result, shown)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, session_id: str, handle: str) -> Optional[Tuple[str, Dict[str, Any], Dict[str, int]]]:
+        """(tool name, full result, items shown per list), or None if unknown or expired."""
+        key = (session_id, handle.strip())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2], entry[3]
+
+    def latest(self, session_id: str, tool_names: Tuple[str, ...]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """(handle, tool name, full result) of the session's most recently stored or fetched live result from `tool_names`."""
+        now = time.time()
+        with self._lock:
+            for (session, handle), (expires_at, tool_name, result, _) in reversed(self._entries.items()):
+                if session == session_id and tool_name in tool_names and expires_at >= now:
+                    return handle, tool_name, result
+        return None
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """
+    Shared store of full tool results, created on first use.
+
+    Configured through TRIPMATE_RESULT_TTL (seconds) and TRIPMATE_RESULT_MAX_ENTRIES.
+    """
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore(
+                ttl=float(os.getenv("TRIPMATE_RESULT_TTL", "1800")),
+                max_entries=int(os.getenv("TRIPMATE_RESULT_MAX_ENTRIES", "256")),
+            )
+        return _result_store
+
+
+# ---------------- ADK callback ----------------
+
+def project_tool_response(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> Optional[Dict[str, Any]]:
+    """
+    after_tool_callback: replace a registered tool's output with its projection.
+
+    The full output is stored under `result_handle`. Unregistered tools and
+    error responses pass through unchanged (returns None).
+    """
+    spec = PROJECTIONS.get(tool.name)
+    document = _as_document(tool_response) if spec is not None else None
+    if document is None or "error" in document:
+        return None
+
+    projected, truncated = project(spec, document)
+    shown = {name: len(projected[name]) for name in spec.ranked if isinstance(projected.get(name), list)}
+    projected["result_handle"] = get_result_store().put(tool_context.session.id, tool.name, document, shown)
+    if truncated:
+        projected["truncated"] = truncated
+    logging.debug(
+        f"Projected {tool.name}: ~{estimate_tokens(document)} -> ~{estimate_tokens(projected)} tokens, truncated={truncated}"
+    )
+    # Keep the shape ADK gives non-dict results, so the model sees the same structure
+    return projected if isinstance(tool_response, dict) else {"result": projected}
+
+
+def result_items(
+    result: Dict[str, Any],
+    list_name: str,
+    indices: List[int],
+    fields: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Full items of `result[list_name]` at `indices` (each tagged with its index), optionally limited to `fields`."""
+    items = result.get(list_name) or []
+    out = []
+    for index in indices:
+        if 0 <= index < len(items):
+            item = items[index]
+            if fields and isinstance(item, Mapping):
+                item = {k: item[k] for k in fields if k in item}
+            out.append({"index": index, **item} if isinstance(item, Mapping) else {"index": index, "value": item})
+    return out
@@ -0,0 +1,254 @@
+"""Persistent TTL/LRU cache for provider (SerpApi, RailRadar) JSON responses.
+
+Entries are keyed on the normalized request parameters with credentials
+stripped, so the same search by different users or sessions shares an entry.
+A small in-memory LRU sits in front of an SQLite file so entries survive
+restarts; both tiers are capped and evict least-recently-used entries first.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tripmate.library.telemetry import add_to_span
+
+# Parameters that never affect the response body and must not leak into keys.
+EXCLUDED_PARAMS = {"api_key", "x-api-key", "no_cache", "output"}
+
+# Time-to-live per engine, in seconds. Flight fares move faster than hotel rates.
+DEFAULT_TTLS = {
+    "google_flights": 15 * 60,
+    "google_hotels": 60 * 60,
+}
+DEFAULT_TTL = 30 * 60
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tripmate", "responses.sqlite3")
+
+
+def _normalize_value(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        # Opaque tokens (next_page_token, booking_token, ...) are case-sensitive.
+        return value if name.endswith("token") else value.casefold()
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def make_cache_key(engine: str, params: Dict[str, Any]) -> str:
+    """
+    Build a stable cache key from request parameters.
+
+    - Drops credentials and transport-only parameters (see EXCLUDED_PARAMS).
+    - Drops None values, trims/casefolds strings (except opaque tokens) and stringifies numbers so
+      `adults=2` and `adults="2"` hit the same entry.
+    """
+    normalized = {
+        k: _normalize_value(k, v)
+        for k, v in params.items()
+        if v is not None and k not in EXCLUDED_PARAMS
+    }
+    payload = json.dumps([engine, normalized], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier (memory + SQLite) response cache with per-engine TTL and LRU eviction.
+
+    Args:
+        path: SQLite file path. Use None to keep the cache in memory only.
+        ttls: Per-engine TTL overrides in seconds.
+        max_memory_entries: Cap on the in-memory LRU tier.
+        max_disk_bytes: Cap on the total payload size stored in SQLite.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        ttls: Optional[Dict[str, float]] = None,
+        max_memory_entries: int = 256,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0, "stores": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, engine TEXT NOT NULL, value BLOB NOT NULL,"
+                    " size INTEGER NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+            except sqlite3.Error as e:
+                logging.warning(f"Response cache falling back to memory only ({path}): {e}")
+                self._db = None
+
+    def ttl_for(self, engine: str) -> float:
+        return self.ttls.get(engine, DEFAULT_TTL)
+
+    # ---- Lookup ----
+
+    def get(self, engine: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached response for these parameters, or None on miss/expiry."""
+        key = make_cache_key(engine, params)
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                expires_at, value = hit
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, engine: str, params: Dict[str, Any], value: Any) -> None:
+        """Store a response under the normalized parameters with the engine's TTL."""
+        key = make_cache_key(engine, params)
+        now = time.time()
+        expires_at = now + self.ttl_for(engine)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                blob = json.dumps(value, separators=(",", ":")).encode("utf-8")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, engine, value, size, expires_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, engine, blob, len(blob), expires_at, now),
+                )
+                self._evict_disk()
+
+    def get_or_fetch(self, engine: str, params: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached response, or call `fetch()` and cache its result.
+
+        Responses carrying a top-level "error" field (SerpApi reports some
+        failures with HTTP 200) are returned but never cached.
+        """
+        cached = self.get(engine, params)
+        if cached is not None:
+            add_to_span("cache_hits")
+            return cached
+        add_to_span("cache_misses")
+        value = fetch()
+        if isinstance(value, dict) and "error" not in value:
+            self.set(engine, params, value)
+        return value
+
+    async def aget_or_fetch(self, engine: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async `get_or_fetch`: awaits `fetch()` on a miss; SQLite reads and writes run off the event loop."""
+        cached = await asyncio.to_thread(self.get, engine, params)
+        if cached is not None:
+            add_to_span("cache_hits")
+            return cached
+        add_to_span("cache_misses")
+        value = await fetch()
+        if isinstance(value, dict) and "error" not in value:
+            await asyncio.to_thread(self.set, engine, params, value)
+        return value
+
+    # ---- Maintenance ----
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._stats["evictions"] += 1
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the current hit rate and tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_serpapi_cache: Optional[ResponseCache] = None
+_serpapi_cache_lock = threading.Lock()
+
+
+def get_serpapi_cache() -> ResponseCache:
+    """
+    Shared cache for SerpApi responses, created on first use.
+
+    Configured through:
+        TRIPMATE_CACHE_PATH: SQLite file ("" keeps the cache in memory only).
+        TRIPMATE_CACHE_MAX_MB: Disk cap in megabytes.
+        TRIPMATE_CACHE_TTL_<ENGINE>: TTL override in seconds, e.g. TRIPMATE_CACHE_TTL_GOOGLE_FLIGHTS.
+    """
+    global _serpapi_cache
+    with _serpapi_cache_lock:
+        if _serpapi_cache is None:
+            ttls = {}
+            for engine in DEFAULT_TTLS:
+                override = os.getenv(f"TRIPMATE_CACHE_TTL_{engine.upper()}")
+                if override:
+                    ttls[engine] = float(override)
+            _serpapi_cache = ResponseCache(
+                path=os.getenv("TRIPMATE_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                ttls=ttls,
+                max_disk_bytes=int(float(os.getenv("TRIPMATE_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            )
+        return _serpapi_cache
@@ -0,0 +1,128 @@
+"""Request coalescing ("single flight") for identical in-flight provider calls.
+
+When many sessions run the same search at once (DEL->BOM tomorrow, hotels in
+Goa this weekend), only the first caller goes upstream; the others wait for
+that call and all receive its result (or its exception). Nothing is kept once
+the call finishes, so a result is never served after it completes: that is
+the response cache's job, with its own TTLs.
+
+A call is a `concurrent.futures.Future`, which threads wait on directly and
+coroutines await via `asyncio.wrap_future`. Callers that raise different
+exception types (the `requests` and `httpx` faces of library/http_client.py)
+must use different keys, so a waiter never receives an error it cannot catch.
+
+    TRIPMATE_SINGLEFLIGHT   "0" disables coalescing (default on).
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tripmate.library.telemetry import add_to_span
+
+
+def enabled() -> bool:
+    return os.getenv("TRIPMATE_SINGLEFLIGHT", "1") != "0"
+
+
+class _LeaderCancelled(Exception):
+    """Set on a call whose async leader was cancelled; waiting callers retry instead of failing."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def _join(self, key: str):
+        """(future, True) if the caller leads a new call for `key`, else the in-flight (future, False)."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = Future()
+            self._stats["executions"] += 1
+            return call, True
+
+    def _finish(self, key: str, call: Future, failed: bool = False) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if failed:
+                self._stats["errors"] += 1
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn()`, or wait for the identical call already in flight, and return its result.
+        A waiter that is still waiting after `timeout` seconds runs `fn()` itself (never hangs
+        on a leader that cannot finish, e.g. one that needs the thread it is blocking).
+        """
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                try:
+                    value = fn()
+                except BaseException as e:
+                    call.set_exception(e)
+                    self._finish(key, call, failed=True)
+                    raise
+                call.set_result(value)
+                self._finish(key, call)
+                return value
+            add_to_span("coalesced")
+            try:
+                return call.result(timeout=timeout)
+            except _LeaderCancelled:
+                continue
+            except FutureTimeout:
+                logging.warning(f"Single flight: gave up waiting {timeout}s for {key[:12]}, calling directly")
+                return fn()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async `do`: awaits `fn()` as the leader, or the in-flight call otherwise."""
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                try:
+                    value = await fn()
+                except BaseException as e:
+                    call.set_exception(_LeaderCancelled() if isinstance(e, asyncio.CancelledError) else e)
+                    self._finish(key, call, failed=True)
+                    raise
+                call.set_result(value)
+                self._finish(key, call)
+                return value
+            add_to_span("coalesced")
+            try:
+                # shield: a cancelled waiter must not cancel the shared call
+                return await asyncio.shield(asyncio.wrap_future(call))
+            except _LeaderCancelled:
+                continue
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters since start: calls, upstream executions, coalesced calls, failed executions."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalesced_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide single-flight table shared by every provider client."""
+    return _flight
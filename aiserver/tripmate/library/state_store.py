@@ -0,0 +1,411 @@
+"""Durable, delta-based store for the trip document kept in session state.
+
+Each top-level key in constants.TRIP_DOCUMENT_KEYS (user_profile, itinerary,
+booking, ...) is stored as its own row, and lists named in SPLIT_LISTS
+(`itinerary.days`) get one row per element. Row values live in a
+content-addressed blob table, so:
+
+- writing a key only touches the rows whose content changed, and
+  `set_path("$.itinerary.days[2].stays[0].cost", 120)` rewrites a single day;
+- reads can fetch just the subtree an agent needs (`get_path`, `load(keys=...)`);
+- a snapshot copies row -> blob references, not the trip itself, so
+  snapshot/restore cost is independent of the document size.
+
+Paths use the JSON-path subset `$.key.field[index]...`.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from tripmate.library import constants
+from tripmate.library.response_cache import DEFAULT_CACHE_PATH
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "state.sqlite3")
+
+# Top-level key -> list field stored as one row per element.
+SPLIT_LISTS = {
+    constants.ITIN_KEY: "days",
+}
+
+# Entry in a split key's base row holding the list length, so empty lists and gaps round-trip
+LENGTH_MARKER = "$length"
+
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_][\w\-]*)|\[(\d+)\]")
+
+PathTokens = List[Union[str, int]]
+
+
+def parse_path(path: str) -> PathTokens:
+    """Split `$.itinerary.days[2].stays[0].cost` into ["itinerary", "days", 2, "stays", 0, "cost"]."""
+    if not path.startswith("$"):
+        raise ValueError(f"JSON path must start with '$': {path}")
+    tokens: PathTokens = []
+    pos = 1
+    while pos < len(path):
+        match = _PATH_TOKEN.match(path, pos)
+        if match is None:
+            raise ValueError(f"Unsupported JSON path syntax at {path[pos:]!r} in {path}")
+        tokens.append(match.group(1) if match.group(1) is not None else int(match.group(2)))
+        pos = match.end()
+    if not tokens or not isinstance(tokens[0], str):
+        raise ValueError(f"JSON path must address a top-level key: {path}")
+    return tokens
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _element_chunk(key: str, field: str, index: int) -> str:
+    return f"{key}.{field}[{index}]"
+
+
+def _split(key: str, value: Any) -> Dict[str, str]:
+    """Row name -> serialized value for one top-level key."""
+    field = SPLIT_LISTS.get(key)
+    if field and isinstance(value, dict) and isinstance(value.get(field), list):
+        rest = {k: v for k, v in value.items() if k != field}
+        rest[LENGTH_MARKER] = len(value[field])
+        rows = {key: _dumps(rest)}
+        for index, element in enumerate(value[field]):
+            rows[_element_chunk(key, field, index)] = _dumps(element)
+        return rows
+    return {key: _dumps(value)}
+
+
+def _walk(value: Any, tokens: PathTokens) -> Any:
+    for token in tokens:
+        if isinstance(token, int):
+            if not isinstance(value, list) or token >= len(value):
+                raise KeyError(token)
+        elif not isinstance(value, dict):
+            raise KeyError(token)
+        value = value[token]
+    return value
+
+
+def _assign(root: Any, tokens: PathTokens, value: Any) -> Any:
+    """Set `value` at `tokens` inside `root` (creating objects on the way) and return the root."""
+    if not tokens:
+        return value
+    parent = root
+    for token, following in zip(tokens, tokens[1:]):
+        if isinstance(token, int):
+            child = parent[token]
+        else:
+            child = parent.get(token)
+            if child is None:
+                child = [] if isinstance(following, int) else {}
+                parent[token] = child
+        parent = child
+    last = tokens[-1]
+    if isinstance(last, int) and last == len(parent):
+        parent.append(value)
+    else:
+        parent[last] = value
+    return root
+
+
+class SessionStateStore:
+    """
+    SQLite store of per-session trip documents with row-level deltas and cheap snapshots.
+
+    Args:
+        path: SQLite file path, or None for an in-memory store.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_STATE_PATH):
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " session_id TEXT NOT NULL, key TEXT NOT NULL, chunk TEXT NOT NULL, hash TEXT NOT NULL,"
+            " updated_at REAL NOT NULL, PRIMARY KEY (session_id, chunk))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_key ON chunks(session_id, key)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " snapshot_id TEXT PRIMARY KEY, session_id TEXT NOT NULL, label TEXT, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot_chunks ("
+            " snapshot_id TEXT NOT NULL, key TEXT NOT NULL, chunk TEXT NOT NULL, hash TEXT NOT NULL,"
+            " PRIMARY KEY (snapshot_id, chunk))"
+        )
+        self._stats = {"rows_written": 0, "rows_unchanged": 0, "bytes_written": 0}
+
+    # ---- Writes ----
+
+    def _write_rows(self, session_id: str, key: str, rows: Dict[str, str], replace_key: bool) -> int:
+        """Write changed rows for one key inside the caller's transaction; returns rows written."""
+        existing = dict(self._db.execute(
+            "SELECT chunk, hash FROM chunks WHERE session_id = ? AND key = ?", (session_id, key)
+        ).fetchall())
+        now = time.time()
+        written = 0
+        for chunk, text in rows.items():
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if existing.get(chunk) == digest:
+                self._stats["rows_unchanged"] += 1
+                continue
+            self._db.execute("INSERT OR IGNORE INTO blobs (hash, value) VALUES (?, ?)", (digest, text))
+            self._db.execute(
+                "INSERT OR REPLACE INTO chunks (session_id, key, chunk, hash, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, key, chunk, digest, now),
+            )
+            written += 1
+            self._stats["bytes_written"] += len(text)
+        if replace_key:
+            for chunk in existing.keys() - rows.keys():
+                self._db.execute("DELETE FROM chunks WHERE session_id = ? AND chunk = ?", (session_id, chunk))
+                written += 1
+        self._stats["rows_written"] += written
+        return written
+
+    def put(self, session_id: str, key: str, value: Any) -> int:
+        """Store a whole top-level key; only rows whose content changed are written. Returns rows written."""
+        rows = _split(key, value)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                written = self._write_rows(session_id, key, rows, replace_key=True)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return written
+
+    def put_many(self, session_id: str, values: Dict[str, Any]) -> int:
+        """`put` several keys in one transaction."""
+        split = {key: _split(key, value) for key, value in values.items()}
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                written = sum(self._write_rows(session_id, key, rows, replace_key=True) for key, rows in split.items())
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return written
+
+    def set_path(self, session_id: str, path: str, value: Any) -> None:
+        """
+        Set one value by JSON path, rewriting only the row that holds it.
+
+        `$.itinerary.days[3]` with 3 == number of days appends a day; larger
+        indices raise KeyError. Paths that replace a whole split list
+        (`$.itinerary.days`) rewrite its rows.
+        """
+        tokens = parse_path(path)
+        key = tokens[0]
+        field = SPLIT_LISTS.get(key)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                replace_key = False
+                if field and len(tokens) >= 3 and tokens[1] == field and isinstance(tokens[2], int):
+                    # Inside one element of a split list: rewrite that element's row only
+                    chunk = _element_chunk(key, field, tokens[2])
+                    base = self._read_chunk(session_id, key)
+                    length = self._list_length(session_id, key, base)
+                    if tokens[2] > length or (len(tokens) > 3 and tokens[2] == length):
+                        raise KeyError(f"{path}: {field} has {length} elements")
+                    current = self._read_chunk(session_id, chunk) if len(tokens) > 3 else None
+                    if len(tokens) > 3 and current is None:
+                        raise KeyError(path)
+                    rows = {chunk: _dumps(_assign(current, tokens[3:], value))}
+                    if tokens[2] == length:
+                        # Appending: the base row records the new length
+                        base = base if isinstance(base, dict) else {}
+                        rows[key] = _dumps({**base, LENGTH_MARKER: length + 1})
+                elif len(tokens) == 1 or (field and tokens[1] == field):
+                    # The whole key or a whole split list
+                    document = self._read_key(session_id, key) if len(tokens) > 1 else None
+                    rows = _split(key, _assign(document if document is not None else {}, tokens[1:], value))
+                    replace_key = True
+                else:
+                    current = self._read_chunk(session_id, key)
+                    rows = {key: _dumps(_assign(current if current is not None else {}, tokens[1:], value))}
+                self._write_rows(session_id, key, rows, replace_key=replace_key)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM chunks WHERE session_id = ? AND key = ?", (session_id, key))
+
+    def delete_session(self, session_id: str) -> None:
+        """Drop a session's rows and snapshots (blobs are reclaimed by `gc`)."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM chunks WHERE session_id = ?", (session_id,))
+            self._db.execute(
+                "DELETE FROM snapshot_chunks WHERE snapshot_id IN (SELECT snapshot_id FROM snapshots WHERE session_id = ?)",
+                (session_id,),
+            )
+            self._db.execute("DELETE FROM snapshots WHERE session_id = ?", (session_id,))
+            self._db.execute("COMMIT")
+
+    # ---- Reads ----
+
+    def _read_chunk(self, session_id: str, chunk: str) -> Any:
+        row = self._db.execute(
+            "SELECT b.value FROM chunks c JOIN blobs b ON b.hash = c.hash WHERE c.session_id = ? AND c.chunk = ?",
+            (session_id, chunk),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _read_key(self, session_id: str, key: str) -> Any:
+        rows = self._db.execute(
+            "SELECT c.chunk, b.value FROM chunks c JOIN blobs b ON b.hash = c.hash WHERE c.session_id = ? AND c.key = ?",
+            (session_id, key),
+        ).fetchall()
+        if not rows:
+            return None
+        field = SPLIT_LISTS.get(key)
+        document: Any = None
+        elements: List[Tuple[int, Any]] = []
+        for chunk, text in rows:
+            if chunk == key:
+                document = json.loads(text)
+            else:
+                elements.append((int(chunk[chunk.rindex("[") + 1:-1]), json.loads(text)))
+        if field and isinstance(document, dict) and LENGTH_MARKER in document:
+            length = document.pop(LENGTH_MARKER)
+            by_index = dict(elements)
+            document[field] = [by_index[index] for index in range(length) if index in by_index]
+        elif field and elements:
+            # Rows written before the base row recorded the length
+            document = document if isinstance(document, dict) else {}
+            document[field] = [element for _, element in sorted(elements, key=lambda e: e[0])]
+        return document
+
+    def _list_length(self, session_id: str, key: str, base: Any) -> int:
+        """Length of a split list, from its base row or (older rows) by counting element rows."""
+        if isinstance(base, dict) and LENGTH_MARKER in base:
+            return base[LENGTH_MARKER]
+        return self._db.execute(
+            "SELECT COUNT(*) FROM chunks WHERE session_id = ? AND key = ? AND chunk != ?", (session_id, key, key)
+        ).fetchone()[0]
+
+    def get(self, session_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._read_key(session_id, key)
+        return default if value is None else value
+
+    def get_path(self, session_id: str, path: str, default: Any = None) -> Any:
+        """Value at a JSON path, reading only the row(s) that hold it."""
+        tokens = parse_path(path)
+        key = tokens[0]
+        field = SPLIT_LISTS.get(key)
+        with self._lock:
+            if field and len(tokens) >= 3 and tokens[1] == field and isinstance(tokens[2], int):
+                root, inner = self._read_chunk(session_id, _element_chunk(key, field, tokens[2])), tokens[3:]
+            elif len(tokens) == 1 or (field and tokens[1] == field):
+                root, inner = self._read_key(session_id, key), tokens[1:]
+            else:
+                root, inner = self._read_chunk(session_id, key), tokens[1:]
+        if root is None:
+            return default
+        try:
+            return _walk(root, inner)
+        except (KeyError, IndexError, TypeError):
+            return default
+
+    def load(self, session_id: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """The stored top-level keys of a session, or only `keys` when given."""
+        with self._lock:
+            if keys is None:
+                keys = [row[0] for row in self._db.execute(
+                    "SELECT DISTINCT key FROM chunks WHERE session_id = ?", (session_id,)
+                )]
+            document = {}
+            for key in keys:
+                value = self._read_key(session_id, key)
+                if value is not None:
+                    document[key] = value
+        return document
+
+    # ---- Snapshots ----
+
+    def snapshot(self, session_id: str, label: Optional[str] = None) -> str:
+        """Record the session's current rows; returns the snapshot id."""
+        snapshot_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO snapshots (snapshot_id, session_id, label, created_at) VALUES (?, ?, ?, ?)",
+                (snapshot_id, session_id, label, time.time()),
+            )
+            self._db.execute(
+                "INSERT INTO snapshot_chunks (snapshot_id, key, chunk, hash)"
+                " SELECT ?, key, chunk, hash FROM chunks WHERE session_id = ?",
+                (snapshot_id, session_id),
+            )
+            self._db.execute("COMMIT")
+        return snapshot_id
+
+    def restore(self, session_id: str, snapshot_id: str) -> None:
+        """Replace the session's rows with a snapshot (of this or another session)."""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM snapshots WHERE snapshot_id = ?", (snapshot_id,)).fetchone() is None:
+                raise KeyError(f"Unknown snapshot: {snapshot_id}")
+            now = time.time()
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM chunks WHERE session_id = ?", (session_id,))
+            self._db.execute(
+                "INSERT INTO chunks (session_id, key, chunk, hash, updated_at)"
+                " SELECT ?, key, chunk, hash, ? FROM snapshot_chunks WHERE snapshot_id = ?",
+                (session_id, now, snapshot_id),
+            )
+            self._db.execute("COMMIT")
+
+    def snapshots(self, session_id: str) -> List[Dict[str, Any]]:
+        rows = self._db.execute(
+            "SELECT snapshot_id, label, created_at FROM snapshots WHERE session_id = ? ORDER BY created_at",
+            (session_id,),
+        ).fetchall()
+        return [{"snapshot_id": r[0], "label": r[1], "created_at": r[2]} for r in rows]
+
+    # ---- Maintenance ----
+
+    def gc(self) -> int:
+        """Delete blobs no session or snapshot references; returns the number removed."""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM blobs WHERE hash NOT IN"
+                " (SELECT hash FROM chunks UNION SELECT hash FROM snapshot_chunks)"
+            )
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rows"] = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            stats["blobs"] = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return stats
+
+
+_store: Optional[SessionStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> SessionStateStore:
+    """Shared store, created on first use at TRIPMATE_STATE_PATH ("" = in-memory)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStateStore(path=os.getenv("TRIPMATE_STATE_PATH", DEFAULT_STATE_PATH) or None)
+        return _store
@@ -0,0 +1,514 @@
+"""Lightweight span instrumentation for the agent tree, its tools and provider calls.
+
+`instrument_agent_tree(root_agent)` attaches ADK before/after callbacks to
+every agent reachable from the root (sub-agents and the agents behind
+`AgentTool`s) and records one span per agent run, model call and tool call.
+Library code adds its own spans (`span(...)`) and counters on the active
+span (`add_to_span(...)`), e.g. provider HTTP requests and cache hits.
+
+Finished spans are aggregated into in-process metrics rendered in the
+Prometheus text format, optionally served on a local port, and, when a trace
+path is set, appended to a local JSON-lines file. No external collector is
+needed.
+
+    TRIPMATE_TELEMETRY         "0" disables instrumentation (default on).
+    TRIPMATE_TRACE_PATH        Append every span to this JSON-lines file (default off; the file is
+                               never rotated, so set it for profiling runs, not long-lived servers).
+    TRIPMATE_METRICS_PORT      Serve GET /metrics on 127.0.0.1:<port> (default off).
+    TRIPMATE_TELEMETRY_IDLE_S  Close the spans of invocations idle this long, in seconds (default 600).
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Latency histogram buckets, in seconds (LLM calls and provider searches run to tens of seconds).
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+# Numeric span attributes that are also exported as Prometheus counters.
+COUNTED_ATTRIBUTES = (
+    "cache_hits", "cache_misses", "request_bytes", "response_bytes",
+    "prompt_tokens", "completion_tokens", "cached_tokens", "retries", "coalesced", "fast_path",
+)
+
+
+def enabled() -> bool:
+    return os.getenv("TRIPMATE_TELEMETRY", "1") != "0"
+
+
+@dataclass
+class Span:
+    kind: str  # agent | model | tool | agent_tool | http | <custom>
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        out.pop("_t0")
+        return out
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("tripmate_span", default=None)
+_attr_lock = threading.Lock()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_to_span(key: str, amount: float = 1) -> None:
+    """Increment a numeric attribute on the active span, if any (safe across worker threads)."""
+    active = _current.get()
+    if active is not None:
+        with _attr_lock:
+            active.attributes[key] = active.attributes.get(key, 0) + amount
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Set attributes on the active span, if any."""
+    active = _current.get()
+    if active is not None:
+        with _attr_lock:
+            active.attributes.update(attributes)
+
+
+def start_span(
+    kind: str,
+    name: str,
+    trace_id: Optional[str] = None,
+    parent: Optional[Span] = None,
+    **attributes: Any,
+) -> Tuple[Span, contextvars.Token]:
+    """Open a span as a child of `parent` (default: the active span) and make it active. Pair with `end_span`."""
+    parent = parent or _current.get()
+    new = Span(
+        kind=kind,
+        name=name,
+        trace_id=trace_id or (parent.trace_id if parent else uuid.uuid4().hex),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    return new, _current.set(new)
+
+
+def end_span(
+    active: Span,
+    token: Optional[contextvars.Token] = None,
+    status: Optional[str] = None,
+    end: Optional[float] = None,
+    **attributes: Any,
+) -> None:
+    """Close a span (at `end`, a perf_counter value, default now), restore its parent as the active span and export it."""
+    active.duration_ms = round(((end or time.perf_counter()) - active._t0) * 1000, 3)
+    if status:
+        active.status = status
+    if attributes:
+        active.attributes.update(attributes)
+    if token is not None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Closed from a different context than it was opened in (e.g. an ADK
+            # callback pair spanning tasks); the opening context's value is unaffected.
+            pass
+    _exporter.export(active)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """`with span("http", "serpapi /search"):` — records duration and error status."""
+    if not enabled():
+        yield None
+        return
+    active, token = start_span(kind, name, **attributes)
+    try:
+        yield active
+    except BaseException as e:
+        end_span(active, token, status="error", error=type(e).__name__)
+        raise
+    end_span(active, token)
+
+
+def payload_size(value: Any) -> int:
+    """Approximate serialized size, in bytes, of a tool argument or response."""
+    try:
+        if isinstance(value, BaseModel):
+            return len(value.model_dump_json(exclude_none=True))
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+# ---------------- Export: JSON lines + Prometheus text ----------------
+
+class _Exporter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_path: Optional[str] = None
+        # (metric, labels) -> value; histogram buckets are kept per (kind, name, status)
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+
+    def _open(self) -> None:
+        path = os.getenv("TRIPMATE_TRACE_PATH", "")
+        if path == self._file_path:
+            return
+        if self._file:
+            self._file.close()
+        self._file, self._file_path = None, path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def export(self, finished: Span) -> None:
+        line = json.dumps(finished.to_dict(), default=str, separators=(",", ":"))
+        labels = (("kind", finished.kind), ("name", finished.name), ("status", finished.status))
+        with self._lock:
+            try:
+                self._open()
+                if self._file:
+                    self._file.write(line + "\n")
+            except OSError as e:
+                logging.warning(f"Telemetry: cannot write span log: {e}")
+
+            # histogram: bucket counts..., +Inf count, sum
+            hist = self._histograms.setdefault(labels, [0.0] * (len(DURATION_BUCKETS) + 2))
+            seconds = (finished.duration_ms or 0) / 1000
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += seconds
+
+            base = (("kind", finished.kind), ("name", finished.name))
+            for attr in COUNTED_ATTRIBUTES:
+                value = finished.attributes.get(attr)
+                if isinstance(value, (int, float)) and value:
+                    key = (f"tripmate_{attr}_total", base)
+                    self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        def _labels(pairs) -> str:
+            def _escape(v: Any) -> str:
+                return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+        lines = [
+            "# HELP tripmate_span_duration_seconds Duration of agent, model, tool and provider spans.",
+            "# TYPE tripmate_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for labels, hist in sorted(self._histograms.items()):
+                for bound, count in zip(DURATION_BUCKETS, hist):
+                    lines.append(f'tripmate_span_duration_seconds_bucket{{{_labels(labels)},le="{bound}"}} {count:g}')
+                lines.append(f'tripmate_span_duration_seconds_bucket{{{_labels(labels)},le="+Inf"}} {hist[-2]:g}')
+                lines.append(f"tripmate_span_duration_seconds_count{{{_labels(labels)}}} {hist[-2]:g}")
+                lines.append(f"tripmate_span_duration_seconds_sum{{{_labels(labels)}}} {hist[-1]:.6f}")
+            seen = set()
+            for (metric, labels), value in sorted(self._counters.items()):
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} counter")
+                    seen.add(metric)
+                lines.append(f"{metric}{{{_labels(labels)}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_exporter = _Exporter()
+
+
+def render_prometheus() -> str:
+    """All metrics recorded so far, in the Prometheus text exposition format."""
+    return _exporter.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serve GET /metrics on a daemon thread; returns None if the port is unavailable."""
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+    try:
+        _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logging.warning(f"Telemetry: metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    _metrics_server.daemon_threads = True
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    logging.info(f"Telemetry: serving Prometheus metrics on http://{host}:{port}/metrics")
+    return _metrics_server
+
+
+# ---------------- ADK callbacks ----------------
+
+# Spans opened in a before_* callback, closed by the matching after_* callback.
+_open_spans: Dict[Tuple[str, ...], List[Tuple[Span, contextvars.Token]]] = {}
+_open_lock = threading.Lock()
+# agent name -> parent agent name, filled by instrument_agent_tree
+_parent_agents: Dict[str, str] = {}
+# session id -> its latest invocation id (oldest first); invocation id -> perf_counter of its last closed span
+_session_invocations: "OrderedDict[str, str]" = OrderedDict()
+_invocation_last_end: Dict[str, float] = {}
+_MAX_SESSIONS = 10_000
+# A session's last turn is only finished by its next turn; idle invocations are swept instead.
+_IDLE_SECONDS = float(os.getenv("TRIPMATE_TELEMETRY_IDLE_S", "600"))
+_SWEEP_EVERY = 30.0
+_last_sweep = 0.0
+
+
+def _push(key: Tuple[str, ...], kind: str, name: str, trace_id: str, parent: Optional[Span] = None, **attributes: Any) -> None:
+    opened = start_span(kind, name, trace_id=trace_id, parent=parent, **attributes)
+    with _open_lock:
+        _open_spans.setdefault(key, []).append(opened)
+
+
+def _pop(key: Tuple[str, ...], status: Optional[str] = None, **attributes: Any) -> None:
+    with _open_lock:
+        stack = _open_spans.get(key)
+        if not stack:
+            return
+        opened, token = stack.pop()
+        if not stack:
+            del _open_spans[key]
+        _invocation_last_end[key[1]] = time.perf_counter()
+    end_span(opened, token, status=status, **attributes)
+
+
+def _finish_invocation(invocation_id: str) -> None:
+    """
+    Close spans an invocation left open. ADK skips after_agent callbacks when an
+    agent transfers control or the invocation ends early, so those agent spans
+    are closed here, at the end of the invocation's last recorded span.
+    """
+    with _open_lock:
+        leftovers = [(k, stack) for k, stack in _open_spans.items() if k[1] == invocation_id]
+        for key, _ in leftovers:
+            del _open_spans[key]
+        end = _invocation_last_end.pop(invocation_id, None)
+    for _, stack in leftovers:
+        for opened, _ in reversed(stack):
+            end_span(opened, end=max(end or 0.0, opened._t0), closed_by="invocation_end")
+
+
+def sweep_idle_invocations(idle_seconds: float = _IDLE_SECONDS, now: Optional[float] = None) -> int:
+    """
+    Finish invocations with no span opened or closed for `idle_seconds` (their run is over:
+    agent spans left open by a transfer, bookkeeping of a session's last turn). Returns how many.
+    """
+    now = time.perf_counter() if now is None else now
+    with _open_lock:
+        activity = dict(_invocation_last_end)
+        for key, stack in _open_spans.items():
+            started = max(opened._t0 for opened, _ in stack)
+            activity[key[1]] = max(activity.get(key[1], 0.0), started)
+        idle = {invocation for invocation, last in activity.items() if now - last > idle_seconds}
+        for session_id in [s for s, invocation in _session_invocations.items() if invocation in idle]:
+            del _session_invocations[session_id]
+    for invocation_id in idle:
+        _finish_invocation(invocation_id)
+    return len(idle)
+
+
+def _maybe_sweep() -> None:
+    global _last_sweep
+    now = time.perf_counter()
+    if now - _last_sweep < _SWEEP_EVERY:
+        return
+    _last_sweep = now
+    sweep_idle_invocations(now=now)
+
+
+def finish_open_spans() -> None:
+    """Close every span still open (e.g. at shutdown or at the end of a load test)."""
+    with _open_lock:
+        invocations = {key[1] for key in _open_spans}
+        _session_invocations.clear()
+    for invocation_id in invocations:
+        _finish_invocation(invocation_id)
+
+
+def _agent_key(callback_context: Any) -> Tuple[str, ...]:
+    return ("agent", callback_context.invocation_id, callback_context.agent_name)
+
+
+def _model_key(callback_context: Any) -> Tuple[str, ...]:
+    return ("model", callback_context.invocation_id, callback_context.agent_name)
+
+
+def _tool_key(tool_context: Any) -> Tuple[str, ...]:
+    return ("tool", tool_context.invocation_id, tool_context.function_call_id or "")
+
+
+def _before_agent(callback_context: Any) -> None:
+    invocation_id = callback_context.invocation_id
+    session_id = callback_context.session.id
+    evicted = []
+    with _open_lock:
+        previous = _session_invocations.get(session_id)
+        if previous != invocation_id:
+            # A new turn in this session: the previous turn's invocation is over.
+            _session_invocations[session_id] = invocation_id
+            if previous:
+                evicted.append(previous)
+        _session_invocations.move_to_end(session_id)
+        while len(_session_invocations) > _MAX_SESSIONS:
+            evicted.append(_session_invocations.popitem(last=False)[1])
+    for finished in evicted:
+        _finish_invocation(finished)
+    _maybe_sweep()
+
+    # Agent transfers run the sub-agent outside the parent's context, so link it explicitly.
+    parent = None
+    parent_name = _parent_agents.get(callback_context.agent_name)
+    if parent_name:
+        with _open_lock:
+            stack = _open_spans.get(("agent", invocation_id, parent_name))
+            parent = stack[-1][0] if stack else None
+    _push(_agent_key(callback_context), "agent", callback_context.agent_name, invocation_id, parent=parent)
+
+
+def _after_agent(callback_context: Any) -> None:
+    _pop(_agent_key(callback_context))
+
+
+def _before_model(callback_context: Any, llm_request: Any) -> None:
+    contents = getattr(llm_request, "contents", None) or []
+    _push(
+        _model_key(callback_context), "model", callback_context.agent_name, callback_context.invocation_id,
+        model=getattr(llm_request, "model", None),
+        request_bytes=sum(len(c.model_dump_json(exclude_none=True)) for c in contents),
+        turns=len(contents),
+    )
+
+
+def _after_model(callback_context: Any, llm_response: Any) -> None:
+    if getattr(llm_response, "partial", False):
+        return None  # streaming chunk; the span closes on the final response
+    usage = getattr(llm_response, "usage_metadata", None)
+    attributes: Dict[str, Any] = {}
+    if usage is not None:
+        attributes = {
+            "prompt_tokens": usage.prompt_token_count or 0,
+            "completion_tokens": usage.candidates_token_count or 0,
+            "cached_tokens": usage.cached_content_token_count or 0,
+            "total_tokens": usage.total_token_count or 0,
+        }
+    content = getattr(llm_response, "content", None)
+    if content is not None:
+        attributes["response_bytes"] = len(content.model_dump_json(exclude_none=True))
+        attributes["function_calls"] = [p.function_call.name for p in content.parts or [] if p.function_call]
+    error = getattr(llm_response, "error_code", None)
+    if error:
+        attributes["error"] = error
+    _pop(_model_key(callback_context), status="error" if error else None, **attributes)
+    return None
+
+
+def close_model_span(callback_context: Any, llm_response: Any) -> None:
+    """Close the model span for a response produced without calling the model (e.g. a cache hit)."""
+    _after_model(callback_context, llm_response)
+
+
+def _on_model_error(callback_context: Any, llm_request: Any, error: Exception) -> None:
+    _pop(_model_key(callback_context), status="error", error=type(error).__name__)
+    return None
+
+
+def _before_tool(tool: Any, args: Dict[str, Any], tool_context: Any) -> None:
+    from google.adk.tools.agent_tool import AgentTool
+
+    kind = "agent_tool" if isinstance(tool, AgentTool) else "tool"
+    _push(_tool_key(tool_context), kind, tool.name, tool_context.invocation_id, request_bytes=payload_size(args))
+    return None
+
+
+def _after_tool(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> None:
+    failed = isinstance(tool_response, dict) and "error" in tool_response
+    _pop(_tool_key(tool_context), status="error" if failed else None, response_bytes=payload_size(tool_response))
+    return None
+
+
+def _on_tool_error(tool: Any, args: Dict[str, Any], tool_context: Any, error: Exception) -> None:
+    _pop(_tool_key(tool_context), status="error", error=type(error).__name__)
+    return None
+
+
+def _prepend(existing: Any, callback: Callable) -> List[Callable]:
+    """Run our callback first; it always returns None so the agent's own callbacks still decide."""
+    if existing is None:
+        return [callback]
+    existing = existing if isinstance(existing, list) else [existing]
+    return existing if callback in existing else [callback, *existing]
+
+
+def instrument_agent_tree(root: Any) -> Any:
+    """
+    Attach span callbacks to `root` and every agent under it (sub_agents and
+    AgentTool agents). Idempotent; returns `root`. Starts the metrics endpoint
+    when TRIPMATE_METRICS_PORT is set.
+    """
+    if not enabled():
+        return root
+    from google.adk.tools.agent_tool import AgentTool
+
+    seen = set()
+    pending = [root]
+    while pending:
+        agent = pending.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        agent.before_agent_callback = _prepend(agent.before_agent_callback, _before_agent)
+        agent.after_agent_callback = _prepend(agent.after_agent_callback, _after_agent)
+        if hasattr(agent, "before_model_callback"):
+            agent.before_model_callback = _prepend(agent.before_model_callback, _before_model)
+            agent.after_model_callback = _prepend(agent.after_model_callback, _after_model)
+            agent.on_model_error_callback = _prepend(agent.on_model_error_callback, _on_model_error)
+            agent.before_tool_callback = _prepend(agent.before_tool_callback, _before_tool)
+            agent.after_tool_callback = _prepend(agent.after_tool_callback, _after_tool)
+            agent.on_tool_error_callback = _prepend(agent.on_tool_error_callback, _on_tool_error)
+            pending.extend(t.agent for t in getattr(agent, "tools", []) if isinstance(t, AgentTool))
+        for sub_agent in agent.sub_agents or []:
+            _parent_agents[sub_agent.name] = agent.name
+            pending.append(sub_agent)
+
+    port = os.getenv("TRIPMATE_METRICS_PORT")
+    if port:
+        start_metrics_server(int(port))
+    return root
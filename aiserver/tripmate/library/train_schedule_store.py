@@ -0,0 +1,190 @@
+"""Persistent RailRadar schedule store with a station -> (train, stop) index.
+
+Timetables change rarely, so each train's route, `journeyDay`s and
+`availableStartDates` are kept in SQLite and refreshed only once they are
+stale or no longer cover the requested journey date. The result of every
+`/trains/between` call is stored too, so a repeated origin/destination pair
+is answered entirely from disk. The in-memory inverted index over cached
+routes answers "which cached trains run X before Y" without touching the
+network.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from tripmate.library.response_cache import DEFAULT_CACHE_PATH
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "railradar.sqlite3")
+
+SCHEDULE_MAX_AGE = float(os.getenv("RAILRADAR_SCHEDULE_TTL_DAYS", "7")) * 86400
+PAIR_MAX_AGE = float(os.getenv("RAILRADAR_PAIR_TTL_DAYS", "3")) * 86400
+
+
+def _compact_schedule(sched_data: Dict[str, Any], train_name: Optional[str] = None) -> Dict[str, Any]:
+    """Keep only the fields train_search needs, in RailRadar's own shape."""
+    route = []
+    for stop in sched_data.get("route") or []:
+        schedule = stop.get("schedule") or {}
+        route.append({
+            "station": {"code": (stop.get("station") or {}).get("code")},
+            "journeyDay": stop.get("journeyDay", 1),
+            "schedule": {"arrival": schedule.get("arrival"), "departure": schedule.get("departure")},
+        })
+    return {
+        "trainName": train_name or sched_data.get("trainName"),
+        "route": route,
+        "availableStartDates": list(sched_data.get("availableStartDates") or []),
+    }
+
+
+def _last_start_date(sched_data: Dict[str, Any]) -> Optional[datetime]:
+    dates = []
+    for d in sched_data.get("availableStartDates") or []:
+        try:
+            dates.append(datetime.strptime(d, "%d-%b-%Y"))
+        except ValueError:
+            continue
+    return max(dates) if dates else None
+
+
+class TrainScheduleStore:
+    """
+    SQLite-backed schedule/pair store plus an in-memory inverted station index.
+
+    Args:
+        path: SQLite file path, or None for an in-memory store.
+        schedule_max_age: Seconds before a cached schedule is refreshed.
+        pair_max_age: Seconds before a cached `/trains/between` result is refreshed.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_STORE_PATH,
+        schedule_max_age: float = SCHEDULE_MAX_AGE,
+        pair_max_age: float = PAIR_MAX_AGE,
+    ):
+        self.schedule_max_age = schedule_max_age
+        self.pair_max_age = pair_max_age
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS schedules ("
+            " train_number TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pairs ("
+            " origin TEXT NOT NULL, destination TEXT NOT NULL, trains TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, PRIMARY KEY (origin, destination))"
+        )
+
+        # In-memory view of cached schedules and the station -> [(train, stop index)] index.
+        self._schedules: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._station_index: Dict[str, List[Tuple[str, int]]] = {}
+        for train_number, data, fetched_at in self._db.execute("SELECT train_number, data, fetched_at FROM schedules"):
+            self._index_schedule(train_number, json.loads(data), fetched_at)
+
+    # ---- Schedules ----
+
+    def _index_schedule(self, train_number: str, sched_data: Dict[str, Any], fetched_at: float) -> None:
+        previous = self._schedules.get(train_number)
+        if previous is not None:
+            for stop in previous[1]["route"]:
+                postings = self._station_index.get(stop["station"]["code"], [])
+                postings[:] = [p for p in postings if p[0] != train_number]
+        self._schedules[train_number] = (fetched_at, sched_data)
+        for stop_idx, stop in enumerate(sched_data["route"]):
+            code = stop["station"]["code"]
+            if code:
+                self._station_index.setdefault(code, []).append((train_number, stop_idx))
+
+    def put_schedule(self, train_number: str, sched_data: Dict[str, Any], train_name: Optional[str] = None) -> Dict[str, Any]:
+        """Store a `/trains/{n}/schedule` payload; returns the compacted copy that was stored."""
+        compact = _compact_schedule(sched_data, train_name)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO schedules (train_number, data, fetched_at) VALUES (?, ?, ?)",
+                (train_number, json.dumps(compact, separators=(",", ":")), now),
+            )
+            self._index_schedule(train_number, compact, now)
+        return compact
+
+    def get_schedule(self, train_number: str) -> Optional[Dict[str, Any]]:
+        """Cached schedule (even if stale), or None."""
+        entry = self._schedules.get(train_number)
+        return entry[1] if entry else None
+
+    def needs_refresh(self, train_number: str, origin: str, departure_date: str) -> bool:
+        """
+        True if the schedule is missing, older than `schedule_max_age`, or its
+        `availableStartDates` window ends before the start date the journey needs.
+        """
+        entry = self._schedules.get(train_number)
+        if entry is None:
+            return True
+        fetched_at, sched_data = entry
+        if time.time() - fetched_at > self.schedule_max_age:
+            return True
+
+        last_start = _last_start_date(sched_data)
+        if last_start is None:
+            return True
+        journey_day = next(
+            (int(s.get("journeyDay", 1)) for s in sched_data["route"] if s["station"]["code"] == origin), 1
+        )
+        needed_start = datetime.strptime(departure_date, "%Y-%m-%d") - timedelta(days=journey_day - 1)
+        return needed_start > last_start
+
+    # ---- Station pairs ----
+
+    def put_pair(self, origin: str, destination: str, trains: List[Dict[str, Any]]) -> None:
+        """Store the `/trains/between` result (train number + name) for a pair."""
+        slim = [{"trainNumber": t.get("trainNumber"), "trainName": t.get("trainName")} for t in trains]
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pairs (origin, destination, trains, fetched_at) VALUES (?, ?, ?, ?)",
+                (origin, destination, json.dumps(slim, separators=(",", ":")), time.time()),
+            )
+
+    def get_pair(self, origin: str, destination: str) -> Optional[List[Dict[str, Any]]]:
+        """Fresh `/trains/between` result for a pair, or None if unknown or stale."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT trains, fetched_at FROM pairs WHERE origin = ? AND destination = ?", (origin, destination)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.pair_max_age:
+            return None
+        return json.loads(row[0])
+
+    def trains_between(self, origin: str, destination: str) -> List[str]:
+        """
+        Cached trains that stop at `origin` and later at `destination`, from the
+        inverted index. Only as complete as the set of cached schedules.
+        """
+        with self._lock:
+            origin_stops = dict(self._station_index.get(origin, ()))
+            destination_stops = list(self._station_index.get(destination, ()))
+        return [
+            train for train, idx in destination_stops
+            if train in origin_stops and origin_stops[train] < idx
+        ]
+
+
+_store: Optional[TrainScheduleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_schedule_store() -> TrainScheduleStore:
+    """Shared store, created on first use at TRIPMATE_RAIL_STORE_PATH ("" = in-memory)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TrainScheduleStore(path=os.getenv("TRIPMATE_RAIL_STORE_PATH", DEFAULT_STORE_PATH) or None)
+        return _store
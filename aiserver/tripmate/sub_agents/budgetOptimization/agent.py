@@ -0,0 +1,27 @@
+# budget_agent.py
+"""
+Budget Optimization Agent: Fits transport, stay and activities to the user's budget.
+Uses gemini-2.5-flash as the reasoning model; the trade-offs themselves are computed by tools.
+"""
+
+from google.adk.agents import Agent
+
+# Import your tools
+from tripmate.tools.budgetOptimizerTool import optimize_trip_budget
+from tripmate.tools.itineraryCostTool import itinerary_cost_summary, update_itinerary_item_cost
+from tripmate.sub_agents.budgetOptimization.prompt import BUDGET_AGENT_PROMPT
+from tripmate.library import constants
+from tripmate.tools.memory import _load_trip_state, _persist_trip_state
+
+
+# Define the Budget Optimization Agent
+budget_optimization_agent = Agent(
+    model="gemini-2.5-flash",
+    name="BudgetOptimizationAgent",
+    description="An agent that fits flights, hotels and activities to the user's budget and explains the trade-offs between cheaper and better options.",
+    instruction=BUDGET_AGENT_PROMPT,
+    tools=[optimize_trip_budget, itinerary_cost_summary, update_itinerary_item_cost],
+    # Budget lines come from the profile and committed spend from the itinerary
+    before_agent_callback=_load_trip_state(constants.PROF_KEY, constants.ITIN_KEY),
+    after_agent_callback=_persist_trip_state,
+)
@@ -8,8 +8,12 @@ from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
 # Import your tools
-from tripmate.tools.hotelSearchTool import hotels_search
+from tripmate.tools.hotelSearchTool import hotels_search_async
+from tripmate.tools.resultDetailsTool import tool_result_details
+from tripmate.library.projection import project_tool_response
 from tripmate.sub_agents.hotel.prompt import HOTEL_AGENT_PROMPT
+from tripmate.library import constants
+from tripmate.tools.memory import _load_trip_state, _persist_trip_state
 
 
 # Define the Hotel Agent
@@ -18,5 +22,10 @@ hotel_agent = Agent(
     name="HotelAgent",
     description="An agent that helps users search for hotels if given a location. Display the responses in a user-friendly format.",
     instruction=HOTEL_AGENT_PROMPT,
-    tools=[hotels_search],
+    tools=[hotels_search_async, tool_result_details],
+    # Search outputs reach the model as compact projections; full results stay fetchable by handle
+    after_tool_callback=project_tool_response,
+    # Ranking weights come from the user profile; load just that subtree if the session lacks it
+    before_agent_callback=_load_trip_state(constants.PROF_KEY),
+    after_agent_callback=_persist_trip_state,
 )
@@ -0,0 +1,27 @@
+# itinerary_agent.py
+"""
+Itinerary Generation Agent: Lays out the trip's activities day by day.
+Uses gemini-2.5-flash as the reasoning model; clustering and routing are computed by tools.
+"""
+
+from google.adk.agents import Agent
+
+# Import your tools
+from tripmate.tools.itineraryPlannerTool import plan_itinerary_days
+from tripmate.tools.itineraryCostTool import itinerary_cost_summary
+from tripmate.sub_agents.itineraryGen.prompt import ITINERARY_AGENT_PROMPT
+from tripmate.library import constants
+from tripmate.tools.memory import _load_trip_state, _persist_trip_state
+
+
+# Define the Itinerary Generation Agent
+itinerary_gen_agent = Agent(
+    model="gemini-2.5-flash",
+    name="ItineraryGenerationAgent",
+    description="An agent that builds day-by-day itineraries, grouping nearby activities and ordering each day around opening hours to minimize travel.",
+    instruction=ITINERARY_AGENT_PROMPT,
+    tools=[plan_itinerary_days, itinerary_cost_summary],
+    # Trip dates, candidate activities and hotel locations come from the trip document
+    before_agent_callback=_load_trip_state(constants.PROF_KEY, constants.TRMD_KEY, constants.ITIN_KEY, constants.RECS_KEY),
+    after_agent_callback=_persist_trip_state,
+)
@@ -7,11 +7,15 @@ Uses gemini-2.5-flash as the reasoning model.
 from google.adk.agents import Agent
 
 # Import your tools
-from tripmate.tools.flightSearchTool import flights_search
-from tripmate.tools.airportIATATool import airport_iata_code_tool
+from tripmate.tools.flightSearchTool import flights_search_async, flights_search_flexible_async
+from tripmate.tools.airportIATATool import airport_iata_code_lookup, airport_iata_code_tool
 from tripmate.sub_agents.transport.prompt import TRAVEL_AGENT_PROMPT
-from tripmate.tools.stationCodeTool import railway_station_code_tool
-from tripmate.tools.trainSearchTool import train_search
+from tripmate.tools.stationCodeTool import railway_station_code_lookup, railway_station_code_tool
+from tripmate.tools.trainSearchTool import train_search_async
+from tripmate.tools.transportCompareTool import transport_compare_async
+from tripmate.tools.resultDetailsTool import tool_result_details
+from tripmate.library.projection import project_tool_response
+from tripmate.tools.memory import _persist_trip_state
 
 
 # Define the Transport Agent
@@ -20,5 +24,18 @@ transport_agent = Agent(
     name="TransportAgent",
     description="An agent that helps users search for flights or Train. Resolve IATA or Railway Station Code. Display the responses in a user-friendly format.",
     instruction=TRAVEL_AGENT_PROMPT,
-    tools=[airport_iata_code_tool, flights_search, railway_station_code_tool, train_search]
+    tools=[
+        airport_iata_code_lookup,
+        airport_iata_code_tool,
+        flights_search_async,
+        flights_search_flexible_async,
+        railway_station_code_lookup,
+        railway_station_code_tool,
+        train_search_async,
+        transport_compare_async,
+        tool_result_details,
+    ],
+    # Search outputs reach the model as compact projections; full results stay fetchable by handle
+    after_tool_callback=project_tool_response,
+    after_agent_callback=_persist_trip_state,
 )
@@ -1,10 +1,18 @@
 #airportTool.py
-"""Tool to get IATA codes for airports using a custom agent with Google Search."""
+"""Tools to get IATA codes for airports.
+
+`airport_iata_code_lookup` answers from the offline index in library/code_resolver.py.
+`airport_iata_code_tool` (an agent with Google Search) is the fallback on a miss.
+"""
+from typing import Any, Dict
+
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
 from google.adk.tools.google_search_tool import google_search
 
+from tripmate.library.code_resolver import get_airport_index
+
 _search_agent = Agent(
     model="gemini-2.5-flash",
     name="AirportIATACodeAgent",
@@ -19,4 +27,37 @@ _search_agent = Agent(
     tools=[google_search],
 )
 
-airport_iata_code_tool = AgentTool(agent=_search_agent)
\ No newline at end of file
+airport_iata_code_tool = AgentTool(agent=_search_agent)
+
+def airport_iata_code_lookup(location: str) -> Dict[str, Any]:
+    """
+    Resolve an airport name, city or location into its IATA code using the offline index.
+
+    Args:
+        location: Airport name, city or location (e.g. "Bangalore", "Heathrow").
+
+    Returns:
+        dict with:
+        - status: "found" or "not_found".
+        - iata_code, airport_name, city, match_type, confidence for the best match.
+        - alternatives: other candidate airports (e.g. secondary airports of the city).
+        On "not_found" use airport_iata_code_tool instead.
+    """
+    matches = get_airport_index().lookup(location)
+    if not matches:
+        return {
+            "status": "not_found",
+            "query": location,
+            "message": "IATA code not found in local index, use airport_iata_code_tool",
+        }
+    best = matches[0]
+    return {
+        "status": "found",
+        "query": location,
+        "iata_code": best.code,
+        "airport_name": best.name,
+        "city": best.city,
+        "match_type": best.match_type,
+        "confidence": best.confidence,
+        "alternatives": [{"iata_code": m.code, "airport_name": m.name, "city": m.city} for m in matches[1:]],
+    }
@@ -0,0 +1,305 @@
+# budgetOptimizerTool.py
+"""Tool to choose transport, stay and activities within the trip budget, exactly.
+
+Candidates come from earlier searches in the session (by `result_handle`,
+see library/projection.py, or the latest search of each kind) and from the
+itinerary's activities. Each candidate gets a cost and a 0-1 quality; the
+Pareto front of cost vs quality and the best plan within the budget come
+from library/budget_optimizer.py, so trade-offs are computed, not guessed.
+
+Budget lines come from `user_profile.preferences.budget`; itinerary spend the
+candidates do not replace (food, local transport, activity legs, hotels when
+no hotel search is given) is counted as committed. Options priced in another
+currency than the budget are left out, never summed with it.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from google.adk.tools.tool_context import ToolContext
+
+from tripmate.library import constants
+from tripmate.library.budget_optimizer import Candidate, Plan, pareto_plans, search_space, spread
+from tripmate.library.cost_ledger import CATEGORIES, budget_lines, iter_items, iter_priced_items
+from tripmate.library.hotel_ranking import extract_features, score_features, weights_from_profile
+from tripmate.library.projection import get_result_store
+from tripmate.tools.itineraryCostTool import get_ledger
+from tripmate.tools.memory import ScenarioView
+
+TRANSPORT_TOOLS = (
+    "flights_search", "flights_search_async", "flights_search_flexible", "flights_search_flexible_async",
+    "transport_compare", "transport_compare_async",
+)
+HOTEL_TOOLS = ("hotels_search", "hotels_search_async")
+
+# Candidates searched per group; the cheapest/best are kept when a search returned more.
+MAX_CANDIDATES = 200
+# Itinerary transport a flight/train candidate replaces; cabs, metro and activity legs stay committed
+INTERCITY_MODES = ("flight", "train")
+
+
+class PlanItem(BaseModel):
+    category: str = Field(description="transport, stay or activities")
+    name: str
+    cost: float
+    index: Optional[int] = Field(default=None, description="Position in the source search result or itinerary activity list")
+    day: Optional[int] = Field(default=None, description="Itinerary day of an activity")
+
+
+class BudgetPlan(BaseModel):
+    total_cost: float = Field(description="Plan cost plus committed spend")
+    plan_cost: float = Field(description="Cost of the chosen items only")
+    quality: float = Field(description="Sum of per-category quality; each category contributes 0-1")
+    remaining: Optional[float] = Field(default=None, description="Budget left after this plan, if a total budget is set")
+    items: List[PlanItem]
+
+
+class BudgetOptimizationOutput(BaseModel):
+    budget_total: Optional[float] = None
+    currency: Optional[str] = None
+    committed: Dict[str, float] = Field(default_factory=dict, description="Itinerary spend per category the candidates do not replace")
+    best: Optional[BudgetPlan] = Field(default=None, description="Highest quality plan within budget and allocations")
+    cheapest: Optional[BudgetPlan] = None
+    trade_offs: List[BudgetPlan] = Field(default_factory=list, description="Pareto-optimal plans, cheapest first")
+    combinations: int = Field(default=0, description="Number of possible plans the front was computed over")
+    skipped: Dict[str, int] = Field(default_factory=dict, description="Candidates left out per group, e.g. without a price or priced in another currency")
+    message: Optional[str] = None
+
+
+# ---------------- Candidates ----------------
+
+def _minutes(text: Any) -> Optional[float]:
+    """Minutes from an int or a format_duration string such as '6h 1m'."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = re.fullmatch(r"\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*", text or "")
+    if not match or not any(match.groups()):
+        return None
+    return float(int(match.group(1) or 0) * 60 + int(match.group(2) or 0))
+
+
+def _transport_candidates(result: Dict[str, Any], tool_name: str) -> Tuple[List[Candidate], int]:
+    """Priced options of a flight/comparison search; quality favours short door-to-door time and few stops."""
+    if tool_name.startswith("transport_compare"):
+        rows = [(o, o.get("door_to_door_minutes")) for o in result.get("options") or []]
+    else:
+        key = "best_options" if tool_name.startswith("flights_search_flexible") else "flights"
+        rows = [(f, _minutes(f.get("total_duration"))) for f in result.get(key) or []]
+
+    priced = [(i, row, minutes) for i, (row, minutes) in enumerate(rows) if isinstance(row.get("price"), (int, float))]
+    known = [m for _, _, m in priced if m]
+    fastest = min(known) if known else None
+    candidates = []
+    for index, row, minutes in priced[:MAX_CANDIDATES]:
+        speed = fastest / minutes if fastest and minutes else 0.5
+        stops = row.get("stops") or 0
+        name = row.get("name") or ", ".join(row.get("airlines") or []) or "Flight"
+        if row.get("departure_date"):
+            name = f"{name} ({row['departure_date']})"
+        elif row.get("departure"):
+            name = f"{name} ({row['departure']})"
+        candidates.append(Candidate(
+            "transport", name, float(row["price"]), round(0.7 * speed + 0.3 / (1 + stops), 4), index, row.get("currency"),
+        ))
+    return candidates, len(rows) - len(candidates)
+
+
+def _hotel_candidates(result: Dict[str, Any], nights: int, preferences: Dict[str, Any]) -> Tuple[List[Candidate], int]:
+    """Hotels with a known total (or nightly) rate; quality is the profile's ranking score without its price term."""
+    hotels = result.get("hotels") or []
+    costs = []
+    for hotel in hotels:
+        total = (hotel.get("total_rate") or {}).get("extracted_lowest")
+        nightly = (hotel.get("rate_per_night") or {}).get("extracted_lowest")
+        costs.append(total if total is not None else (nightly * nights if nightly is not None else None))
+    weights = weights_from_profile(preferences.get("accommodation_preferences"))
+    quality_weights = {**weights, "price": 0.0}
+    scale = sum(quality_weights.values()) or 1.0
+    scores = score_features(extract_features(hotels), {k: v / scale for k, v in quality_weights.items()})
+    candidates = [
+        Candidate("stay", hotel.get("name") or "Hotel", float(cost), round(float(score), 4), index, result.get("currency"))
+        for index, (hotel, cost, score) in enumerate(zip(hotels, costs, scores))
+        if cost is not None
+    ][:MAX_CANDIDATES]
+    return candidates, len(hotels) - len(candidates)
+
+
+def _activity_candidates(itinerary: Dict[str, Any], extra: List[Dict[str, Any]]) -> List[Candidate]:
+    """Itinerary activities plus `extra` ones; quality is priority (default 1) over the total priority."""
+    rows = []
+    for day_index, day in enumerate(itinerary.get("days") or []):
+        for index, activity in enumerate((day or {}).get("activities") or []):
+            rows.append((activity.get("title") or f"Activity {index + 1}", activity.get("cost"), activity.get("priority"), index, day_index))
+    for index, activity in enumerate(extra):
+        rows.append((activity.get("name") or activity.get("title") or f"Option {index + 1}", activity.get("cost"), activity.get("priority"), None, None))
+
+    rows = [r for r in rows if isinstance(r[1], (int, float))]
+    priorities = np.array([p if isinstance(p, (int, float)) and p > 0 else 1.0 for _, _, p, _, _ in rows], dtype=float)
+    total = priorities.sum() or 1.0
+    return [
+        Candidate("activities", name, float(cost), round(float(priority / total), 4), (index, day))
+        for (name, cost, _, index, day), priority in zip(rows, priorities)
+    ]
+
+
+def _replaced(itinerary: Dict[str, Any], categories: set, activities: List[Candidate]) -> set:
+    """Paths of the itinerary items the candidates stand in for."""
+    replaced = {f"days[{day}].activities[{index}]" for c in activities for index, day in [c.ref] if index is not None}
+    for path, _, field, item in iter_items(itinerary):
+        if field == "stays" and "stay" in categories:
+            replaced.add(path)
+        elif field == "transport" and "transport" in categories and isinstance(item, dict):
+            if str(item.get("mode") or item.get("type") or "").lower() in INTERCITY_MODES:
+                replaced.add(path)
+    return replaced
+
+
+def _drop_foreign(groups: Dict[str, List[Candidate]], currency: Optional[str], skipped: Dict[str, int]) -> Dict[str, List[str]]:
+    """Remove candidates priced in another currency than `currency`; returns group -> currencies dropped."""
+    dropped = {}
+    for group, options in groups.items():
+        kept = [c for c in options if not c.currency or c.currency.upper() == currency.upper()]
+        if len(kept) < len(options):
+            dropped[group] = sorted({c.currency for c in options if c not in kept})
+            skipped[group] = skipped.get(group, 0) + len(options) - len(kept)
+            groups[group] = kept
+    return dropped
+
+
+def _result(tool_context: ToolContext, handle: Optional[str], tool_names: Tuple[str, ...]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    store = get_result_store()
+    if handle:
+        entry = store.get(tool_context.session.id, handle)
+        return (entry[0], entry[1]) if entry is not None and entry[0] in tool_names else None
+    latest = store.latest(tool_context.session.id, tool_names)
+    return (latest[1], latest[2]) if latest is not None else None
+
+
+# ---------------- Output ----------------
+
+def _plan(plan: Plan, committed: float, budget_total: Optional[float]) -> BudgetPlan:
+    items = []
+    for choice in sorted(plan.choices, key=lambda c: CATEGORIES.index(c.category) if c.category in CATEGORIES else len(CATEGORIES)):
+        index, day = choice.ref if isinstance(choice.ref, tuple) else (choice.ref, None)
+        items.append(PlanItem(category=choice.category, name=choice.name, cost=round(choice.cost, 2), index=index, day=day))
+    total = round(plan.cost + committed, 2)
+    return BudgetPlan(
+        total_cost=total,
+        plan_cost=round(plan.cost, 2),
+        quality=round(plan.quality, 3),
+        remaining=round(budget_total - total, 2) if budget_total else None,
+        items=items,
+    )
+
+
+# ---------------- Tool ----------------
+
+def optimize_trip_budget(
+    transport_handle: Optional[str] = None,
+    return_transport_handle: Optional[str] = None,
+    hotel_handle: Optional[str] = None,
+    nights: int = 1,
+    include_itinerary_activities: bool = True,
+    extra_activities: Optional[List[Dict[str, Any]]] = None,
+    budget_total: Optional[float] = None,
+    respect_allocations: bool = True,
+    max_plans: int = 5,
+    tool_context: ToolContext = None,
+) -> BudgetOptimizationOutput:
+    """
+    Pick one transport option, one hotel and a set of activities that give the best quality
+    within the budget, and list the exact cost/quality trade-offs. Use this instead of
+    comparing prices yourself.
+
+    Args:
+        transport_handle: result_handle of a flight or transport comparison search. Defaults to the
+            latest such search in this conversation.
+        return_transport_handle: result_handle of the return-leg search, for round trips searched as two one-ways.
+        hotel_handle: result_handle of a hotel search. Defaults to the latest hotel search.
+        nights: Nights of stay, used for hotels that only have a nightly rate.
+        include_itinerary_activities: Treat the itinerary's activities as optional items to keep or drop.
+        extra_activities: More optional activities, each {"name", "cost", "priority" (1-5, optional)}.
+        budget_total: Total trip budget; defaults to user_profile.preferences.budget.total.
+        respect_allocations: Keep each category within its preferences.budget.allocations amount.
+        max_plans: Number of trade-off plans to return.
+
+    Returns:
+        BudgetOptimizationOutput with the best plan within budget, the cheapest plan, evenly
+        spaced Pareto-optimal trade-offs (cheapest first) and the itinerary spend the
+        candidates do not replace (e.g. food and local transport legs).
+    """
+    view = ScenarioView(tool_context.state)
+    preferences = (view.get(constants.PROF_KEY) or {}).get("preferences") or {}
+    lines = budget_lines(preferences)
+    currency = (preferences.get("budget") or {}).get("currency")
+    total = budget_total if budget_total and budget_total > 0 else lines.get("total")
+
+    groups: Dict[str, List[Candidate]] = {}
+    skipped: Dict[str, int] = {}
+    for group, handle in (("transport", transport_handle), ("return_transport", return_transport_handle)):
+        if group == "return_transport" and not handle:
+            continue
+        found = _result(tool_context, handle, TRANSPORT_TOOLS)
+        if found is not None:
+            groups[group], skipped[group] = _transport_candidates(found[1], found[0])
+        elif handle:
+            return BudgetOptimizationOutput(message=f"Unknown or expired {group}_handle '{handle}'; search again")
+    found = _result(tool_context, hotel_handle, HOTEL_TOOLS)
+    if found is not None:
+        groups["stay"], skipped["stay"] = _hotel_candidates(found[1], max(1, nights), preferences)
+    elif hotel_handle:
+        return BudgetOptimizationOutput(message=f"Unknown or expired hotel_handle '{hotel_handle}'; search again")
+
+    # Prices are summed as they are, so every option must be in the budget's currency
+    currency = currency or next((c.currency for options in groups.values() for c in options if c.currency), None)
+    foreign = _drop_foreign(groups, currency, skipped) if currency else {}
+    for group, currencies in foreign.items():
+        if not groups[group]:
+            return BudgetOptimizationOutput(
+                budget_total=total, currency=currency, skipped=skipped,
+                message=f"{group} options are priced in {', '.join(currencies)}, not the budget currency {currency}; "
+                        f"search again with currency=\"{currency}\"",
+            )
+
+    itinerary = view.get(constants.ITIN_KEY) or {}
+    activities = _activity_candidates(itinerary if include_itinerary_activities else {}, extra_activities or [])
+    empty = [group for group, options in groups.items() if not options]
+    if empty:
+        return BudgetOptimizationOutput(
+            budget_total=total, currency=currency, skipped=skipped,
+            message=f"No priced options for {', '.join(empty)}; search again or pick another result",
+        )
+    if not groups and not activities:
+        return BudgetOptimizationOutput(budget_total=total, currency=currency, message="Nothing to optimize: search transport or hotels first")
+
+    # Itinerary spend the candidates do not replace (food, local transport, kept items) is already committed
+    optimized = {c.category for options in groups.values() for c in options} | ({"activities"} if activities else set())
+    replaced = _replaced(itinerary, optimized, activities)
+    ledger = get_ledger(tool_context)
+    spend = dict.fromkeys(CATEGORIES, 0.0)
+    with ledger.lock:
+        for path, _, category, _ in iter_priced_items(itinerary):
+            if path not in replaced:
+                spend[category] += ledger.item_cost(path) or 0.0
+    committed = {c: round(v, 2) for c, v in spend.items() if v}
+    committed_total = sum(committed.values())
+    caps = {c: lines[c] for c in optimized if c in lines} if respect_allocations else {}
+    max_cost = total - committed_total if total else None
+
+    plans = pareto_plans(groups, activities, max_cost, caps)
+    output = BudgetOptimizationOutput(
+        budget_total=total,
+        currency=currency,
+        committed=committed,
+        combinations=search_space(groups, activities),
+        skipped={k: v for k, v in skipped.items() if v},
+    )
+    if not plans:
+        output.message = "No combination fits the budget and allocations; raise the budget or relax respect_allocations"
+        return output
+    output.best = _plan(plans[-1], committed_total, total)
+    output.cheapest = _plan(plans[0], committed_total, total)
+    output.trade_offs = [_plan(p, committed_total, total) for p in spread(plans, max(1, max_plans))]
+    return output
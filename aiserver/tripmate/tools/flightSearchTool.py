@@ -1,10 +1,16 @@
 # transportTool.py
 """Tool to search for flights using SerpApi's Google Flights engine."""
+import asyncio
+import logging
 import os
-from typing import Optional, List, Dict, Any
-import requests
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
 from pydantic import BaseModel, Field
 
+from tripmate.library.http_client import get_client, run_sync
+from tripmate.library.normalize import FlightRecord, normalize_flights
+from tripmate.library.response_cache import get_serpapi_cache
+
 
 class FlightsSearchInput(BaseModel):
     #Input for flight search queries"""
@@ -33,43 +39,50 @@ class FlightSearchOutput(BaseModel):
     # Output for flight search results
     flights: List[FlightSearchResult] = Field(description="A list of flight options matching the search criteria")
 
-def format_duration(minutes: int | None) -> str | None:
-    """Convert minutes into H:MM format (e.g., 70 → '1h 10m')."""
-    if minutes is None:
-        return None
-    try:
-        minutes = int(minutes)
-        hours, mins = divmod(minutes, 60)
-        if hours > 0:
-            return f"{hours}h {mins}m"
-        return f"{mins}m"
-    except Exception:
-        return None
 
+class PriceCalendarEntry(BaseModel):
+    departure_date: str
+    return_date: Optional[str] = None
+    min_price: Optional[float] = None
+    num_options: int = 0
+    error: Optional[str] = None
 
-def flights_search(
+
+class FlexibleFlightOption(FlightSearchOutput.FlightSearchResult):
+    departure_date: str
+    return_date: Optional[str] = None
+
+
+class FlexibleFlightSearchOutput(BaseModel):
+    # Output for flexible-date flight search
+    calendar: List[PriceCalendarEntry] = Field(description="Cheapest price per searched date (pair), in date order")
+    cheapest_departure_date: Optional[str] = Field(default=None, description="Departure date with the lowest price")
+    best_options: List[FlexibleFlightOption] = Field(description="Cheapest distinct itineraries across all dates")
+
+
+# Maximum number of per-date searches one flexible search may fan out to, and how many run at once.
+FLEXIBLE_MAX_SEARCHES = int(os.getenv("FLEXIBLE_SEARCH_MAX_DATES", "14"))
+FLEXIBLE_MAX_CONCURRENCY = int(os.getenv("SERPAPI_MAX_CONCURRENCY", "4"))
+
+
+def to_flight_output(records: List[FlightRecord], include_raw: bool = False) -> FlightSearchOutput:
+    """Build the output model from normalized records in a single batch validation."""
+    return FlightSearchOutput.model_validate({"flights": [r.to_dict(include_raw) for r in records]})
+
+
+def _flight_params(
     origin: str,
     destination: str,
     departure_date: str,
-    return_date: Optional[str] = None,
-    num_passengers: int = 1,
-    budget: float = 10000.0,
-    currency: str = "INR",
-    type: int = 2,
-) -> FlightSearchOutput:
-    """
-    Query SerpApi's Google Flights engine and return parsed flight options.
-    Requires SERPAPI_API_KEY environment variable to be set.
-
-    Notes:
-      - Uses 'departure_id' and 'arrival_id' as documented by SerpApi.
-      - For a round-trip search include return_date; for one-way omit it.
-    """
+    return_date: Optional[str],
+    num_passengers: int,
+    currency: str,
+    type: int,
+) -> Dict[str, Any]:
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         raise RuntimeError("SERPAPI_API_KEY environment variable is required")
 
-    endpoint = "https://serpapi.com/search"
     params = {
         "engine": "google_flights",
         "departure_id": origin,
@@ -86,104 +99,228 @@ def flights_search(
 
     # Optional optimization: avoid cache if fresh results required:
     # params["no_cache"] = "true"
+    return params
+
+
+async def search_flight_records_async(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    type: int = 2,
+) -> List[FlightRecord]:
+    """Run one (cached) Google Flights search and return the normalized records within budget."""
+    params = _flight_params(origin, destination, departure_date, return_date, num_passengers, currency, type)
+
+    async def _fetch():
+        return await get_client("serpapi").aget_json("/search", params=params)
+
+    data = await get_serpapi_cache().aget_or_fetch("google_flights", params, _fetch)
+    logging.debug(f"SerpApi google_flights response keys: {list(data)}")
+    return normalize_flights(data, currency=currency, budget=budget)
+
+
+def search_flight_records(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    type: int = 2,
+) -> List[FlightRecord]:
+    """Sync `search_flight_records_async`, for callers without an event loop."""
+    return run_sync(search_flight_records_async(
+        origin, destination, departure_date, return_date, num_passengers, budget, currency, type
+    ))
+
 
-    resp = requests.get(endpoint, params=params, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    print(f"\nRaw SerpApi Response: {data}\n")
-
-    # choose which arrays to parse: best_flights first (if present), then other_flights
-    candidates = []
-    if isinstance(data.get("best_flights"), list):
-        candidates.extend(data.get("best_flights", []))
-    if isinstance(data.get("other_flights"), list):
-        candidates.extend(data.get("other_flights", []))
-    # some responses may include 'flights' or differently structured entries; be defensive
-    if not candidates and isinstance(data.get("flights"), list):
-        candidates.extend(data.get("flights", []))
-
-    results = []
-    for entry in candidates:
-        # Common safe-extraction helpers
-        def _safe(d, *keys, default=None):
-            cur = d
-            for k in keys:
-                if not isinstance(cur, dict) or k not in cur:
-                    return default
-                cur = cur[k]
-            return cur
-
-        # price extraction - can be int, str, or dict
-        price = None
-        currency_code = None
-
-        price_field = entry.get("price")
-        if isinstance(price_field, (int, float, str)):
-            try:
-                price = float(price_field)
-            except Exception:
-                price = None
-        elif isinstance(price_field, dict):
-            price = price_field.get("total") or price_field.get("price") or price_field.get("value")
-            currency_code = price_field.get("currency") or currency_code
-
-        # fallback
-        if price is None:
-            price = entry.get("total_price") or _safe(entry, "price", "total")
-
-        # airlines: try to collect flight-level airline names/codes
-        airlines = []
-        segments = []
-        raw_segments = entry.get("flights") or entry.get("segments") or []
-        if isinstance(raw_segments, list):
-            for seg in raw_segments:
-                seg_info = {
-                    "departure_airport": _safe(seg, "departure_airport", "id") or _safe(seg, "departure_airport", "name"),
-                    "arrival_airport": _safe(seg, "arrival_airport", "id") or _safe(seg, "arrival_airport", "name"),
-                    "departure_time": _safe(seg, "departure_airport", "time") or seg.get("departure_time"),
-                    "arrival_time": _safe(seg, "arrival_airport", "time") or seg.get("arrival_time"),
-                    "airline": _safe(seg, "airline", "name") or seg.get("airline"),
-                    "duration": seg.get("duration")
-                }
-                if seg_info.get("airline"):
-                    airlines.append(seg_info["airline"])
-                segments.append(seg_info)
-
-        # total duration and stops
-        total_duration = entry.get("total_duration") or entry.get("duration") or entry.get("total_trip_duration")
-        stops = None
-        if isinstance(entry.get("stops"), (int, str)):
-            try:
-                stops = int(entry.get("stops"))
-            except Exception:
-                stops = None
-        else:
-            # infer from segments
-            if isinstance(segments, list):
-                stops = max(0, len(segments) - 1) if segments else None
-
-        booking_token = entry.get("booking_token") or _safe(entry, "booking_options", 0, "booking_token")
-
-        result_obj = FlightSearchOutput.FlightSearchResult(
-            price=float(price) if price is not None else None,
-            currency=currency_code or currency,
-            airlines=list(dict.fromkeys([a for a in airlines if a])),  # unique preserving order
-            total_duration=format_duration(total_duration),
-            stops=stops,
-            segments=segments if segments else None,
-            booking_token=booking_token,
-            raw=entry
-        )
-        results.append(result_obj)
-
-    # Optionally filter by budget (provided by user)
-    filtered_results = []
-    for r in results:
-        if r.price is None:
-            # keep unknown-price results (optional), or skip them
-            filtered_results.append(r)
+async def flights_search_async(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    type: int = 2,
+    include_raw: bool = False,
+) -> FlightSearchOutput:
+    """
+    Query SerpApi's Google Flights engine and return parsed flight options.
+    Requires SERPAPI_API_KEY environment variable to be set.
+
+    Notes:
+      - Uses 'departure_id' and 'arrival_id' as documented by SerpApi.
+      - For a round-trip search include return_date; for one-way omit it.
+      - Set include_raw only when the raw SerpApi entry of each flight is needed (debugging).
+    """
+    records = await search_flight_records_async(
+        origin, destination, departure_date, return_date, num_passengers, budget, currency, type
+    )
+    return to_flight_output(records, include_raw=include_raw)
+
+
+def flights_search(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    type: int = 2,
+    include_raw: bool = False,
+) -> FlightSearchOutput:
+    """Sync `flights_search_async`, for callers without an event loop."""
+    return run_sync(flights_search_async(
+        origin, destination, departure_date, return_date, num_passengers, budget, currency, type, include_raw
+    ))
+
+
+def _date_range(start: str, end: Optional[str]) -> List[str]:
+    first = datetime.strptime(start, "%Y-%m-%d")
+    last = datetime.strptime(end, "%Y-%m-%d") if end else first
+    if last < first:
+        first, last = last, first
+    return [(first + timedelta(days=d)).strftime("%Y-%m-%d") for d in range((last - first).days + 1)]
+
+
+def _clock(time: Optional[str]) -> Optional[str]:
+    """"HH:MM" of a SerpApi "YYYY-MM-DD HH:MM" time."""
+    return time.rsplit(" ", 1)[-1] if time else None
+
+
+def _itinerary_key(record: FlightRecord) -> Tuple:
+    """
+    Flights with the same legs (flight number or airline, airports, clock times) are the
+    same itinerary on different dates, so the flexible search keeps only its cheapest date.
+    """
+    return tuple(
+        (s.flight_number or s.airline, s.departure_airport, s.arrival_airport, _clock(s.departure_time), _clock(s.arrival_time))
+        for s in record.segments
+    ) or (record.booking_token,)
+
+
+def _flexible_date_pairs(
+    departure_date_from: str,
+    departure_date_to: str,
+    return_date_from: Optional[str],
+    return_date_to: Optional[str],
+) -> List[Tuple[str, Optional[str]]]:
+    departures = _date_range(departure_date_from, departure_date_to)
+    returns = _date_range(return_date_from, return_date_to) if return_date_from else [None]
+    date_pairs = [(d, r) for d in departures for r in returns if r is None or r >= d]
+    if len(date_pairs) > FLEXIBLE_MAX_SEARCHES:
+        logging.warning(f"Flexible search limited to {FLEXIBLE_MAX_SEARCHES} of {len(date_pairs)} date combinations")
+        date_pairs = date_pairs[:FLEXIBLE_MAX_SEARCHES]
+    return date_pairs
+
+
+def _flexible_output(
+    date_pairs: List[Tuple[str, Optional[str]]],
+    outcomes: List[Any],
+    max_options: int,
+) -> FlexibleFlightSearchOutput:
+    """Build the price calendar and best options; `outcomes` holds records or the exception per date pair."""
+    calendar: List[PriceCalendarEntry] = []
+    best: Dict[Tuple, Tuple[FlightRecord, str, Optional[str]]] = {}
+    for (departure, ret), records in zip(date_pairs, outcomes):
+        if isinstance(records, Exception):
+            logging.error(f"Flexible flight search failed for {departure}/{ret}: {records}")
+            calendar.append(PriceCalendarEntry(departure_date=departure, return_date=ret, error=str(records)))
             continue
-        if r.price <= budget:
-            filtered_results.append(r)
 
-    return FlightSearchOutput(flights=filtered_results)
+        prices = [r.price for r in records if r.price is not None]
+        calendar.append(PriceCalendarEntry(
+            departure_date=departure,
+            return_date=ret,
+            min_price=min(prices) if prices else None,
+            num_options=len(records),
+        ))
+        for record in records:
+            if record.price is None:
+                continue
+            key = _itinerary_key(record)
+            if key not in best or record.price < best[key][0].price:
+                best[key] = (record, departure, ret)
+
+    cheapest = min((c for c in calendar if c.min_price is not None), key=lambda c: c.min_price, default=None)
+    ranked = sorted(best.values(), key=lambda item: item[0].price)[:max_options]
+    return FlexibleFlightSearchOutput.model_validate({
+        "calendar": [c.model_dump() for c in calendar],
+        "cheapest_departure_date": cheapest.departure_date if cheapest else None,
+        "best_options": [
+            {**record.to_dict(), "departure_date": departure, "return_date": ret}
+            for record, departure, ret in ranked
+        ],
+    })
+
+
+async def flights_search_flexible_async(
+    origin: str,
+    destination: str,
+    departure_date_from: str,
+    departure_date_to: str,
+    return_date_from: Optional[str] = None,
+    return_date_to: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    max_options: int = 5,
+) -> FlexibleFlightSearchOutput:
+    """
+    Search flights over a window of dates in one call and return a price calendar.
+
+    Use this when the user is flexible on dates ("cheapest around the 10th").
+    Every date (or departure/return pair for round trips) in the window is
+    searched concurrently; repeated searches are served from cache.
+
+    Args:
+        origin / destination: IATA codes.
+        departure_date_from / departure_date_to: Departure window, YYYY-MM-DD (inclusive).
+        return_date_from / return_date_to: Optional return window for round trips, YYYY-MM-DD.
+        num_passengers, budget, currency: As in flights_search.
+        max_options: Number of cheapest distinct itineraries to return.
+
+    Returns:
+        FlexibleFlightSearchOutput with a date -> min-price calendar, the cheapest
+        departure date and the best options (each tagged with its dates).
+        At most FLEXIBLE_SEARCH_MAX_DATES searches are made; later dates are skipped.
+    """
+    date_pairs = _flexible_date_pairs(departure_date_from, departure_date_to, return_date_from, return_date_to)
+    trip_type = 1 if return_date_from else 2
+    semaphore = asyncio.Semaphore(FLEXIBLE_MAX_CONCURRENCY)
+
+    async def _search(pair):
+        departure, ret = pair
+        async with semaphore:
+            return await search_flight_records_async(
+                origin, destination, departure, ret, num_passengers, budget, currency, trip_type
+            )
+
+    outcomes = await asyncio.gather(*(_search(pair) for pair in date_pairs), return_exceptions=True)
+    return _flexible_output(date_pairs, list(outcomes), max_options)
+
+
+def flights_search_flexible(
+    origin: str,
+    destination: str,
+    departure_date_from: str,
+    departure_date_to: str,
+    return_date_from: Optional[str] = None,
+    return_date_to: Optional[str] = None,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    max_options: int = 5,
+) -> FlexibleFlightSearchOutput:
+    """Sync `flights_search_flexible_async`, for callers without an event loop."""
+    return run_sync(flights_search_flexible_async(
+        origin, destination, departure_date_from, departure_date_to, return_date_from, return_date_to,
+        num_passengers, budget, currency, max_options,
+    ))
@@ -1,12 +1,28 @@
 """Tool to search for hotels using SerpApi's Google Hotels API engine."""
+import asyncio
 import logging
 import os
-import math
+import time
 from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
-import requests
+import httpx
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+from google.adk.tools.tool_context import ToolContext
+
+from tripmate.library import constants
+from tripmate.library.http_client import get_client, run_sync
+from tripmate.library.geo import location_points
+from tripmate.library.hotel_ranking import IncrementalRanker, weights_from_profile
+from tripmate.library.normalize import HotelRecord, normalize_hotels
+from tripmate.library.response_cache import get_serpapi_cache
+from tripmate.library.telemetry import set_span_attributes
+from tripmate.tools.memory import scenario_value
+
+# Pagination: later pages are only fetched while they can still change the top results.
+HOTEL_SEARCH_MAX_PAGES = int(os.getenv("HOTEL_SEARCH_MAX_PAGES", "5"))
+HOTEL_SEARCH_LATENCY_BUDGET = float(os.getenv("HOTEL_SEARCH_LATENCY_BUDGET", "8"))
+
 
 class HotelSearchInput(BaseModel):
     #Input for hotel search queries
@@ -118,10 +134,19 @@ class HotelSearchResult(BaseModel):
 class HotelSearchOutput(BaseModel):
     # Output for hotel search results
     hotels: List[HotelSearchResult] = Field(description="A list of hotel options matching the search criteria")
+    currency: Optional[str] = Field(default=None, description="Currency of every rate (ISO code)")
 
 
 # ---------------- API Call & Extraction ----------------
 
+def _accommodation_preferences(tool_context: Optional[ToolContext]) -> Dict[str, Any]:
+    """Read user_profile.preferences.accommodation_preferences from session state, if present."""
+    if tool_context is None:
+        return {}
+    profile = scenario_value(tool_context.state, constants.PROF_KEY) or {}
+    return (profile.get("preferences") or {}).get("accommodation_preferences") or {}
+
+
 def extract_hotel_data(raw: dict) -> HotelSearchResult:
     """Map SerpAPI Google Hotels GET API response dict into Pydantic HotelSearchResult."""
     return HotelSearchResult(
@@ -145,60 +170,112 @@ def extract_hotel_data(raw: dict) -> HotelSearchResult:
     )
 
 
-def compute_hotel_score(hotel, min_price, max_price, max_reviews, avg_stars, weights=None) -> float:
-    """
-    Compute weighted hotel score using:
-    - Price (Non-linear price scaling for rate_per_night.extracted_lowest)
-    - Hotel class (stars / 5)
-    - Rating (rating / 5)
-    - Reviews (log-scaled)
-    - Location (location / 5)
-    - Penalty for low-star hotels
-    """
-    if weights is None:
-        weights = {
-            "price": 0.15,
-            "hotel_class": 0.3,
-            "rating": 0.25,
-            "reviews": 0.2,
-            "location": 0.1
-        }
-
-    price = hotel.get('rate_per_night', {}).get('extracted_lowest', max_price)
-    stars = hotel.get('hotel_class', avg_stars) or avg_stars
-    rating = hotel.get('overall_rating', 0)
-    reviews = hotel.get('reviews', 0)
-    location = hotel.get('location_rating', 5)
-
-    # --- Non-linear Price Scaling ---
-    if max_price > min_price:
-        price_norm = (price - min_price) / (max_price - min_price)
-        price_score = 1 - math.sqrt(price_norm)  # smooth scaling: cheap != huge advantage
-    else:
-        price_score = 1
-
-    # Penalize very low-star hotels so cheap 2-star doesn't dominate
-    if stars < 3:
-        price_score *= 0.7
-
-    # --- Normalization for other features ---
-    hotel_class_score = stars / 5
-    rating_score = rating / 5
-    reviews_score = math.log(1 + reviews) / math.log(1 + max_reviews) if max_reviews > 0 else 0
-    location_score = location / 5  # because location rating is out of 5
-
-    final_score = (
-        weights['price'] * price_score +
-        weights['hotel_class'] * hotel_class_score +
-        weights['rating'] * rating_score +
-        weights['reviews'] * reviews_score +
-        weights['location'] * location_score
+def to_hotel_output(records: List[HotelRecord], include_raw: bool = False, currency: Optional[str] = None) -> HotelSearchOutput:
+    """Build the output model from normalized records in a single batch validation."""
+    return HotelSearchOutput.model_validate({"hotels": [r.to_dict(include_raw) for r in records], "currency": currency})
+
+
+def _hotel_params(
+    search_query: str,
+    check_in_date: str,
+    check_out_date: str,
+    num_passengers: Optional[int],
+    budget: Optional[float],
+    min_rating: Optional[str],
+    hotel_class: Optional[str],
+    currency: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """SerpApi google_hotels parameters, or None if the input fails validation."""
+    # --- Ensure API key is set ---
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key:
+        raise RuntimeError("SERPAPI_API_KEY environment variable is required")
+
+    # --- Convert dict input to Pydantic model safely ---
+    try:
+        hotel_search_input = HotelSearchInput(
+            search_query=search_query,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            num_passengers=num_passengers,
+            budget=budget,
+            min_rating=min_rating,
+            hotel_class=hotel_class,
+            currency=currency
+        )
+    except Exception as e:
+        logging.error(f"Input validation failed: {e}")
+        return None
+
+    return {
+        "engine": "google_hotels",
+        "q": hotel_search_input.search_query,
+        "check_in_date": hotel_search_input.check_in_date,
+        "check_out_date": hotel_search_input.check_out_date,
+        "adults": hotel_search_input.num_passengers,
+        "currency": hotel_search_input.currency,
+        "max_price": int(hotel_search_input.budget),
+        "rating": int(hotel_search_input.min_rating),
+        "hotel_class": hotel_search_input.hotel_class,
+        "api_key": api_key
+    }
+
+
+def _next_page_token(data: Dict[str, Any]) -> Optional[str]:
+    return (data.get("serpapi_pagination") or {}).get("next_page_token")
+
+
+def _page_params(params: Dict[str, Any], token: str) -> Dict[str, Any]:
+    # Each page is its own cache entry; the token is kept verbatim in the cache key.
+    return {**params, "next_page_token": token}
+
+
+def _activity_locations(tool_context: Optional[ToolContext]):
+    """(n, 2) lat/lng of the activities in the session itinerary, if any."""
+    if tool_context is None:
+        return None
+    itinerary = scenario_value(tool_context.state, constants.ITIN_KEY) or {}
+    return location_points(
+        activity for day in itinerary.get("days") or [] for activity in (day.get("activities") or [])
     )
 
-    return final_score
 
+def _new_ranker(max_results: Optional[int], tool_context: Optional[ToolContext]) -> IncrementalRanker:
+    weights = weights_from_profile(_accommodation_preferences(tool_context))
+    anchors = _activity_locations(tool_context) if weights.get("proximity") else None
+    return IncrementalRanker(weights, k=max_results, anchors=anchors)
 
-def hotels_search(
+
+def _stop_reason(ranker: IncrementalRanker, token: Optional[str], max_pages: int, deadline: float) -> Optional[str]:
+    """Why pagination should stop after the pages merged so far, or None to keep going."""
+    if not token:
+        return "last_page"
+    if ranker.pages >= max_pages:
+        return "max_pages"
+    if ranker.stable_pages >= 1:
+        return "stable"
+    if time.monotonic() >= deadline:
+        return "latency_budget"
+    return None
+
+
+def _ranked_output(ranker: IncrementalRanker, stop_reason: str, include_raw: bool, currency: Optional[str] = None) -> HotelSearchOutput:
+    set_span_attributes(pages=ranker.pages, stop_reason=stop_reason, properties=len(ranker.hotels))
+    if not ranker.hotels:
+        logging.warning("No hotels found in API response")
+        return HotelSearchOutput(hotels=[])
+    logging.info(f"Ranked {len(ranker.hotels)} hotels from {ranker.pages} page(s), stopped: {stop_reason}")
+    return to_hotel_output(ranker.top(), include_raw, currency)
+
+
+def _partial_output(ranker: Optional[IncrementalRanker], include_raw: bool, currency: Optional[str] = None) -> HotelSearchOutput:
+    """On a failure, the hotels ranked from the pages already merged (if any)."""
+    if ranker is None or not ranker.pages:
+        return HotelSearchOutput(hotels=[])
+    return _ranked_output(ranker, "error", include_raw, currency)
+
+
+async def hotels_search_async(
         search_query: str,
         check_in_date: str,
         check_out_date: str,
@@ -206,7 +283,12 @@ def hotels_search(
         budget: Optional[float] = 10000.0,
         min_rating: Optional[Literal["7", "8", "9"]] = "7",
         hotel_class: Optional[str] = "2, 3, 4, 5",
-        currency: Optional[str] = "INR"
+        currency: Optional[str] = "INR",
+        max_results: Optional[int] = 20,
+        max_pages: Optional[int] = 1,
+        latency_budget_s: Optional[float] = None,
+        include_raw: bool = False,
+        tool_context: Optional[ToolContext] = None,
     ) -> HotelSearchOutput:
         """
         Search hotels using SerpAPI's Google Hotels API and return structured hotel data (HotelSearchOutput).
@@ -215,108 +297,116 @@ def hotels_search(
         - Builds a query using the input search parameters.
         - Calls the SerpAPI Google Hotels API to fetch hotel listings.
         - Extracts and maps the API response into the defined Pydantic models - HotelSearchOutput.
-        - Uses multi-criteria sorting to rank hotels.
+        - Ranks hotels with a vectorized multi-criteria score (library/hotel_ranking.py),
+          weighted by the user's accommodation_preferences when available; a proximity_preference
+          adds distance to the itinerary's activities (or to the city centre) as a factor.
+        - With max_pages > 1, follows `next_page_token` and re-ranks the merged set as each
+          page arrives (the next page is prefetched while the current one is scored), stopping
+          once a page leaves the top results unchanged or the latency budget runs out.
         - Returns a structured list of hotel search results for further use.
 
         Args:
-            hotel_search_input (HotelSearchInput):
-                Input parameters for the hotel search, including:
-                - search_query: Destination or hotel search term.
-                - check_in_date / check_out_date: Stay period.
-                - num_passengers: Number of adults (optional).
-                - currency: Currency for pricing (optional).
-                - budget: Maximum price per night (optional).
-                - min_rating: Minimum overall rating filter (optional).
-                - hotel_class: Desired hotel class/star rating (optional).
+            search_query: Destination or hotel search term.
+            check_in_date / check_out_date: Stay period (YYYY-MM-DD).
+            num_passengers: Number of adults. Defaults to 2.
+            budget: Maximum price per night. Defaults to 10000.
+            min_rating: Minimum overall rating filter: '7' → 3.5+, '8' → 4.0+, '9' → 4.5+.
+            hotel_class: Comma-separated hotel star ratings, e.g. '3,4,5'.
+            currency: Currency for pricing (ISO code). Defaults to INR.
+            max_results: Number of top-ranked hotels to return. Defaults to 20.
+            max_pages: Maximum result pages to merge (capped by HOTEL_SEARCH_MAX_PAGES). Defaults to 1.
+            latency_budget_s: Time after which no further pages are awaited.
+                Defaults to HOTEL_SEARCH_LATENCY_BUDGET (8s).
+            include_raw: Attach the raw SerpApi property JSON as `rawSearchData` (debugging only).
+            tool_context: Injected by ADK; used to read the user profile for ranking weights.
 
         Returns:
             HotelSearchOutput:
                 A structured object containing:
                 - hotels: List of hotels mapped to HotelSearchResult Pydantic models.
+                - currency: Currency of the rates.
 
         Raises:
             RuntimeError: If SERPAPI_API_KEY environment variable is missing.
-            requests.HTTPError: If the API request fails with a non-2xx status.
             ValueError: If response parsing fails unexpectedly.
 
         Notes:
             - Uses SerpAPI Google Hotels engine (`engine=google_hotels`).
-            - `rawSearchData` field in output retains raw hotel JSON for debugging or advanced usage.
+            - `rawSearchData` is only filled when include_raw=True.
             - Filter results or sort by ratings/prices as needed.
         """
 
-        # --- Ensure API key is set ---
-        api_key = os.getenv("SERPAPI_API_KEY")
-        if not api_key:
-            raise RuntimeError("SERPAPI_API_KEY environment variable is required")
-        
-        # --- Convert dict input to Pydantic model safely ---
-        try:
-            hotel_search_input = HotelSearchInput(
-                search_query=search_query,
-                check_in_date=check_in_date,
-                check_out_date=check_out_date,
-                num_passengers=num_passengers,
-                budget=budget,
-                min_rating=min_rating,
-                hotel_class=hotel_class,
-                currency=currency
-            )
-        except Exception as e:
-            logging.error(f"Input validation failed: {e}")
+        params = _hotel_params(search_query, check_in_date, check_out_date, num_passengers, budget, min_rating, hotel_class, currency)
+        if params is None:
             return HotelSearchOutput(hotels=[])
 
-        base_url = "https://serpapi.com/search.json"
-        params = {
-            "engine": "google_hotels",
-            "q": hotel_search_input.search_query,
-            "check_in_date": hotel_search_input.check_in_date,
-            "check_out_date": hotel_search_input.check_out_date,
-            "adults": hotel_search_input.num_passengers,
-            "currency": hotel_search_input.currency,
-            "max_price": int(hotel_search_input.budget),
-            "rating": int(hotel_search_input.min_rating),
-            "hotel_class": hotel_search_input.hotel_class,
-            "api_key": api_key
-        }
+        max_pages = max(1, min(max_pages or 1, HOTEL_SEARCH_MAX_PAGES))
+        deadline = time.monotonic() + (latency_budget_s or HOTEL_SEARCH_LATENCY_BUDGET)
+
+        # --- Await the API (each page served from cache for repeated searches) ---
+        async def _fetch_page(page_params: Dict[str, Any]) -> Dict[str, Any]:
+            async def _fetch():
+                return await get_client("serpapi").aget_json("/search.json", params=page_params)
 
+            return await get_serpapi_cache().aget_or_fetch("google_hotels", page_params, _fetch)
+
+        ranker = None
         try:
-            # --- Call API ---
-            response = requests.get(base_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # --- Extract hotel data safely ---
-            hotels_raw = data.get("properties", [])
-            if not hotels_raw:
-                logging.warning("No hotels found in API response")
-                return HotelSearchOutput(hotels=[])
-            
-            hotels = [extract_hotel_data(h).model_dump() for h in hotels_raw]
-
-            # --- Compute min/max prices and max reviews for normalization ---
-            prices = [h.get('rate_per_night', {}).get('extracted_lowest', 0) for h in hotels]
-            min_price = min(prices) if prices else 0
-            max_price = max(prices) if prices else 1
-            max_reviews = max(h.get('reviews', 0) for h in hotels) if hotels else 1
-            avg_stars = sum(h.get('hotel_class', 0) for h in hotels) / len(hotels) if hotels else 3
-            
-            logging.info(f"Price range: {min_price} - {max_price}, Max reviews: {max_reviews}, Avg stars: {avg_stars}")
-
-            # --- Apply weighted scoring ---
-            for h in hotels:
-                h['final_score'] = compute_hotel_score(h, min_price, max_price, max_reviews, avg_stars)
-
-            # Sort hotels by final_score descending
-            hotels_sorted = sorted(hotels, key=lambda x: x['final_score'], reverse=True)
-
-            return HotelSearchOutput(hotels=hotels_sorted)
-        
-        except requests.RequestException as e:
+            ranker = _new_ranker(max_results, tool_context)
+            data = await _fetch_page(params)
+            while True:
+                token = _next_page_token(data)
+                hotels = normalize_hotels(data.get("properties") or [])
+                pending = None
+                if token and ranker.pages + 1 < max_pages:
+                    # Request the next page and score this one off the event loop meanwhile
+                    pending = asyncio.ensure_future(_fetch_page(_page_params(params, token)))
+                    await asyncio.to_thread(ranker.add_page, hotels)
+                else:
+                    ranker.add_page(hotels)
+
+                stop_reason = _stop_reason(ranker, token, max_pages, deadline)
+                if stop_reason is None:
+                    try:
+                        data = await asyncio.wait_for(pending, max(0.0, deadline - time.monotonic()))
+                        continue
+                    except asyncio.TimeoutError:
+                        stop_reason = "latency_budget"
+                    except httpx.HTTPError as e:
+                        logging.warning(f"Stopping hotel pagination after page {ranker.pages}: {e}")
+                        stop_reason = "page_error"
+                if pending is not None:
+                    pending.cancel()
+                    # Retrieve the outcome so a failed, already finished prefetch is not reported as unhandled
+                    pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+                return _ranked_output(ranker, stop_reason, include_raw, params["currency"])
+
+        except httpx.HTTPError as e:
             logging.error(f"API request failed: {e}")
-            return HotelSearchOutput(hotels=[])
+            return _partial_output(ranker, include_raw, params["currency"])
 
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
-            return HotelSearchOutput(hotels=[])
+            return _partial_output(ranker, include_raw, params["currency"])
+
 
+def hotels_search(
+        search_query: str,
+        check_in_date: str,
+        check_out_date: str,
+        num_passengers: Optional[int] = 2,
+        budget: Optional[float] = 10000.0,
+        min_rating: Optional[Literal["7", "8", "9"]] = "7",
+        hotel_class: Optional[str] = "2, 3, 4, 5",
+        currency: Optional[str] = "INR",
+        max_results: Optional[int] = 20,
+        max_pages: Optional[int] = 1,
+        latency_budget_s: Optional[float] = None,
+        include_raw: bool = False,
+        tool_context: Optional[ToolContext] = None,
+    ) -> HotelSearchOutput:
+        """Sync `hotels_search_async`, for callers without an event loop."""
+        return run_sync(hotels_search_async(
+            search_query, check_in_date, check_out_date, num_passengers, budget, min_rating, hotel_class,
+            currency, max_results, max_pages, latency_budget_s, include_raw, tool_context,
+        ))
@@ -0,0 +1,146 @@
+"""Tools to read and update itinerary costs without re-adding the whole trip.
+
+Totals come from a per-session CostLedger (library/cost_ledger.py) built
+with one walk over the itinerary and then updated incrementally. Tools that
+edit the itinerary bump constants.ITIN_REVISION (see `touch_itinerary`), and
+the ledger is rebuilt only when the revision it was built for is stale.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from google.adk.tools.tool_context import ToolContext
+
+from tripmate.library import constants
+from tripmate.library.cost_ledger import CostLedger, budget_lines
+from tripmate.tools.memory import ScenarioView
+
+_MAX_LEDGERS = 256
+_ledgers: "OrderedDict[str, Tuple[Any, CostLedger]]" = OrderedDict()
+_ledgers_lock = threading.Lock()
+
+
+class BudgetOverspend(BaseModel):
+    line: str = Field(description="Budget line: stay, food, activities, transport, ... or total")
+    allocated: float
+    spent: float
+    over: float
+
+
+class ItineraryCostSummary(BaseModel):
+    cost_breakdown: Dict[str, float] = Field(description="Totals per category plus the trip total")
+    day_totals: List[float] = Field(description="Total cost per itinerary day, in day order")
+    overspend: List[BudgetOverspend] = Field(description="Budget lines exceeded, largest overrun first")
+    message: Optional[str] = None
+
+
+def touch_itinerary(state: Any) -> int:
+    """Mark the session itinerary as changed; returns the new revision."""
+    revision = (state.get(constants.ITIN_REVISION) or 0) + 1
+    state[constants.ITIN_REVISION] = revision
+    return revision
+
+
+def _session_id(tool_context: ToolContext) -> str:
+    return tool_context.session.id
+
+
+def get_ledger(tool_context: ToolContext) -> CostLedger:
+    """The session's ledger, rebuilt only if the itinerary revision changed since it was built."""
+    state = tool_context.state
+    key, revision = _session_id(tool_context), state.get(constants.ITIN_REVISION)
+    view = ScenarioView(state)
+    budget = budget_lines((view.get(constants.PROF_KEY) or {}).get("preferences"))
+    with _ledgers_lock:
+        cached = _ledgers.get(key)
+        if cached is not None and cached[0] == revision:
+            _ledgers.move_to_end(key)
+            ledger = cached[1]
+            # Budget edits only re-check the lines that changed
+            with ledger.lock:
+                for line in ledger.budget.keys() | budget.keys():
+                    if ledger.budget.get(line) != budget.get(line):
+                        ledger.set_budget(line, budget.get(line))
+            return ledger
+
+    ledger = CostLedger.from_itinerary(view.get(constants.ITIN_KEY) or {}, budget)
+    with _ledgers_lock:
+        _ledgers[key] = (revision, ledger)
+        _ledgers.move_to_end(key)
+        while len(_ledgers) > _MAX_LEDGERS:
+            _ledgers.popitem(last=False)
+    return ledger
+
+
+def _remember(tool_context: ToolContext, revision: int, ledger: CostLedger) -> None:
+    with _ledgers_lock:
+        _ledgers[_session_id(tool_context)] = (revision, ledger)
+
+
+def _summary(ledger: CostLedger, itinerary: Any, message: Optional[str] = None) -> ItineraryCostSummary:
+    days = len((itinerary or {}).get("days") or [])
+    return ItineraryCostSummary(
+        cost_breakdown=ledger.cost_breakdown(),
+        day_totals=[round(ledger.day_total(day), 2) for day in range(days)],
+        overspend=[BudgetOverspend(**row) for row in ledger.overspend()],
+        message=message,
+    )
+
+
+def itinerary_cost_summary(tool_context: ToolContext) -> ItineraryCostSummary:
+    """
+    Current itinerary cost totals and budget check, computed without any arithmetic by the model.
+
+    Returns:
+        ItineraryCostSummary with:
+        - cost_breakdown: stay / food / activities / transport / total.
+        - day_totals: total cost of each day.
+        - overspend: budget allocations (preferences.budget) currently exceeded.
+    """
+    ledger = get_ledger(tool_context)
+    with ledger.lock:
+        return _summary(ledger, ScenarioView(tool_context.state).get(constants.ITIN_KEY))
+
+
+def update_itinerary_item_cost(item_path: str, cost: float, tool_context: ToolContext) -> ItineraryCostSummary:
+    """
+    Change the cost of one itinerary item and update the day total, cost breakdown and budget check.
+
+    Args:
+        item_path: The item to reprice, e.g. "days[0].stays[0]", "days[1].activities[2]",
+            "days[1].activities[2].transport" or "days[2].transport" (a leading "$.itinerary." is accepted).
+        cost: The new cost of the item.
+        tool_context: Injected by ADK.
+
+    Returns:
+        ItineraryCostSummary after the change (message explains an unknown item_path).
+    """
+    ledger = get_ledger(tool_context)
+    path = item_path.strip()
+    for prefix in ("$.itinerary.", "itinerary.", "$."):
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+
+    view = ScenarioView(tool_context.state)
+    # Concurrent tool calls of one session share the ledger: check, reprice and write back as one step
+    with ledger.lock:
+        if ledger.item_cost(path) is None:
+            return _summary(ledger, view.get(constants.ITIN_KEY), message=f"Unknown itinerary item: {item_path}")
+
+        # Copy-on-write: the session gets its own itinerary the first time it is edited
+        itinerary = view.edit(constants.ITIN_KEY)
+        item = itinerary
+        for part in path.replace("]", "").replace("[", ".").split("."):
+            item = item[int(part)] if part.isdigit() else item[part]
+        item["cost"] = cost
+
+        ledger.reprice(path, cost)
+        changed_days = ledger.apply_to(itinerary)
+        tool_context.state[constants.ITIN_KEY] = itinerary
+        _remember(tool_context, touch_itinerary(tool_context.state), ledger)
+        logging.info(f"Repriced {path} to {cost}; rewrote day summaries {changed_days}")
+        return _summary(ledger, itinerary)
@@ -0,0 +1,199 @@
+# itineraryPlannerTool.py
+"""Tool to lay out a trip's activities over its days along short, feasible routes.
+
+Activities are grouped into days by geography and ordered within each day
+around opening hours by library/day_planner.py; the result is written into
+`itinerary.days` (activity times, `day_summary.total_travel_time`) and the
+day totals and cost breakdown are refreshed through the cost ledger.
+
+Activities come from the `activities` argument, else the activities already
+in the itinerary together with the session's `recommendations.activities`,
+else the itinerary's activities alone (re-planning them). Activities that
+fit no day are kept in `recommendations.activities` so they are not lost,
+and scheduled ones are removed from it.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from google.adk.tools.tool_context import ToolContext
+
+from tripmate.library import constants
+from tripmate.library.day_planner import DEFAULT_SPEED_KMH, Stop, activity_stop, clock, clock_minutes, days_for, plan_days
+from tripmate.library.normalize import format_duration
+from tripmate.tools.itineraryCostTool import get_ledger, touch_itinerary
+from tripmate.tools.memory import ScenarioView
+
+
+class PlannedActivity(BaseModel):
+    time: str = Field(description="Start time, HH:MM")
+    end_time: str
+    title: str
+    travel_minutes: int = Field(description="Travel from the previous stop (or the hotel)")
+
+
+class PlannedDay(BaseModel):
+    day: int = Field(description="0-based index into itinerary.days")
+    date: Optional[str] = None
+    activities: List[PlannedActivity] = Field(default_factory=list)
+    total_travel_time: Optional[str] = None
+
+
+class ItineraryPlanOutput(BaseModel):
+    days: List[PlannedDay] = Field(default_factory=list)
+    unscheduled: List[str] = Field(default_factory=list, description="Activities that fit no day (opening hours, day length) or have no location")
+    message: Optional[str] = None
+
+
+def _title(activity: Dict[str, Any]) -> str:
+    return activity.get("title") or activity.get("name") or "Activity"
+
+
+def _point(item: Any) -> Optional[Tuple[float, float]]:
+    location = (item or {}).get("location") if isinstance(item, dict) else None
+    if not isinstance(location, dict):
+        return None
+    lat, lng = location.get("lat"), location.get("lng")
+    if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+        return float(lat), float(lng)
+    return None
+
+
+def _trip_days(view: ScenarioView, itinerary: Dict[str, Any]) -> Tuple[Optional[date], Optional[int]]:
+    """(first date, number of days) from trip_metadata, else from the itinerary's dated days."""
+    metadata = view.get(constants.TRMD_KEY) or {}
+    try:
+        start = date.fromisoformat(metadata.get(constants.START_DATE) or "")
+        end = date.fromisoformat(metadata.get(constants.END_DATE) or "")
+        if end >= start:
+            return start, (end - start).days + 1
+    except ValueError:
+        pass
+    days = itinerary.get("days") or []
+    try:
+        start = date.fromisoformat((days[0] or {}).get("date") or "") if days else None
+    except ValueError:
+        start = None
+    return start, len(days) or None
+
+
+def _source(view: ScenarioView, itinerary: Dict[str, Any], activities: Optional[List[Dict[str, Any]]]) -> Tuple[str, List[Dict[str, Any]]]:
+    if activities:
+        return "arguments", [dict(a) for a in activities if isinstance(a, dict)]
+    planned = [dict(a) for day in itinerary.get("days") or [] for a in (day or {}).get("activities") or [] if isinstance(a, dict)]
+    recommended = (view.get(constants.RECS_KEY) or {}).get("activities") or []
+    if recommended:
+        # Re-plan what is already scheduled together with the recommendations, so nothing is dropped
+        titles = {_title(a) for a in planned}
+        return "recommendations", planned + [dict(a) for a in recommended if isinstance(a, dict) and _title(a) not in titles]
+    return "itinerary", planned
+
+
+def plan_itinerary_days(
+    num_days: Optional[int] = None,
+    activities: Optional[List[Dict[str, Any]]] = None,
+    day_start: str = "09:00",
+    day_end: str = "20:00",
+    default_duration_minutes: int = 90,
+    speed_kmh: float = DEFAULT_SPEED_KMH,
+    tool_context: ToolContext = None,
+) -> ItineraryPlanOutput:
+    """
+    Group activities into days by location and order each day to minimize travel, respecting
+    opening hours, then save the plan into the itinerary. Use this instead of ordering stops yourself.
+
+    Args:
+        num_days: Days to plan. Defaults to the trip dates (trip_metadata), else the itinerary's days.
+        activities: Activities to plan, each with "title", "location" {"lat", "lng", "address"} and
+            optionally "duration_minutes", "open"/"close" ("HH:MM"), "cost". Defaults to the activities
+            already in the itinerary plus the session's recommended activities.
+        day_start: Time each day starts from the hotel, HH:MM.
+        day_end: Time each day must be back at the hotel, HH:MM.
+        default_duration_minutes: Visit length for activities without duration_minutes.
+        speed_kmh: Average door-to-door travel speed in the city.
+
+    Returns:
+        ItineraryPlanOutput with each day's activities (start/end times and travel between them)
+        and the activities that could not be scheduled.
+    """
+    view = ScenarioView(tool_context.state)
+    itinerary = view.get(constants.ITIN_KEY) or {}
+    first_date, trip_days = _trip_days(view, itinerary)
+    source, pool = _source(view, itinerary, activities)
+    if not pool:
+        return ItineraryPlanOutput(message="No activities to plan: pass activities or get recommendations first")
+
+    routable = [a for a in pool if _point(a) is not None]
+    unscheduled = [a for a in pool if _point(a) is None]
+    k = max(1, num_days or trip_days or days_for(len(routable)))
+
+    # Each day starts and ends at its stay; days without one use the activities' centre
+    existing = itinerary.get("days") or []
+    stays = [_point(((existing[d] or {}).get("stays") or [None])[0]) if d < len(existing) else None for d in range(k)]
+    points = [_point(a) for a in routable]
+    center = tuple(np.mean(points, axis=0)) if points else (0.0, 0.0)
+    stops: List[Stop] = [activity_stop(a, i, default_duration_minutes) for i, a in enumerate(routable)]
+    depots = []
+    for stay in stays:
+        depots.append(len(points))
+        points.append(stay or center)
+
+    start, end = clock_minutes(day_start, 9 * 60), clock_minutes(day_end, 20 * 60)
+    routes, leftover = plan_days(np.array(points, dtype=float), stops, depots, start, end, speed_kmh)
+    unscheduled += [routable[i] for i in leftover]
+
+    # Copy-on-write: the session gets its own itinerary the first time it is edited
+    if view.get(constants.ITIN_KEY) is None:
+        tool_context.state[constants.ITIN_KEY] = {}
+    itinerary = view.edit(constants.ITIN_KEY)
+    days = itinerary.setdefault("days", [])
+    output = ItineraryPlanOutput()
+    for d, route in enumerate(routes):
+        if d >= len(days):
+            days.append({"stays": [], "activities": [], "day_summary": {}})
+        day = days[d]
+        if first_date is not None:
+            day["date"] = (first_date + timedelta(days=d)).isoformat()
+        day["activities"] = []
+        planned = []
+        for visit in route.visits:
+            activity = routable[visit.stop]
+            activity["time"] = clock(visit.start)
+            day["activities"].append(activity)
+            planned.append(PlannedActivity(time=clock(visit.start), end_time=clock(visit.end), title=_title(activity), travel_minutes=round(visit.travel)))
+        summary = day.setdefault("day_summary", {})
+        summary["total_travel_time"] = format_duration(round(route.travel_minutes))
+        summary["total_cost"] = 0  # rewritten from the ledger below when the day has priced items
+        output.days.append(PlannedDay(day=d, date=day.get("date"), activities=planned, total_travel_time=summary["total_travel_time"]))
+    if source != "arguments":
+        # The itinerary's activities were part of the pool and re-planned into the first days
+        for day in days[len(routes):]:
+            day["activities"] = []
+            day.setdefault("day_summary", {}).update(total_cost=0, total_travel_time=None)
+
+    # Recommendations keep what did not fit and lose what was scheduled, so the two never overlap
+    scheduled_titles = {_title(routable[v.stop]) for route in routes for v in route.visits}
+    recommended = (view.get(constants.RECS_KEY) or {}).get("activities") or []
+    if unscheduled or any(_title(a) in scheduled_titles for a in recommended):
+        if view.get(constants.RECS_KEY) is None:
+            tool_context.state[constants.RECS_KEY] = {}
+        recommendations = view.edit(constants.RECS_KEY)
+        kept = [a for a in recommendations.get("activities") or [] if _title(a) not in scheduled_titles]
+        kept_titles = {_title(a) for a in kept}
+        recommendations["activities"] = kept + [a for a in unscheduled if _title(a) not in kept_titles]
+        tool_context.state[constants.RECS_KEY] = recommendations
+
+    touch_itinerary(tool_context.state)
+    ledger = get_ledger(tool_context)
+    with ledger.lock:
+        ledger.apply_to(itinerary)
+    tool_context.state[constants.ITIN_KEY] = itinerary
+
+    output.unscheduled = [_title(a) for a in unscheduled]
+    scheduled = sum(len(r.visits) for r in routes)
+    output.message = f"Planned {scheduled} of {len(pool)} activities over {len(routes)} days"
+    logging.info(f"plan_itinerary_days: {output.message} ({source}), {len(unscheduled)} unscheduled")
+    return output
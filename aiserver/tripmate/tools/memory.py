@@ -1,21 +1,140 @@
 from google.adk.agents.callback_context import CallbackContext
 import json
+import logging
 import os
+import threading
 
 from tripmate.library import constants
+from tripmate.library.state_store import get_state_store
 from datetime import datetime
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Iterator, Mapping, Optional, Tuple
 from google.adk.sessions.state import State
 
-SAMPLE_SCENARIO_PATH = os.getenv("TRIPMATE_SCENARIO","aiserver/tripmate/profiles/itinerary_empty_default.json")
+SAMPLE_SCENARIO_PATH = os.getenv(
+    "TRIPMATE_SCENARIO",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles", "itinerary_empty_default.json"),
+)
 
-def _set_initial_states(source: Dict[str, Any], target: State | dict[str, Any]):
+
+# ---------------- Scenario Cache ----------------
+
+def _freeze(value: Any) -> Any:
+    """Read-only deep view of parsed JSON: dicts become mappingproxies and lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Mutable deep copy of a frozen value, safe to store in and edit through session state."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class ScenarioStore:
+    """
+    Parses scenario/profile JSON files once and shares the result across sessions.
+
+    A file is re-read only when its mtime or size changes. The parsed document
+    is frozen, so every session can hold the same object without copying it.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[int, int], Mapping[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Mapping[str, Any]:
+        """Return the frozen `state` document of a scenario file."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            with open(path, "r") as file:
+                data = json.load(file)
+            base = _freeze(data.get("state", {}))
+            self._entries[path] = (signature, base)
+            logging.info(f"Loaded scenario {path} ({stat.st_size} bytes, {len(base)} keys)")
+            return base
+
+
+_scenario_store = ScenarioStore()
+
+
+def get_scenario_store() -> ScenarioStore:
+    return _scenario_store
+
+
+class ScenarioView(Mapping):
+    """
+    Copy-on-write view of one session: keys in session state shadow the shared scenario base.
+
+    Reads fall through to the frozen base. `edit(key)` copies a base value into
+    session state on first use and returns the session's own mutable copy.
+    """
+
+    def __init__(self, state: State | dict[str, Any], base: Optional[Mapping[str, Any]] = None):
+        self.state = state
+        self.base = base if base is not None else _session_base(state)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.state:
+            return self.state[key]
+        return self.base[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.base
+        for key in self.state:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def edit(self, key: str) -> Any:
+        if key not in self.state and key in self.base:
+            self.state[key] = _thaw(self.base[key])
+        return self.state[key]
+
+
+def _session_base(state: State | dict[str, Any]) -> Mapping[str, Any]:
+    path = state.get(constants.SCENARIO_PATH)
+    if not path:
+        return MappingProxyType({})
+    try:
+        return _scenario_store.load(path)
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not load scenario {path}: {e}")
+        return MappingProxyType({})
+
+
+def scenario_value(state: State | dict[str, Any], key: str, default: Any = None) -> Any:
+    """Session value for `key`, falling back to the session's shared scenario base."""
+    return ScenarioView(state).get(key, default)
+
+
+# ---------------- Session Initialization ----------------
+
+def _set_initial_states(source: Mapping[str, Any], target: State | dict[str, Any], base: Optional[Mapping[str, Any]] = None):
     """
     Setting the initial session state given a JSON object of states.
 
+    Only keys whose value differs from what the session already sees (its own
+    state, then the shared scenario `base`) are written, so the session
+    delta stays small.
+
     Args:
         source: A JSON object of states.
         target: The session state object to insert into.
+        base: The frozen scenario the session falls back to, if any.
     """
     if constants.SYSTEM_TIME not in target:
         target[constants.SYSTEM_TIME] = str(datetime.now())
@@ -23,9 +142,13 @@ def _set_initial_states(source: Dict[str, Any], target: State | dict[str, Any]):
     if constants.ITIN_INITIALIZED not in target:
         target[constants.ITIN_INITIALIZED] = True
 
-        target.update(source)
+        view = ScenarioView(target, base)
+        if source is not view.base:
+            for key, value in source.items():
+                if view.get(key) != value:
+                    target[key] = _thaw(value)
 
-        trip_metadata = source.get(constants.TRMD_KEY, {})
+        trip_metadata = view.get(constants.TRMD_KEY) or {}
         if trip_metadata:
             target[constants.ITIN_START_DATE] = trip_metadata.get(constants.ITIN_START_DATE, "")
             target[constants.ITIN_END_DATE] = trip_metadata.get(constants.ITIN_END_DATE, "")
@@ -37,15 +160,20 @@ def _load_precreated_itinerary(callback_context: CallbackContext):
     Set this as a callback as before_agent_call of the root_agent.
     This gets called before the system instruction is contructed.
 
+    The scenario is parsed once per file version (see ScenarioStore); the
+    session only records its path plus derived keys and reads the rest
+    through `scenario_value` / `ScenarioView`.
+
     Args:
         callback_context: The callback context.
-    """    
-    data = {}
-    with open(SAMPLE_SCENARIO_PATH, "r") as file:
-        data = json.load(file)
-        print(f"\nLoading Initial State: {data}\n")
+    """
+    state = callback_context.state
+    if constants.ITIN_INITIALIZED in state:
+        return
 
-    _set_initial_states(data["state"], callback_context.state)
+    base = _scenario_store.load(SAMPLE_SCENARIO_PATH)
+    state[constants.SCENARIO_PATH] = os.path.abspath(SAMPLE_SCENARIO_PATH)
+    _set_initial_states(base, state, base)
 
 def _load_state_from_memory(callback_context: CallbackContext):
     """
@@ -55,9 +183,42 @@ def _load_state_from_memory(callback_context: CallbackContext):
 
     Args:
         callback_context: The callback context.
-    """    
-    memory = callback_context.agent.memory
+    """
+    memory = getattr(callback_context.agent, "memory", None)
     if memory is not None:
         mem_state = memory.get_state()
-        print(f"\nLoading State from Memory: {mem_state}\n")
-        _set_initial_states(mem_state, callback_context.state)
\ No newline at end of file
+        logging.debug(f"Loading state from memory ({len(mem_state)} keys)")
+        _set_initial_states(mem_state, callback_context.state)
+
+
+# ---------------- Durable Trip State ----------------
+
+def _persist_trip_state(callback_context: CallbackContext):
+    """
+    Persists the session's own trip keys (user_profile, itinerary, ...) to the state store.
+    Set this as an after_agent_callback; only rows whose content changed are written.
+
+    Args:
+        callback_context: The callback context.
+    """
+    state = callback_context.state
+    values = {key: state[key] for key in constants.TRIP_DOCUMENT_KEYS if key in state}
+    if values:
+        written = get_state_store().put_many(callback_context.session.id, values)
+        logging.debug(f"Persisted trip state: {written} row(s) changed")
+
+def _load_trip_state(*keys: str):
+    """
+    Builds a before_agent_callback that loads only `keys` from the state store into
+    session state, for keys the session does not already hold.
+
+    Args:
+        keys: Top-level trip keys the agent needs, e.g. constants.PROF_KEY.
+    """
+    def _load(callback_context: CallbackContext):
+        state = callback_context.state
+        missing = [key for key in keys if key not in state]
+        if missing:
+            state.update(get_state_store().load(callback_context.session.id, missing))
+
+    return _load
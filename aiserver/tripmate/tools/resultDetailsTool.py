@@ -0,0 +1,72 @@
+# resultDetailsTool.py
+"""Tool to fetch the full details of earlier search results by their result_handle.
+
+Search tool outputs reach the model as compact projections (see
+library/projection.py); the complete output stays server-side under the
+`result_handle` included in each projection.
+"""
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from google.adk.tools.tool_context import ToolContext
+
+from tripmate.library.projection import PROJECTIONS, fit_lists, get_result_store, result_items, token_budget
+
+
+class ResultDetailsOutput(BaseModel):
+    tool: Optional[str] = Field(default=None, description="Tool that produced the result")
+    list_name: Optional[str] = Field(default=None, description="Result list the items come from, e.g. flights or hotels")
+    items: List[Dict[str, Any]] = Field(default_factory=list, description="Full items, each with its index in the list")
+    total: int = Field(default=0, description="Number of items in the full result list")
+    message: Optional[str] = None
+
+
+def tool_result_details(
+    result_handle: str,
+    indices: Optional[List[int]] = None,
+    fields: Optional[List[str]] = None,
+    list_name: Optional[str] = None,
+    tool_context: ToolContext = None,
+) -> ResultDetailsOutput:
+    """
+    Fetch full details of results from an earlier search, by the `result_handle` it returned.
+
+    Use this for details the search summary left out (segments, amenities,
+    essential info, booking tokens, ...) or for more results than were shown
+    (see the summary's `truncated` counts).
+
+    Args:
+        result_handle: The `result_handle` from an earlier search result in this conversation.
+        indices: 0-based positions in the result list (the order results were shown).
+            Defaults to the next results after the ones already shown.
+        fields: Only return these fields of each item (e.g. ["amenities", "essential_info"]).
+        list_name: Result list to read (e.g. "flights", "hotels", "options"). Defaults to the tool's main list.
+
+    Returns:
+        ResultDetailsOutput with the requested items; `message` explains an unknown or expired handle.
+    """
+    entry = get_result_store().get(tool_context.session.id, result_handle)
+    if entry is None:
+        return ResultDetailsOutput(message=f"Unknown or expired result_handle '{result_handle}'; run the search again")
+    tool_name, result, shown = entry
+
+    spec = PROJECTIONS.get(tool_name)
+    list_name = list_name or (spec.ranked[0] if spec and spec.ranked else None)
+    if not isinstance(result.get(list_name), list):
+        lists = [k for k, v in result.items() if isinstance(v, list)]
+        return ResultDetailsOutput(tool=tool_name, message=f"No result list '{list_name}'; available: {', '.join(lists)}")
+
+    total = len(result[list_name])
+    if indices is None:
+        start = shown.get(list_name, 0)
+        indices = list(range(start, min(total, start + (spec.top_n if spec else 10))))
+    document = {"items": result_items(result, list_name, indices, fields)}
+    found = len(document["items"])
+    kept = fit_lists(document, ("items",), token_budget(spec))
+    message = None
+    if kept["items"] < found:
+        message = f"Only {kept['items']} of {found} items fit; request the rest by index or with fewer fields"
+    elif not document["items"]:
+        message = f"No items at those indices; the list has {total} items"
+    return ResultDetailsOutput(tool=tool_name, list_name=list_name, items=document["items"], total=total, message=message)
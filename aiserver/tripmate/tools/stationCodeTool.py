@@ -1,10 +1,18 @@
 # stationCodeTool.py
-"""Tool to get Railway Station Codes using a custom agent with Google Search"""
+"""Tools to get Railway Station Codes.
+
+`railway_station_code_lookup` answers from the offline index in library/code_resolver.py.
+`railway_station_code_tool` (an agent with Google Search) is the fallback on a miss.
+"""
+from typing import Any, Dict
+
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
 from google.adk.tools.google_search_tool import google_search
 
+from tripmate.library.code_resolver import get_station_index
+
 _station_code_agent = Agent(
     model="gemini-2.5-flash",
     name="TrainStationCodeAgent",
@@ -19,4 +27,37 @@ _station_code_agent = Agent(
     tools=[google_search],
 )
 
-railway_station_code_tool = AgentTool(agent=_station_code_agent)
\ No newline at end of file
+railway_station_code_tool = AgentTool(agent=_station_code_agent)
+
+def railway_station_code_lookup(location: str) -> Dict[str, Any]:
+    """
+    Resolve an Indian railway station name, city or location into its Station Code using the offline index.
+
+    Args:
+        location: Station name, city or location (e.g. "Mumbai Central", "Bangalore").
+
+    Returns:
+        dict with:
+        - status: "found" or "not_found".
+        - station_code, station_name, city, match_type, confidence for the best match.
+        - alternatives: other candidate stations (e.g. other terminals in the city).
+        On "not_found" use railway_station_code_tool instead.
+    """
+    matches = get_station_index().lookup(location)
+    if not matches:
+        return {
+            "status": "not_found",
+            "query": location,
+            "message": "Railway Station Code not found in local index, use railway_station_code_tool",
+        }
+    best = matches[0]
+    return {
+        "status": "found",
+        "query": location,
+        "station_code": best.code,
+        "station_name": best.name,
+        "city": best.city,
+        "match_type": best.match_type,
+        "confidence": best.confidence,
+        "alternatives": [{"station_code": m.code, "station_name": m.name, "city": m.city} for m in matches[1:]],
+    }
@@ -1,11 +1,17 @@
 # trainSearchTool.py
 """Tool to search for trains using RailRadar's APIs"""
 import os
-import requests
-from typing import Optional, List
+import asyncio
+import logging
+import httpx
+from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 
+from tripmate.library.http_client import get_client, run_sync
+from tripmate.library.telemetry import add_to_span
+from tripmate.library.train_schedule_store import get_schedule_store
+
 # --------------------------
 # Pydantic Models
 # --------------------------
@@ -35,7 +41,6 @@ class TrainSearchOutput(BaseModel):
 # API Client
 # --------------------------
 
-API_BASE = "https://railradar.in/api/v1"
 API_KEY = os.getenv("RAILRADAR_API_KEY")
 
 HEADERS = {
@@ -43,6 +48,11 @@ HEADERS = {
     "x-api-key": API_KEY
 }
 
+# Overall deadline (seconds) for the per-train schedule fan-out; trains still pending are dropped.
+SCHEDULE_DEADLINE = float(os.getenv("RAILRADAR_SCHEDULE_DEADLINE", "20"))
+# Maximum number of schedule lookups in flight at once.
+MAX_CONCURRENCY = int(os.getenv("RAILRADAR_MAX_CONCURRENCY", "8"))
+
 def subtract_days(date_str: str, days: int) -> str:
     date_obj = datetime.strptime(date_str, "%Y-%m-%d")
     new_date = date_obj - timedelta(days=days)
@@ -57,7 +67,152 @@ def format_date_dd_mmm_yyyy(date_str: str) -> str:
     date_obj = datetime.strptime(date_str, "%Y-%m-%d")
     return date_obj.strftime("%d-%b-%Y")
 
-def train_search(
+async def fetch_schedule_async(train_number: str, departure_date: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the schedule of a single train for the journey date.
+
+    Returns the schedule `data` object, or None if the call fails or times out
+    so a single bad train never aborts the whole search.
+    """
+    schedule_params = {"journeyDate": departure_date}
+    try:
+        sched_resp = await get_client("railradar").aget_json(
+            f"/trains/{train_number}/schedule", params=schedule_params, headers=HEADERS
+        )
+        return sched_resp.get("data")
+    except httpx.HTTPError as e:
+        logging.warning(f"Schedule API failed for train {train_number}: {e}")
+        return None
+    except ValueError as e:
+        logging.warning(f"Schedule API returned invalid JSON for train {train_number}: {e}")
+        return None
+
+
+async def fetch_schedules_async(train_numbers: List[str], departure_date: str) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fetch schedules for many trains, at most MAX_CONCURRENCY in flight.
+
+    The result list is aligned with `train_numbers`. Lookups that fail or do not
+    finish within SCHEDULE_DEADLINE are returned as None.
+    """
+    if not train_numbers:
+        return []
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def _fetch(train_number: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            return await fetch_schedule_async(train_number, departure_date)
+
+    tasks = [asyncio.ensure_future(_fetch(n)) for n in train_numbers]
+    done, not_done = await asyncio.wait(tasks, timeout=SCHEDULE_DEADLINE)
+    if not_done:
+        logging.warning(f"{len(not_done)} schedule lookups missed the {SCHEDULE_DEADLINE}s deadline")
+        for task in not_done:
+            task.cancel()
+    return [t.result() if t in done else None for t in tasks]
+
+
+def build_train_result(
+    train: Dict[str, Any],
+    sched_data: Optional[Dict[str, Any]],
+    origin: str,
+    destination: str,
+    departure_date: str,
+) -> Optional[TrainResult]:
+    """Build a TrainResult if the train runs origin -> destination on departure_date, else None."""
+    if not sched_data:
+        return None
+
+    sched_data_availableStartDate = sched_data.get("availableStartDates")
+    if not sched_data_availableStartDate:
+        return None  # Train info not found!
+
+    route = sched_data.get("route") or []
+    toStartDate = None
+    for stop in route:
+        if stop["station"]["code"] == origin:
+            journey_day = int(stop.get("journeyDay", 1))
+            toStartDate = subtract_days(departure_date, journey_day - 1)
+            break
+
+    if not toStartDate or format_date_dd_mmm_yyyy(toStartDate) not in sched_data_availableStartDate:
+        return None  # Train not arriving in the origin station at the departure_date
+
+    departure_time, arrival_time, arrival_date = None, None, None
+
+    for stop in route:
+        if stop["station"]["code"] == origin:
+            departure_time = stop["schedule"]["departure"]
+        if stop["station"]["code"] == destination:
+            journey_day = int(stop.get("journeyDay", 1))  # default 1 if missing
+            arrival_date = add_days(departure_date, journey_day - 1)
+            arrival_time = stop["schedule"]["arrival"]
+            break
+
+    # Only include trains with valid times for both origin and destination
+    if not (departure_time and arrival_time):
+        return None
+
+    return TrainResult(
+        trainNumber=train.get("trainNumber"),
+        trainName=train.get("trainName"),
+        sourceStationCode=origin,
+        destinationStationCode=destination,
+        departureTime=departure_time,
+        departureDate=departure_date,
+        arrivalTime=arrival_time,
+        arrivalDate=arrival_date
+    )
+
+
+def _fallback_trains(store, origin: str, destination: str, error: Exception) -> List[Dict[str, Any]]:
+    """Answer from cached routes if we know any trains on this corridor; otherwise re-raise `error`."""
+    local = store.trains_between(origin, destination)
+    if not local:
+        raise error
+    logging.warning(f"Trains between API failed ({error}); answering from {len(local)} cached schedules")
+    return [
+        {"trainNumber": n, "trainName": store.get_schedule(n).get("trainName") or n} for n in local
+    ]
+
+
+def _stale_trains(store, trains_between: List[Dict[str, Any]], origin: str, departure_date: str) -> List[Dict[str, Any]]:
+    stale = [
+        t for t in trains_between
+        if store.needs_refresh(t.get("trainNumber"), origin, departure_date)
+    ]
+    add_to_span("cache_hits", len(trains_between) - len(stale))
+    add_to_span("cache_misses", len(stale))
+    return stale
+
+
+def _store_and_build(
+    store,
+    trains_between: List[Dict[str, Any]],
+    stale: List[Dict[str, Any]],
+    fetched: List[Optional[Dict[str, Any]]],
+    origin: str,
+    destination: str,
+    departure_date: str,
+) -> TrainSearchOutput:
+    for train, sched_data in zip(stale, fetched):
+        if sched_data:
+            store.put_schedule(train.get("trainNumber"), sched_data, train.get("trainName"))
+
+    # 3. Keep trains that actually run on the date, in the order RailRadar returned them.
+    #    A train whose refresh failed falls back to its stale cached schedule, if any.
+    results: List[TrainResult] = []
+    for train in trains_between:
+        sched_data = store.get_schedule(train.get("trainNumber"))
+        result = build_train_result(train, sched_data, origin, destination, departure_date)
+        if result is not None:
+            results.append(result)
+
+    return TrainSearchOutput(trains=results)
+
+
+async def train_search_async(
     origin: str,
     destination: str,
     departure_date: str,
@@ -65,68 +220,41 @@ def train_search(
     budget: float = 3000.0,
     currency: str = "INR"
 ) -> TrainSearchOutput:
+    """Search trains between two railway station codes on the departure date (YYYY-MM-DD)."""
     if not API_KEY:
         raise ValueError("Missing API key: Set environment variable RAILRADAR_API_KEY")
 
-    # 1. Get trains between stations
-    url = f"{API_BASE}/trains/between"
-    params = {"from": origin, "to": destination}
-    resp = requests.get(url, headers=HEADERS, params=params)
-    resp.raise_for_status()
-    trains_between = resp.json().get("data", [])
+    # The store reads and writes SQLite; keep that off the event loop
+    store = await asyncio.to_thread(get_schedule_store)
 
-    results: List[TrainResult] = []
+    # 1. Get trains between stations (cached per station pair)
+    trains_between = await asyncio.to_thread(store.get_pair, origin, destination)
+    add_to_span("cache_hits" if trains_between is not None else "cache_misses")
+    if trains_between is None:
+        params = {"from": origin, "to": destination}
+        try:
+            trains_between = (await get_client("railradar").aget_json(
+                "/trains/between", params=params, headers=HEADERS
+            )).get("data", [])
+            await asyncio.to_thread(store.put_pair, origin, destination, trains_between)
+        except httpx.HTTPError as e:
+            trains_between = _fallback_trains(store, origin, destination, e)
 
-    # 2. For each train, fetch schedule with journey date
-    for train in trains_between:
-        train_number = train.get("trainNumber")
-        train_name = train.get("trainName")
-
-        schedule_url = f"{API_BASE}/trains/{train_number}/schedule"
-        schedule_params = {"journeyDate": departure_date}
-        sched_resp = requests.get(schedule_url, headers=HEADERS, params=schedule_params)
-
-        if sched_resp.status_code != 200:
-            print("Schedule API returned", sched_resp)
-            continue  # skip train if schedule API fails
-
-        sched_data = sched_resp.json().get("data")
-        sched_data_availableStartDate = sched_data["availableStartDates"]
-        if not sched_data_availableStartDate or len(sched_data_availableStartDate) == 0:
-            continue  # Train info not found!
-        
-        for route in sched_data["route"]:
-            if(route["station"]["code"] == origin):
-                journey_day = int(route.get("journeyDay", 1))
-                toStartDate = subtract_days(departure_date,journey_day - 1)
-                break
-        
-        if not toStartDate or format_date_dd_mmm_yyyy(toStartDate) not in sched_data_availableStartDate:
-            continue #Train not arriving in the origin station at the departure_date
-
-        route = sched_data["route"]
-        departure_time, arrival_time, arrival_date = None, None, None
-
-        for stop in route:
-            if stop["station"]["code"] == origin:
-                departure_time = stop["schedule"]["departure"]
-            if stop["station"]["code"] == destination:
-                journey_day = int(stop.get("journeyDay", 1))  # default 1 if missing
-                arrival_date = add_days(departure_date, journey_day - 1)
-                arrival_time = stop["schedule"]["arrival"]
-                break
-
-        # Only include trains with valid times for both origin and destination
-        if departure_time and arrival_time:
-            results.append(TrainResult(
-                trainNumber=train_number,
-                trainName=train_name,
-                sourceStationCode=origin,
-                destinationStationCode=destination,
-                departureTime=departure_time,
-                departureDate=departure_date,
-                arrivalTime=arrival_time,
-                arrivalDate=arrival_date
-            ))
+    # 2. Fetch schedules that are missing or stale, concurrently; the rest come from the store
+    stale = _stale_trains(store, trains_between, origin, departure_date)
+    fetched = await fetch_schedules_async([t.get("trainNumber") for t in stale], departure_date)
+    return await asyncio.to_thread(
+        _store_and_build, store, trains_between, stale, fetched, origin, destination, departure_date
+    )
 
-    return TrainSearchOutput(trains=results)
+
+def train_search(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    num_passengers: int = 1,
+    budget: float = 3000.0,
+    currency: str = "INR"
+) -> TrainSearchOutput:
+    """Sync `train_search_async`, for callers without an event loop."""
+    return run_sync(train_search_async(origin, destination, departure_date, num_passengers, budget, currency))
@@ -0,0 +1,271 @@
+# transportCompareTool.py
+"""Tool to compare flights and trains between two places in one call.
+
+Resolves the airport (IATA) and railway station codes from the offline
+indexes in library/code_resolver.py, runs the flight and train searches
+concurrently and merges both into one ranked list of TransportOptions with
+price, departure/arrival and an estimated door-to-door duration.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from tripmate.library.code_resolver import get_airport_index, get_station_index
+from tripmate.library.http_client import run_sync
+from tripmate.library.normalize import FlightRecord
+from tripmate.tools.flightSearchTool import search_flight_records_async
+from tripmate.tools.trainSearchTool import TrainResult, train_search_async
+
+# Time added to the scheduled journey to estimate door to door: getting to the
+# airport/station, check-in or boarding, and leaving at the other end.
+FLIGHT_OVERHEAD_MINUTES = int(os.getenv("TRANSPORT_FLIGHT_OVERHEAD_MIN", "150"))
+TRAIN_OVERHEAD_MINUTES = int(os.getenv("TRANSPORT_TRAIN_OVERHEAD_MIN", "45"))
+
+
+class TransportOption(BaseModel):
+    mode: Literal["flight", "train"]
+    name: str = Field(description="Airline(s) for a flight, train name and number for a train")
+    origin_code: str
+    destination_code: str
+    departure: Optional[str] = Field(default=None, description="Departure as 'YYYY-MM-DD HH:MM'")
+    arrival: Optional[str] = Field(default=None, description="Arrival as 'YYYY-MM-DD HH:MM'")
+    price: Optional[float] = Field(default=None, description="Fare, if the provider returns one (trains do not)")
+    currency: Optional[str] = None
+    stops: Optional[int] = None
+    travel_minutes: Optional[int] = Field(default=None, description="Scheduled departure to arrival")
+    door_to_door_minutes: Optional[int] = Field(default=None, description="travel_minutes plus typical access/boarding time")
+    booking_token: Optional[str] = None
+
+
+class TransportComparisonOutput(BaseModel):
+    origin_airport: Optional[str] = None
+    destination_airport: Optional[str] = None
+    origin_station: Optional[str] = None
+    destination_station: Optional[str] = None
+    options: List[TransportOption] = Field(description="Flights and trains in one list, ranked by sort_by")
+    fastest: Optional[TransportOption] = Field(default=None, description="Shortest door-to-door option")
+    cheapest: Optional[TransportOption] = Field(default=None, description="Cheapest option with a known price")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Per mode: why it was skipped or failed")
+
+
+# ---------------- Code Resolution ----------------
+
+# Weaker (fuzzy) matches are left for the lookup tools, where the agent can check them.
+MIN_CODE_CONFIDENCE = 0.75
+
+
+def _resolve(index, place: str) -> Optional[str]:
+    matches = index.lookup(place)
+    return matches[0].code if matches and matches[0].confidence >= MIN_CODE_CONFIDENCE else None
+
+
+def _resolve_codes(
+    origin: str,
+    destination: str,
+    overrides: Dict[str, Tuple[Optional[str], Optional[str]]],
+) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, str]]:
+    """Per mode, (origin code, destination code) where both ends resolve; otherwise an error message."""
+    codes, errors = {}, {}
+    for mode, index, fallback in (
+        ("flight", get_airport_index(), "airport_iata_code_tool"),
+        ("train", get_station_index(), "railway_station_code_tool"),
+    ):
+        given = overrides.get(mode, (None, None))
+        ends = (given[0] or _resolve(index, origin), given[1] or _resolve(index, destination))
+        if None in ends:
+            missing = origin if ends[0] is None else destination
+            errors[mode] = f"No {mode} code found for '{missing}'; resolve it with {fallback} and search {mode}s directly"
+        elif ends[0] == ends[1]:
+            errors[mode] = f"Origin and destination share the code {ends[0]}"
+        else:
+            codes[mode] = ends
+    return codes, errors
+
+
+# ---------------- Normalization ----------------
+
+def _minutes_between(start: Optional[str], end: Optional[str]) -> Optional[int]:
+    try:
+        delta = datetime.strptime(end, "%Y-%m-%d %H:%M") - datetime.strptime(start, "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+    return int(delta.total_seconds() // 60) if delta.total_seconds() >= 0 else None
+
+
+def _flight_option(record: FlightRecord, origin: str, destination: str) -> TransportOption:
+    segments = record.segments
+    departure = segments[0].departure_time if segments else None
+    arrival = segments[-1].arrival_time if segments else None
+    minutes = record.raw.get("total_duration")
+    if not isinstance(minutes, (int, float)):
+        minutes = _minutes_between(departure, arrival)
+    return TransportOption(
+        mode="flight",
+        name=", ".join(record.airlines) or "Flight",
+        origin_code=origin,
+        destination_code=destination,
+        departure=departure,
+        arrival=arrival,
+        price=record.price,
+        currency=record.currency,
+        stops=record.stops,
+        travel_minutes=int(minutes) if minutes is not None else None,
+        door_to_door_minutes=int(minutes) + FLIGHT_OVERHEAD_MINUTES if minutes is not None else None,
+        booking_token=record.booking_token,
+    )
+
+
+def _train_option(train: TrainResult) -> TransportOption:
+    departure = f"{train.departureDate} {train.departureTime[:5]}" if train.departureDate and train.departureTime else None
+    arrival = f"{train.arrivalDate} {train.arrivalTime[:5]}" if train.arrivalDate and train.arrivalTime else None
+    minutes = _minutes_between(departure, arrival)
+    return TransportOption(
+        mode="train",
+        name=f"{train.trainName} ({train.trainNumber})",
+        origin_code=train.sourceStationCode,
+        destination_code=train.destinationStationCode,
+        departure=departure,
+        arrival=arrival,
+        travel_minutes=minutes,
+        door_to_door_minutes=minutes + TRAIN_OVERHEAD_MINUTES if minutes is not None else None,
+    )
+
+
+def _sort_key(sort_by: str):
+    def _key(option: TransportOption):
+        if sort_by == "price":
+            return (option.price is None, option.price or 0, option.door_to_door_minutes or 0)
+        if sort_by == "departure":
+            return (option.departure is None, option.departure or "")
+        return (option.door_to_door_minutes is None, option.door_to_door_minutes or 0, option.price or 0)
+    return _key
+
+
+def _comparison(
+    codes: Dict[str, Tuple[str, str]],
+    errors: Dict[str, str],
+    flights: Any,
+    trains: Any,
+    sort_by: str,
+    max_results: int,
+) -> TransportComparisonOutput:
+    options: List[TransportOption] = []
+    if isinstance(flights, Exception):
+        logging.error(f"Flight search failed: {flights}")
+        errors["flight"] = f"Flight search failed: {flights}"
+    elif flights is not None:
+        origin, destination = codes["flight"]
+        options.extend(_flight_option(r, origin, destination) for r in flights)
+    if isinstance(trains, Exception):
+        logging.error(f"Train search failed: {trains}")
+        errors["train"] = f"Train search failed: {trains}"
+    elif trains is not None:
+        options.extend(_train_option(t) for t in trains.trains)
+
+    options.sort(key=_sort_key(sort_by))
+    selected = options[:max_results]
+    # Keep the best option of a mode that was cut off, so the comparison shows both, replacing
+    # the worst entry of a mode that still has another option listed (never the only one left)
+    for mode in ("flight", "train"):
+        if len(selected) <= 1 or any(o.mode == mode for o in selected):
+            continue
+        best = next((o for o in options if o.mode == mode), None)
+        spare = next(
+            (i for i in reversed(range(len(selected))) if sum(o.mode == selected[i].mode for o in selected) > 1),
+            None,
+        )
+        if best is not None and spare is not None:
+            selected[spare] = best
+    timed = [o for o in options if o.door_to_door_minutes is not None]
+    priced = [o for o in options if o.price is not None]
+    flight_codes, train_codes = codes.get("flight", (None, None)), codes.get("train", (None, None))
+    return TransportComparisonOutput(
+        origin_airport=flight_codes[0],
+        destination_airport=flight_codes[1],
+        origin_station=train_codes[0],
+        destination_station=train_codes[1],
+        options=selected,
+        fastest=min(timed, key=lambda o: o.door_to_door_minutes) if timed else None,
+        cheapest=min(priced, key=lambda o: o.price) if priced else None,
+        errors=errors,
+    )
+
+
+# ---------------- Tools ----------------
+
+async def transport_compare_async(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    sort_by: Literal["door_to_door", "price", "departure"] = "door_to_door",
+    max_results: int = 10,
+    origin_airport: Optional[str] = None,
+    destination_airport: Optional[str] = None,
+    origin_station: Optional[str] = None,
+    destination_station: Optional[str] = None,
+) -> TransportComparisonOutput:
+    """
+    Compare flights and trains between two places on a date in a single call.
+
+    Resolves airport and station codes itself and runs both searches concurrently.
+
+    Args:
+        origin: Origin city, airport/station name or code (e.g. "Delhi", "DEL", "NDLS").
+        destination: Destination city, airport/station name or code.
+        departure_date: Travel date in YYYY-MM-DD format.
+        num_passengers: Number of adult passengers.
+        budget: Maximum flight fare; pricier flights are dropped.
+        currency: Currency for fares (ISO code).
+        sort_by: "door_to_door" (default), "price" or "departure".
+        max_results: Number of options to return across both modes.
+        origin_airport / destination_airport / origin_station / destination_station:
+            Codes to use instead of resolving origin/destination (e.g. after a lookup tool call).
+
+    Returns:
+        TransportComparisonOutput with the ranked options, the fastest and cheapest
+        option, the codes used and, per mode, any reason it was skipped.
+    """
+    codes, errors = _resolve_codes(origin, destination, {
+        "flight": (origin_airport, destination_airport),
+        "train": (origin_station, destination_station),
+    })
+
+    async def _none():
+        return None
+
+    flights, trains = await asyncio.gather(
+        search_flight_records_async(*codes["flight"], departure_date, None, num_passengers, budget, currency)
+        if "flight" in codes else _none(),
+        train_search_async(*codes["train"], departure_date, num_passengers)
+        if "train" in codes else _none(),
+        return_exceptions=True,
+    )
+    return _comparison(codes, errors, flights, trains, sort_by, max_results)
+
+
+def transport_compare(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    num_passengers: int = 1,
+    budget: float = 10000.0,
+    currency: str = "INR",
+    sort_by: Literal["door_to_door", "price", "departure"] = "door_to_door",
+    max_results: int = 10,
+    origin_airport: Optional[str] = None,
+    destination_airport: Optional[str] = None,
+    origin_station: Optional[str] = None,
+    destination_station: Optional[str] = None,
+) -> TransportComparisonOutput:
+    """Sync `transport_compare_async`, for callers without an event loop."""
+    return run_sync(transport_compare_async(
+        origin, destination, departure_date, num_passengers, budget, currency, sort_by, max_results,
+        origin_airport, destination_airport, origin_station, destination_station,
+    ))